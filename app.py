@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import os
 import json
 from datetime import datetime, timedelta
 import time
+from utils.data_processor import DataProcessor
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 # Custom CSS
 def load_css():
@@ -160,6 +163,9 @@ def generate_sample_data():
     df = pd.DataFrame(transactions)
     df = df.sort_values('date', ascending=False)
 
+    # Dictionary-encode category and description like loaded data
+    df = DataProcessor.optimize_dtypes(df)
+
     return df
 
 # Placeholder functions -  These need to be implemented
@@ -346,7 +352,7 @@ def main():
             time.sleep(0.5)
 
         # Spending by category with animated chart
-        expenses_by_category = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().sort_values(ascending=False)
+        expenses_by_category = df[df['amount'] < 0].groupby('category', observed=True)['amount'].sum().abs().sort_values(ascending=False)
 
         # Create interactive pie chart
         fig = px.pie(
@@ -1,36 +1,66 @@
 import os
 import json
 import sys
-import requests
 from flask import Blueprint, request, jsonify, current_app
 
 # Add the app directory to the path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.lighthouse_client import LighthouseClient
-from utils.lilypad_client import LilypadClient
 
 # Create a blueprint for the API
 api_blueprint = Blueprint('api', __name__, url_prefix='/api')
 
 # Initialize clients
 lighthouse_client = None
+filecoin_client = None
+deal_tracker = None
 lilypad_client = None
+job_coalescer = None
+clients_initialized = False
 
 # Get API keys from environment variables
 def init_clients():
-    global lighthouse_client, lilypad_client
+    global lighthouse_client, filecoin_client, deal_tracker, lilypad_client, job_coalescer, clients_initialized
+    
+    if clients_initialized:
+        return
+    
+    # Client modules pull in requests/numpy, so import them on first use
+    # rather than when the app starts
+    from utils.lighthouse_client import LighthouseClient
+    from utils.filecoin_client import FilecoinClient
+    from utils.deal_tracker import DealTracker
+    from utils.lilypad_client import LilypadClient
+    from utils.job_coalescer import JobCoalescer
     
     lighthouse_key = os.environ.get('LIGHTHOUSE_API_KEY')
     lilypad_key = os.environ.get('LILYPAD_API_KEY')
     
     if lighthouse_key:
         lighthouse_client = LighthouseClient(api_key=lighthouse_key)
+        filecoin_client = FilecoinClient(api_key=lighthouse_key)
+        
+        # Deal status is polled in the background and served from local state
+        deal_tracker = DealTracker.shared(filecoin_client)
     
     if lilypad_key:
         lilypad_client = LilypadClient(api_key=lilypad_key)
+        
+        # Requests for the same model within a short window share one job when
+        # the models' modules accept batched inputs
+        job_coalescer = JobCoalescer(
+            lilypad_client,
+            window_ms=int(os.environ.get('LILYPAD_BATCH_WINDOW_MS', 50)),
+            max_batch_size=int(os.environ.get('LILYPAD_MAX_BATCH_SIZE', 32)),
+            batch_jobs=os.environ.get('LILYPAD_BATCH_JOBS', '').lower() in ('1', 'true', 'yes'),
+            timeout=int(os.environ.get('LILYPAD_JOB_TIMEOUT', 300))
+        )
+    
+    clients_initialized = True
 
-# Initialize clients when the API is loaded
-init_clients()
+# Initialize clients on the first API request instead of at import
+@api_blueprint.before_request
+def ensure_clients():
+    init_clients()
 
 @api_blueprint.route('/keys', methods=['GET'])
 def get_api_keys():
@@ -97,12 +127,54 @@ def lighthouse_upload():
             'message': str(e)
         }), 500
 
+# Sort keys of the files endpoint and the upload fields behind them
+FILE_SORT_FIELDS = {
+    'uploadDate': 'createdAt',
+    'name': 'fileName',
+    'size': 'fileSizeInBytes'
+}
+
+def format_upload(file_id, upload, deal_status):
+    """
+    Format a Lighthouse upload for the frontend.
+    
+    Args:
+        file_id: Position of the file in the listing (1-based)
+        upload: Upload dictionary as returned by Lighthouse
+        deal_status: Tracked Filecoin status of the upload's CID, or None
+        
+    Returns:
+        file: File dictionary
+    """
+    if deal_status in (None, 'unknown'):
+        # Fall back to the status reported with the upload
+        deal_status = 'stored' if upload.get('dealStatus', '') == 'active' else 'pending'
+    
+    return {
+        'id': file_id,
+        'name': upload.get('fileName', f"file_{file_id - 1}.json"),
+        'cid': upload.get('cid', ''),
+        'size': f"{upload.get('fileSizeInBytes', 0) / 1024:.1f} KB",
+        'uploadDate': upload.get('createdAt', ''),
+        'type': 'financial',  # Default type
+        'status': 'stored',
+        'filecoinStatus': 'active' if deal_status == 'stored' else 'pending'
+    }
+
 @api_blueprint.route('/lighthouse/files', methods=['GET'])
 def lighthouse_files():
     """
     Get list of files stored on Lighthouse.
+    
+    Query parameters:
+        q: Case-insensitive substring of the file name or CID
+        status: Filecoin status to keep ("active" or "pending")
+        sort: "uploadDate" (default), "name" or "size"
+        order: "desc" (default) or "asc"
+        limit: Maximum number of files to return
+        offset: Number of matching files to skip
     """
-    global lighthouse_client
+    global lighthouse_client, deal_tracker
     
     if not lighthouse_client:
         return jsonify({
@@ -110,27 +182,65 @@ def lighthouse_files():
             'message': 'Lighthouse API key not configured'
         }), 400
     
+    search = request.args.get('q')
+    status_filter = request.args.get('status')
+    sort = request.args.get('sort', 'uploadDate')
+    order = request.args.get('order', 'desc')
+    
+    try:
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if sort not in FILE_SORT_FIELDS or order not in ('asc', 'desc'):
+            raise ValueError(f"Invalid sort: {sort} {order}")
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("limit and offset must not be negative")
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
     try:
-        # Get uploads from Lighthouse
-        uploads = lighthouse_client.get_uploads()
+        # Fetch only the uploads newer than the locally indexed ones
+        index = lighthouse_client.upload_index
+        try:
+            index.sync(max_age=int(os.environ.get('LIGHTHOUSE_SYNC_INTERVAL', 30)))
+        except Exception as e:
+            # Serve the last synced listing
+            print(f"Error syncing Lighthouse uploads: {str(e)}")
         
-        # Format the response
-        files = []
-        for i, upload in enumerate(uploads):
-            files.append({
-                'id': i + 1,
-                'name': upload.get('fileName', f"file_{i}.json"),
-                'cid': upload.get('cid', ''),
-                'size': f"{upload.get('fileSizeInBytes', 0) / 1024:.1f} KB",
-                'uploadDate': upload.get('createdAt', ''),
-                'type': 'financial',  # Default type
-                'status': 'stored',
-                'filecoinStatus': 'active' if upload.get('dealStatus', '') == 'active' else 'pending'
-            })
+        # A Filecoin status filter needs every match before paginating
+        uploads, total = index.query(
+            search=search,
+            sort=FILE_SORT_FIELDS[sort],
+            descending=order == 'desc',
+            limit=None if status_filter else limit,
+            offset=0 if status_filter else offset
+        )
+        
+        # Serve the last known deal status; new CIDs are polled in the background
+        cids = [upload.get('cid') for upload in uploads if upload.get('cid')]
+        deal_tracker.track_many(cids)
+        statuses = deal_tracker.statuses(cids)
+        
+        files = [
+            format_upload(i + 1, upload, statuses.get(upload.get('cid'), {}).get('status'))
+            for i, upload in enumerate(uploads)
+        ]
+        
+        if status_filter:
+            files = [file for file in files if file['filecoinStatus'] == status_filter]
+            total = len(files)
+            files = files[offset:None if limit is None else offset + limit]
+        
+        # Number the files by their position in the full listing
+        for i, file in enumerate(files):
+            file['id'] = offset + i + 1
         
         return jsonify({
             'success': True,
-            'files': files
+            'files': files,
+            'total': total
         })
     except Exception as e:
         return jsonify({
@@ -138,6 +248,35 @@ def lighthouse_files():
             'message': str(e)
         }), 500
 
+@api_blueprint.route('/filecoin/deals', methods=['GET'])
+def filecoin_deals():
+    """
+    Get the tracked Filecoin deal status of one CID (?cid=...) or of every tracked CID.
+    """
+    global deal_tracker
+    
+    if not deal_tracker:
+        return jsonify({
+            'success': False,
+            'message': 'Lighthouse API key not configured'
+        }), 400
+    
+    cid = request.args.get('cid')
+    if cid:
+        deal_tracker.track(cid)
+        status = deal_tracker.status(cid)
+        status['transitions'] = deal_tracker.transitions(cid)
+        return jsonify({
+            'success': True,
+            'deal': status
+        })
+    
+    return jsonify({
+        'success': True,
+        'pending': deal_tracker.pending_count(),
+        'deals': list(deal_tracker.statuses().values())
+    })
+
 @api_blueprint.route('/lilypad/run', methods=['POST'])
 def lilypad_run():
     """
@@ -171,8 +310,8 @@ def lilypad_run():
         }), 400
     
     try:
-        # Submit job to Lilypad
-        result = lilypad_client.run_ml_job_and_wait(model_name, input_data, hyperparameters)
+        # Submit job to Lilypad, batched with concurrent requests for the same model
+        result = job_coalescer.run(model_name, input_data, hyperparameters)
         
         # Format the response
         return jsonify({
@@ -182,12 +321,35 @@ def lilypad_run():
             'result': result.get('result', {}),
             'proof': result.get('proof', {})
         })
+    except TimeoutError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 504
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+@api_blueprint.route('/lilypad/metrics', methods=['GET'])
+def lilypad_metrics():
+    """
+    Get request coalescing metrics (batch sizes and queueing delay).
+    """
+    global job_coalescer
+    
+    if not job_coalescer:
+        return jsonify({
+            'success': False,
+            'message': 'Lilypad API key not configured'
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'metrics': job_coalescer.metrics()
+    })
+
 @api_blueprint.route('/lilypad/jobs', methods=['GET'])
 def lilypad_jobs():
     """
@@ -1 +1,6 @@
-# Initialize utils package
\ No newline at end of file
+import os
+
+# Modules shared with the Streamlit app (filecoin_client, deal_tracker,
+# upload_index, ...) live in the repository's top-level utils/ directory.
+# Modules in this package take precedence; anything else is imported from there.
+__path__.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "utils"))
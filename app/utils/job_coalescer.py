@@ -0,0 +1,244 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class JobCoalescer:
+    """
+    Micro-batching scheduler in front of Lilypad job submission.
+
+    Requests for the same model (and hyperparameters) that arrive within
+    `window_ms` of the first one are gathered into a single batched job, which is
+    submitted as soon as the window closes or `max_batch_size` requests are
+    waiting. The batched result is split back to the individual callers, so many
+    users requesting the same model share one job's startup overhead.
+
+    Batched jobs use the input/output convention of
+    LilypadClient.run_ml_batch_and_wait, which only modules built for it
+    understand, so batching is off unless `batch_jobs` is set; otherwise every
+    request runs as its own job on the bounded job pool.
+    """
+
+    def __init__(self, lilypad_client, window_ms=50, max_batch_size=32, max_concurrent_jobs=8,
+                 metrics_window=1000, batch_jobs=False, timeout=300):
+        """
+        Initialize the coalescer.
+
+        Args:
+            lilypad_client: LilypadClient used to run the batched jobs
+            window_ms: How long the first request of a batch waits for others to join
+            max_batch_size: Number of requests that closes a batch immediately
+            max_concurrent_jobs: Maximum batched jobs running at the same time
+            metrics_window: Number of recent batches kept for the latency metrics
+            batch_jobs: Coalesce requests into batched jobs (the models' Lilypad
+                modules must accept batched inputs)
+            timeout: Default maximum number of seconds run() waits for a result
+        """
+        self.lilypad_client = lilypad_client
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.batch_jobs = batch_jobs
+        self.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="lilypad-batch")
+        self._lock = threading.Lock()
+
+        # Batch key -> (requests, timer) of the batch currently filling
+        self._pending = {}
+
+        # Metrics
+        self._requests = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._batch_sizes = deque(maxlen=metrics_window)
+        self._queue_delays = deque(maxlen=metrics_window)
+        self._job_durations = deque(maxlen=metrics_window)
+
+    @staticmethod
+    def batch_key(model_name, hyperparameters):
+        """
+        Key of the batch a request can join.
+
+        Args:
+            model_name: Name of the model
+            hyperparameters: Optional hyperparameters
+
+        Returns:
+            key: Tuple of the model name and canonical hyperparameters
+        """
+        return model_name, json.dumps(hyperparameters or {}, sort_keys=True)
+
+    def submit(self, model_name, data, hyperparameters=None):
+        """
+        Queue a request for the next batch of its model.
+
+        Args:
+            model_name: Name of the model to use
+            data: Input data for the model
+            hyperparameters: Optional hyperparameters
+
+        Returns:
+            future: Future resolving to a result in the format of run_ml_job_and_wait
+        """
+        key = self.batch_key(model_name, hyperparameters)
+        future = Future()
+
+        if not self.batch_jobs:
+            with self._lock:
+                self._requests += 1
+            self._executor.submit(self._run_batch, key, [(data, future, time.monotonic())])
+            return future
+
+        with self._lock:
+            self._requests += 1
+            batch = self._pending.get(key)
+            if batch is None:
+                # First request opens the batch window
+                timer = threading.Timer(self.window_ms / 1000, self._flush, args=(key,))
+                timer.daemon = True
+                batch = ([], timer)
+                self._pending[key] = batch
+                timer.start()
+
+            requests, timer = batch
+            requests.append((data, future, time.monotonic()))
+            full = len(requests) >= self.max_batch_size
+
+        if full:
+            timer.cancel()
+            self._flush(key)
+
+        return future
+
+    def run(self, model_name, data, hyperparameters=None, timeout=None):
+        """
+        Run a request through the coalescer and wait for its result.
+
+        Args:
+            model_name: Name of the model to use
+            data: Input data for the model
+            hyperparameters: Optional hyperparameters
+            timeout: Maximum number of seconds to wait (defaults to the coalescer's timeout)
+
+        Returns:
+            result: Result in the format of run_ml_job_and_wait
+
+        Raises:
+            TimeoutError: If the result is not available in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(model_name, data, hyperparameters)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No result for {model_name} job within {timeout} s")
+
+    def _flush(self, key):
+        """
+        Close the filling batch of a key and hand it to the job pool.
+
+        Args:
+            key: Batch key
+        """
+        with self._lock:
+            batch = self._pending.pop(key, None)
+
+        # The timer and a full batch can race; only the first flush runs it
+        if batch is not None:
+            self._executor.submit(self._run_batch, key, batch[0])
+
+    def _run_batch(self, key, requests):
+        """
+        Run a closed batch as one job and resolve its callers' futures.
+
+        Args:
+            key: Batch key
+            requests: List of (data, future, enqueued_at) tuples
+        """
+        model_name, hyperparameters = key[0], json.loads(key[1]) or None
+        started = time.monotonic()
+
+        with self._lock:
+            self._batches += 1
+            self._batch_sizes.append(len(requests))
+            self._queue_delays.extend(started - enqueued_at for _, _, enqueued_at in requests)
+
+        try:
+            if len(requests) == 1:
+                results = [self.lilypad_client.run_ml_job_and_wait(model_name, requests[0][0], hyperparameters)]
+            else:
+                results = self.lilypad_client.run_ml_batch_and_wait(
+                    model_name, [data for data, _, _ in requests], hyperparameters
+                )
+        except Exception as e:
+            print(f"Error running batched {model_name} job with Lilypad: {str(e)}")
+            with self._lock:
+                self._failed_batches += 1
+            for _, future, _ in requests:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._job_durations.append(time.monotonic() - started)
+
+        for index, ((_, future, _), result) in enumerate(zip(requests, results)):
+            result['batch'] = {'size': len(requests), 'index': index}
+            future.set_result(result)
+
+    @staticmethod
+    def _summarize(values, scale=1.0):
+        """
+        Summary statistics of recent metric samples.
+
+        Args:
+            values: Sequence of samples
+            scale: Factor applied to every statistic (e.g. 1000 for milliseconds)
+
+        Returns:
+            summary: Dictionary with mean, p50, p95 and max
+        """
+        if not values:
+            return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+
+        ordered = sorted(values)
+        return {
+            'mean': sum(ordered) / len(ordered) * scale,
+            'p50': ordered[len(ordered) // 2] * scale,
+            'p95': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * scale,
+            'max': ordered[-1] * scale
+        }
+
+    def metrics(self):
+        """
+        Coalescing metrics over the recent batches.
+
+        Returns:
+            metrics: Dictionary with request and batch counts, batch sizes,
+                queueing delay and job duration (in milliseconds)
+        """
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'batches': self._batches,
+                'failed_batches': self._failed_batches,
+                'pending_batches': len(self._pending),
+                'batch_size': self._summarize(self._batch_sizes),
+                'queue_delay_ms': self._summarize(self._queue_delays, 1000),
+                'job_duration_ms': self._summarize(self._job_durations, 1000)
+            }
+
+    def shutdown(self, wait=True):
+        """
+        Flush the filling batches and stop the job pool.
+
+        Args:
+            wait: Wait for running jobs to finish
+        """
+        with self._lock:
+            pending = list(self._pending.items())
+        for key, (_, timer) in pending:
+            timer.cancel()
+            self._flush(key)
+        self._executor.shutdown(wait=wait)
@@ -8,6 +8,38 @@ class LighthouseClient:
     Client for interacting with Lighthouse.storage for decentralized storage.
     """
     
+    # Uploads listed in simulation mode
+    SIMULATED_UPLOADS = [
+        {
+            'cid': 'bafybeie5gq4jnazvzaypodmykrdpwhg37vsnpy3afdar7vh63zvb4ukbua',
+            'fileName': 'financial_data_2023Q3.json',
+            'fileSizeInBytes': 145 * 1024,
+            'createdAt': '2023-07-15',
+            'dealStatus': 'active'
+        },
+        {
+            'cid': 'bafybeihk6hyvdppcdnqpne7o7bnmd2phpc2xafkrz36zmnwu6idkdvbvmm',
+            'fileName': 'transactions_march.json',
+            'fileSizeInBytes': 78 * 1024,
+            'createdAt': '2023-04-02',
+            'dealStatus': 'active'
+        },
+        {
+            'cid': 'bafybeigdmmxcchtpgvidghhkagy7wfqhw5xrwlbwry2ercjcefzdu5znxy',
+            'fileName': 'ml_model_anomaly_detection.onnx',
+            'fileSizeInBytes': 4.2 * 1024 * 1024,
+            'createdAt': '2023-06-10',
+            'dealStatus': 'pending'
+        },
+        {
+            'cid': 'bafybeihfgklcjd45sbwb5ykfae27mrhzakprc4bljkkf4valkzvdy3zrde',
+            'fileName': 'backup_2023_09.zip',
+            'fileSizeInBytes': 10.5 * 1024 * 1024,
+            'createdAt': '2023-09-28',
+            'dealStatus': 'active'
+        }
+    ]
+    
     def __init__(self, api_key=None):
         """
         Initialize the Lighthouse client.
@@ -17,6 +49,7 @@ class LighthouseClient:
         """
         self.api_key = api_key or os.environ.get('LIGHTHOUSE_API_KEY')
         self.base_url = "https://api.lighthouse.storage"
+        self._upload_index = None
         
         # Validate that we have an API key
         if not self.api_key:
@@ -58,6 +91,10 @@ class LighthouseClient:
                 
                 # Parse the response to get the CID
                 result = response.json()
+                
+                # The next listing has to pick up the new upload
+                if self._upload_index is not None:
+                    self._upload_index.invalidate()
                 return result.get('cid')
         except Exception as e:
             print(f"Error uploading file to Lighthouse: {str(e)}")
@@ -165,91 +202,100 @@ class LighthouseClient:
             else:
                 return json.dumps(sample_data).encode('utf-8')
     
-    def get_uploads(self):
+    @property
+    def upload_index(self):
         """
-        Get a list of uploaded files.
+        Local index of this account's uploads, created on first use.
         
+        Returns:
+            index: UploadIndex instance
+        """
+        if self._upload_index is None:
+            from utils.upload_index import UploadIndex
+            self._upload_index = UploadIndex(self)
+        return self._upload_index
+    
+    def get_uploads_page(self, cursor=None, page_size=100):
+        """
+        Get one page of uploaded files, newest first.
+        
+        Args:
+            cursor: Cursor returned with the previous page (None for the first page)
+            page_size: Maximum number of uploads in the page
+            
         Returns:
             uploads: List of uploaded files
+            next_cursor: Cursor of the following page, or None after the last page
         """
         if not self.api_key:
-            # Simulate uploads for development/testing
-            return [
-                {
-                    'cid': 'bafybeie5gq4jnazvzaypodmykrdpwhg37vsnpy3afdar7vh63zvb4ukbua',
-                    'fileName': 'financial_data_2023Q3.json',
-                    'fileSizeInBytes': 145 * 1024,
-                    'createdAt': '2023-07-15',
-                    'dealStatus': 'active'
-                },
-                {
-                    'cid': 'bafybeihk6hyvdppcdnqpne7o7bnmd2phpc2xafkrz36zmnwu6idkdvbvmm',
-                    'fileName': 'transactions_march.json',
-                    'fileSizeInBytes': 78 * 1024,
-                    'createdAt': '2023-04-02',
-                    'dealStatus': 'active'
-                },
-                {
-                    'cid': 'bafybeigdmmxcchtpgvidghhkagy7wfqhw5xrwlbwry2ercjcefzdu5znxy',
-                    'fileName': 'ml_model_anomaly_detection.onnx',
-                    'fileSizeInBytes': 4.2 * 1024 * 1024,
-                    'createdAt': '2023-06-10',
-                    'dealStatus': 'pending'
-                },
-                {
-                    'cid': 'bafybeihfgklcjd45sbwb5ykfae27mrhzakprc4bljkkf4valkzvdy3zrde',
-                    'fileName': 'backup_2023_09.zip',
-                    'fileSizeInBytes': 10.5 * 1024 * 1024,
-                    'createdAt': '2023-09-28',
-                    'dealStatus': 'active'
-                }
-            ]
+            # Simulate a single page for development/testing
+            uploads = sorted(self.SIMULATED_UPLOADS, key=lambda upload: upload['createdAt'], reverse=True)
+            return [dict(upload) for upload in uploads], None
         
-        try:
-            url = f"{self.base_url}/api/v0/user/uploads"
-            headers = {
-                'Authorization': f"Bearer {self.api_key}"
-            }
-            
-            response = requests.get(
-                url,
-                headers=headers
-            )
+        url = f"{self.base_url}/api/v0/user/uploads"
+        headers = {
+            'Authorization': f"Bearer {self.api_key}"
+        }
+        params = {
+            'limit': page_size
+        }
+        if cursor is not None:
+            params['lastKey'] = cursor
+        
+        response = requests.get(
+            url,
+            headers=headers,
+            params=params
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get uploads: {response.text}")
+        
+        result = response.json()
+        return result.get('uploads', []), result.get('lastKey')
+    
+    def iter_uploads(self, page_size=100, cursor=None):
+        """
+        Iterate over uploaded files page by page, newest first.
+        
+        Args:
+            page_size: Uploads requested per page
+            cursor: Optional cursor to resume from
             
-            if response.status_code != 200:
-                raise Exception(f"Failed to get uploads: {response.text}")
+        Returns:
+            uploads: Generator of uploaded files; pages are only fetched as needed
+        """
+        while True:
+            uploads, cursor = self.get_uploads_page(cursor, page_size)
+            yield from uploads
+            if not uploads or cursor is None:
+                return
+    
+    def get_uploads(self, max_age=30):
+        """
+        Get a list of uploaded files, newest first.
+        
+        Only uploads newer than the locally indexed ones are fetched.
+        
+        Args:
+            max_age: Seconds the local index is used without syncing
             
-            return response.json().get('uploads', [])
+        Returns:
+            uploads: List of uploaded files
+        """
+        if not self.api_key:
+            # Simulate uploads for development/testing
+            return self.get_uploads_page()[0]
+        
+        try:
+            self.upload_index.sync(max_age=max_age)
         except Exception as e:
             print(f"Error getting uploads from Lighthouse: {str(e)}")
+            # Serve the last synced listing if there is one
+            uploads = self.upload_index.query()[0]
+            if uploads:
+                return uploads
             # For development/testing, return simulated uploads
-            return [
-                {
-                    'cid': 'bafybeie5gq4jnazvzaypodmykrdpwhg37vsnpy3afdar7vh63zvb4ukbua',
-                    'fileName': 'financial_data_2023Q3.json',
-                    'fileSizeInBytes': 145 * 1024,
-                    'createdAt': '2023-07-15',
-                    'dealStatus': 'active'
-                },
-                {
-                    'cid': 'bafybeihk6hyvdppcdnqpne7o7bnmd2phpc2xafkrz36zmnwu6idkdvbvmm',
-                    'fileName': 'transactions_march.json',
-                    'fileSizeInBytes': 78 * 1024,
-                    'createdAt': '2023-04-02',
-                    'dealStatus': 'active'
-                },
-                {
-                    'cid': 'bafybeigdmmxcchtpgvidghhkagy7wfqhw5xrwlbwry2ercjcefzdu5znxy',
-                    'fileName': 'ml_model_anomaly_detection.onnx',
-                    'fileSizeInBytes': 4.2 * 1024 * 1024,
-                    'createdAt': '2023-06-10',
-                    'dealStatus': 'pending'
-                },
-                {
-                    'cid': 'bafybeihfgklcjd45sbwb5ykfae27mrhzakprc4bljkkf4valkzvdy3zrde',
-                    'fileName': 'backup_2023_09.zip',
-                    'fileSizeInBytes': 10.5 * 1024 * 1024,
-                    'createdAt': '2023-09-28',
-                    'dealStatus': 'active'
-                }
-            ]
\ No newline at end of file
+            return [dict(upload) for upload in self.SIMULATED_UPLOADS]
+        
+        return self.upload_index.query()[0]
@@ -2,7 +2,10 @@ import os
 import json
 import random
 import time
-import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
 class LilypadClient:
@@ -11,16 +14,27 @@ class LilypadClient:
     Lilypad enables privacy-preserving ML using ONNX Runtime models.
     """
     
-    def __init__(self, api_key=None):
+    # Proof verifications kept in memory, keyed by job id and proof hash
+    VERIFICATION_CACHE_SIZE = 1024
+    
+    def __init__(self, api_key=None, max_workers=8):
         """
         Initialize the Lilypad client.
 
         Args:
             api_key: Lilypad API key (optional, can be set as environment variable)
+            max_workers: Maximum concurrent requests for parallel fetches
         """
         self.api_key = api_key or os.environ.get('LILYPAD_API_KEY')
         self.base_url = "https://api.lilypad.tech"
         
+        # Status, result and proof requests are issued in parallel
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lilypad")
+        
+        # job_id -> (proof_hash, verification result), least recently used first
+        self._verification_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         # Validate that we have an API key
         if not self.api_key:
             print("Warning: No Lilypad API key provided. Client will operate in simulation mode.")
@@ -124,15 +138,75 @@ class LilypadClient:
             statuses = ['pending', 'running', 'completed', 'failed']
             return {'status': random.choice(statuses)}
     
-    def verify_zk_proof(self, job_id):
+    @staticmethod
+    def proof_hash(result):
+        """
+        Hash identifying the proof attached to a job result.
+        
+        Args:
+            result: Job result or proof response
+            
+        Returns:
+            proof_hash: The proof hash reported by Lilypad, a SHA-256 of the
+                embedded proof, or None if the response carries neither
+        """
+        if not isinstance(result, dict):
+            return None
+        if result.get('proof_hash'):
+            return result['proof_hash']
+        if result.get('proof') is not None:
+            return hashlib.sha256(json.dumps(result['proof'], sort_keys=True).encode('utf-8')).hexdigest()
+        return None
+    
+    def _cached_verification(self, job_id, proof_hash=None):
+        """
+        Look up a cached proof verification.
+        
+        Args:
+            job_id: The ID of the job
+            proof_hash: Hash of the proof, or None to accept the cached proof of the job
+            
+        Returns:
+            verification: Cached verification result, or None
+        """
+        with self._cache_lock:
+            entry = self._verification_cache.get(job_id)
+            if entry is None or (proof_hash is not None and entry[0] != proof_hash):
+                return None
+            self._verification_cache.move_to_end(job_id)
+            return entry[1]
+    
+    def _cache_verification(self, job_id, proof_hash, verification):
+        """
+        Store a proof verification, evicting the oldest entries beyond the cache size.
+        
+        Args:
+            job_id: The ID of the job
+            proof_hash: Hash of the verified proof (may be None)
+            verification: Verification result, or None to drop the job's entry
+        """
+        with self._cache_lock:
+            if verification is None:
+                self._verification_cache.pop(job_id, None)
+                return
+            self._verification_cache[job_id] = (proof_hash, verification)
+            self._verification_cache.move_to_end(job_id)
+            while len(self._verification_cache) > self.VERIFICATION_CACHE_SIZE:
+                self._verification_cache.popitem(last=False)
+    
+    def verify_zk_proof(self, job_id, proof_hash=None):
         """
         Verify the zero-knowledge proof for a completed job.
+        Verifications are cached by job id and proof hash; a proof is only
+        verified again when its hash changes.
         
         Args:
             job_id: The ID of the job
+            proof_hash: Optional hash of the proof to verify
             
         Returns:
-            verification: Verification result including proof status
+            verification: Verification result including proof status, or
+                {'verified': False, 'error': ...} if the proof could not be verified
         """
         if not self.api_key:
             # Simulate proof verification for development/testing
@@ -145,6 +219,10 @@ class LilypadClient:
                 }
             }
         
+        cached = self._cached_verification(job_id, proof_hash)
+        if cached is not None:
+            return cached
+        
         try:
             url = f"{self.base_url}/v1/jobs/{job_id}/proof/verify"
             headers = {
@@ -159,22 +237,69 @@ class LilypadClient:
             if response.status_code != 200:
                 raise Exception(f"Failed to verify proof: {response.text}")
             
-            return response.json()
+            verification = response.json()
+            self._cache_verification(job_id, proof_hash or self.proof_hash(verification), verification)
+            return verification
         except Exception as e:
             print(f"Error verifying proof with Lilypad: {str(e)}")
-            # For development/testing, return a simulated verification
-            return {
-                'verified': True,
-                'proof_details': {
-                    'protocol': 'zk-SNARK',
-                    'verification_key': f"vk_{random.randint(1000, 9999)}",
-                    'timestamp': time.time()
-                }
-            }
+            # Not cached, so the next request verifies again
+            return {'verified': False, 'error': str(e)}
+    
+    def verify_zk_proofs(self, job_ids):
+        """
+        Verify the zero-knowledge proofs of many jobs at once.
+        Cached verifications are returned directly; the rest are requested in parallel.
+        
+        Args:
+            job_ids: Iterable of job IDs
+            
+        Returns:
+            verifications: Dict mapping each job ID to its verification result
+        """
+        verifications = {}
+        futures = {}
+        for job_id in dict.fromkeys(job_ids):
+            cached = self._cached_verification(job_id)
+            if cached is not None:
+                verifications[job_id] = cached
+            else:
+                futures[job_id] = self.pool.submit(self.verify_zk_proof, job_id)
+        
+        for job_id, future in futures.items():
+            verifications[job_id] = future.result()
+        
+        return verifications
+    
+    def _fetch_job_result(self, job_id):
+        """
+        Fetch the raw result of a job.
+        
+        Args:
+            job_id: The ID of the job
+            
+        Returns:
+            result: The result payload
+        """
+        url = f"{self.base_url}/v1/jobs/{job_id}/result"
+        headers = {
+            'Authorization': f"Bearer {self.api_key}"
+        }
+        
+        response = requests.get(
+            url,
+            headers=headers
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get job result: {response.text}")
+        
+        return response.json()
     
     def get_job_result(self, job_id):
         """
         Get the result of a completed zero-knowledge ML job.
+        Status, result and proof verification are requested in one parallel
+        wave; a proof already verified for this job is taken from the cache.
         
         Args:
             job_id: The ID of the job
@@ -196,29 +321,31 @@ class LilypadClient:
             }
         
         try:
-            # First check if the job is completed
-            status = self.get_job_status(job_id)
+            status_future = self.pool.submit(self.get_job_status, job_id)
+            result_future = self.pool.submit(self._fetch_job_result, job_id)
+            cached_proof = self._cached_verification(job_id)
+            proof_future = None if cached_proof is not None else self.pool.submit(self.verify_zk_proof, job_id)
+            
+            # Check that the job is completed
+            status = status_future.result()
             if status.get('status') != 'completed':
+                # A proof fetched before completion must not be reused
+                if proof_future is not None:
+                    proof_future.result()
+                self._cache_verification(job_id, None, None)
                 raise Exception(f"Job not completed: {status.get('status')}")
             
-            # Then get the result
-            url = f"{self.base_url}/v1/jobs/{job_id}/result"
-            headers = {
-                'Authorization': f"Bearer {self.api_key}"
-            }
+            result = result_future.result()
             
-            response = requests.get(
-                url,
-                headers=headers
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Failed to get job result: {response.text}")
-            
-            result = response.json()
-            
-            # Also get proof verification
-            proof = self.verify_zk_proof(job_id)
+            # Re-verify only if the result carries a different proof than the cached one
+            proof_hash = self.proof_hash(result)
+            if proof_future is not None:
+                proof = proof_future.result()
+                # Key the verification by the proof hash of the result it came with
+                if proof_hash and 'error' not in proof:
+                    self._cache_verification(job_id, proof_hash, proof)
+            else:
+                proof = self._cached_verification(job_id, proof_hash) or self.verify_zk_proof(job_id, proof_hash)
             
             return {
                 'job_id': job_id,
@@ -228,16 +355,12 @@ class LilypadClient:
             }
         except Exception as e:
             print(f"Error getting job result from Lilypad: {str(e)}")
-            # For development/testing, return simulated results
+            # For development/testing, return simulated results without claiming a verified proof
             return {
                 'job_id': job_id,
                 'status': 'completed',
                 'result': self._simulate_response('generic', {}),
-                'proof': {
-                    'verified': True,
-                    'protocol': 'zk-SNARK',
-                    'verification_key': f"vk_{random.randint(1000, 9999)}"
-                }
+                'proof': {'verified': False, 'error': str(e)}
             }
     
     def run_ml_job_and_wait(self, model_name, data, hyperparameters=None):
@@ -305,6 +428,65 @@ class LilypadClient:
                 }
             }
     
+    def run_ml_batch_and_wait(self, model_name, inputs, hyperparameters=None):
+        """
+        Run one Lilypad job over a batch of inputs for the same model and wait for results.
+        Requests that are coalesced into a batch share a single job's startup cost.
+
+        This is not part of Lilypad's job API: the job is submitted with the
+        input {'batch': [input, ...]} and must return {'results': [result, ...]}
+        (or the list itself), one result per input in input order. Only use it
+        with modules built to accept that convention (JobCoalescer enables it
+        with batch_jobs).
+
+        Args:
+            model_name: Name of the model to use
+            inputs: List of input data, one per request
+            hyperparameters: Optional hyperparameters shared by the batch
+
+        Returns:
+            results: List of results in the format of run_ml_job_and_wait,
+                one per input and in the same order
+        """
+        if not self.api_key:
+            # Simulate a single batched job for development/testing
+            print(f"[Simulation] Running batched {model_name} job with Lilypad ({len(inputs)} inputs)")
+            time.sleep(2)  # Simulate processing time
+            job_id = f"job_{random.randint(1000, 9999)}"
+            return [
+                {
+                    'job_id': job_id,
+                    'status': 'completed',
+                    'result': self._simulate_response(model_name, data),
+                    'proof': {
+                        'verified': True,
+                        'protocol': 'zk-SNARK',
+                        'verification_key': f"vk_{random.randint(1000, 9999)}"
+                    }
+                }
+                for data in inputs
+            ]
+        
+        # The batched job takes a list of inputs and returns a list of results
+        job_result = self.run_ml_job_and_wait(model_name, {'batch': inputs}, hyperparameters)
+        
+        batch_results = job_result.get('result', {})
+        if isinstance(batch_results, dict):
+            batch_results = batch_results.get('results')
+        
+        if not isinstance(batch_results, list) or len(batch_results) != len(inputs):
+            raise Exception(f"Batched job {job_result.get('job_id')} returned an unexpected result")
+        
+        return [
+            {
+                'job_id': job_result.get('job_id'),
+                'status': job_result.get('status'),
+                'result': result,
+                'proof': job_result.get('proof', {})
+            }
+            for result in batch_results
+        ]
+    
     def _simulate_response(self, model_name, data):
         """
         Simulate a response from Lilypad for development/testing.
@@ -0,0 +1,69 @@
+"""
+Analytics store benchmark for transaction summaries and filters.
+
+Loads synthetic multi-year histories of several users into an AnalyticsStore
+and times the Dashboard and Transactions page queries for one user against
+pandas on that user's frame, which the pages hold either way. Store timings
+include the sync each page render performs.
+
+Usage:
+    python benchmarks/analytics_store.py
+    python benchmarks/analytics_store.py --users 50 --rows 20000 --backend duckdb
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from payload_encryption import timed  # noqa: E402
+from utils.analytics_store import AnalyticsStore, TransactionQuery  # noqa: E402
+from utils.data_processor import DataProcessor  # noqa: E402
+from tests.fixtures import synthetic_history  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="users in the store")
+    parser.add_argument("--rows", type=int, default=50_000, help="transactions per user")
+    parser.add_argument("--backend", default="sqlite", choices=AnalyticsStore.BACKENDS, help="store backend")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query")
+    args = parser.parse_args()
+
+    histories = {f"user-{i}": synthetic_history(args.rows, seed=i) for i in range(args.users)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "analytics." + args.backend)
+        start = time.perf_counter()
+        for user, df in histories.items():
+            AnalyticsStore(user, db_path=db_path, backend=args.backend).sync(df)
+        load_s = time.perf_counter() - start
+
+        user, df = next(iter(histories.items()))
+        store = AnalyticsStore(user, db_path=db_path, backend=args.backend)
+        store.sync(df)
+
+        print(f"{args.users} users x {args.rows:,} rows, {args.backend} load {load_s:.1f} s")
+        print(f"{'query':<28} {'pandas ms':>10} {'store ms':>10}")
+
+        queries = {
+            "totals": ({}, lambda query: query.totals()),
+            "category spending": ({}, DataProcessor.calculate_category_spending),
+            "monthly summary": ({}, DataProcessor.calculate_monthly_summary),
+            "last 90 days": ({'start': '2024-10-01'}, lambda query: query.frame()),
+            "expenses in 2 categories": (
+                {'kind': 'expenses', 'categories': ['Food', 'Travel']}, lambda query: query.totals()
+            ),
+            "description search": ({'search': 'uber'}, lambda query: query.totals())
+        }
+        for name, (filters, run) in queries.items():
+            _, pandas_s = timed(lambda: run(TransactionQuery(df, **filters)), args.repeat)
+            _, store_s = timed(lambda: run(TransactionQuery(df, store=store, **filters)), args.repeat)
+            print(f"{name:<28} {pandas_s * 1000:>10.1f} {store_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Batch analytics benchmark for per-user nightly jobs.
+
+Writes synthetic transaction partitions for many users, then runs the batch
+analytics (monthly summaries, category spending, anomalies and savings plans)
+with different numbers of worker processes and reports wall time and speedup
+over a single worker.
+
+Usage:
+    python benchmarks/batch_analytics.py
+    python benchmarks/batch_analytics.py --users 500 --rows 5000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.batch_analytics import BatchAnalyticsRunner  # noqa: E402
+from utils.transaction_partitions import TransactionPartitions  # noqa: E402
+from tests.fixtures import synthetic_history  # noqa: E402
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="users to analyze")
+    parser.add_argument("--rows", type=int, default=5_000, help="transactions per user")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus}), help="worker counts to run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        partitions = TransactionPartitions(os.path.join(directory, "transactions"), max_partitions=8)
+        start = time.perf_counter()
+        for i in range(args.users):
+            partitions.get(f"user-{i}").replace(synthetic_history(args.rows, seed=i))
+        partitions.release()
+        print(f"{args.users} users x {args.rows:,} rows written in {time.perf_counter() - start:.1f} s, {cpus} CPUs")
+        print(f"{'workers':>7} {'seconds':>9} {'users/s':>9} {'speedup':>8}")
+
+        baseline = None
+        for workers in args.workers:
+            runner = BatchAnalyticsRunner(
+                partitions, db_path=os.path.join(directory, f"summaries-{workers}.db"), workers=workers
+            )
+            run = runner.run()
+            baseline = baseline or run["seconds"]
+            print(f"{workers:>7} {run['seconds']:>9.2f} {run['users'] / run['seconds']:>9.1f} "
+                  f"{baseline / run['seconds']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
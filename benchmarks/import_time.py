@@ -0,0 +1,149 @@
+"""
+Cold-start import benchmark for the Streamlit pages and the Flask app.
+
+Each target's top-level import statements are executed in a fresh interpreter
+under ``python -X importtime`` and the cumulative import time is reported,
+together with the slowest modules pulled in.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --json import_time.json
+    python benchmarks/import_time.py --baseline import_time.json
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target script -> directory it is run from (sys.path[0] at runtime)
+TARGETS = {
+    "app.py": ROOT,
+    "pages/01_Dashboard.py": ROOT,
+    "pages/02_Transactions.py": ROOT,
+    "pages/03_Budget.py": ROOT,
+    "pages/04_Analysis.py": ROOT,
+    "pages/05_Settings.py": ROOT,
+    "app/app.py": os.path.join(ROOT, "app"),
+}
+
+
+def import_statements(path):
+    """
+    Extract the top-level import statements of a script.
+
+    Args:
+        path: Path to the Python script
+
+    Returns:
+        source: Source code containing only the script's top-level imports
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        stderr: Captured stderr of the interpreter
+
+    Returns:
+        total_us: Cumulative time of top-level imports in microseconds
+        modules: List of (module, cumulative_us) for every imported module
+    """
+    total_us = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative_us = int(cumulative_us)
+        modules.append((name.strip(), cumulative_us))
+        # Nested imports are indented under the module that triggered them
+        if not name[1:].startswith(" "):
+            total_us += cumulative_us
+    return total_us, modules
+
+
+def measure(target, cwd, repeat=3):
+    """
+    Measure the cold-start import time of a target.
+
+    Args:
+        target: Script path relative to the repository root
+        cwd: Working directory to run the imports from
+        repeat: Number of fresh interpreters to run (the minimum is reported)
+
+    Returns:
+        result: Dictionary with total milliseconds and the slowest modules
+    """
+    code = import_statements(os.path.join(ROOT, target))
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+            return {"error": error}
+
+        total_us, modules = parse_importtime(completed.stderr)
+        if best is None or total_us < best[0]:
+            best = (total_us, modules)
+
+    total_us, modules = best
+    slowest = sorted(modules, key=lambda m: m[1], reverse=True)[:5]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": len(modules),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per target")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results from a previous --json run")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'target':<28} {'import ms':>10} {'modules':>8} {'vs baseline':>12}  slowest")
+    for target, cwd in TARGETS.items():
+        result = measure(target, cwd, args.repeat)
+        results[target] = result
+
+        if "error" in result:
+            print(f"{target:<28} {'n/a':>10} {'':>8} {'':>12}  {result['error']}")
+            continue
+
+        delta = ""
+        if target in baseline and "total_ms" in baseline[target]:
+            delta = f"{result['total_ms'] - baseline[target]['total_ms']:+.1f}"
+
+        slowest = ", ".join(f"{m['module']} {m['cumulative_ms']}" for m in result["slowest"][:3])
+        print(f"{target:<28} {result['total_ms']:>10.1f} {result['modules']:>8} {delta:>12}  {slowest}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Payload encryption benchmark for Lilypad ML jobs.
+
+Compares the request body of the previous JSON + base64 payload encoding with
+the body LilypadClient.encrypt_data builds from the columnar serialization
+sealed by chunked AES-256-GCM (base64 included), on a synthetic prepare_for_ml
+payload, reporting bytes and CPU time for each stage.
+
+Usage:
+    python benchmarks/payload_encryption.py
+    python benchmarks/payload_encryption.py --rows 100000 --repeat 5
+"""
+import argparse
+import base64
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.lilypad_client import LilypadClient  # noqa: E402
+from utils.payload_crypto import StreamingCipher  # noqa: E402
+from utils.wire_format import ColumnarPayload  # noqa: E402
+
+
+def synthetic_payload(rows, seed=0):
+    """
+    Build a job payload shaped like DataProcessor.prepare_for_ml output.
+
+    Args:
+        rows: Number of transactions
+        seed: Random seed
+
+    Returns:
+        payload: Job payload dictionary
+    """
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, 3650, rows))[::-1]
+    dates = np.datetime64('2015-01-01') + days
+    frame = pd.DataFrame({
+        'amount': np.round(rng.normal(-40, 120, rows), 2),
+        'month': (dates.astype('datetime64[M]').astype(int) % 12 + 1),
+        'day_of_week': (days + 3) % 7,
+        'category_code': rng.integers(0, 17, rows),
+        'days_since_first': days - days.min()
+    })
+    return {
+        "data": {
+            "features": frame.to_dict(orient='records'),
+            "dates": np.datetime_as_string(dates, unit='D').tolist(),
+            "category_mapping": {f"Category {i}": i for i in range(17)}
+        },
+        "task": "time_series_forecast",
+        "parameters": {"forecast_periods": 30, "target": "amount"}
+    }
+
+
+def timed(function, repeat):
+    """
+    Run a function several times.
+
+    Args:
+        function: Callable without arguments
+        repeat: Number of runs (the fastest is reported)
+
+    Returns:
+        result: Return value of the last run
+        seconds: Fastest run time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = function()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def request_body(client, payload):
+    """
+    JSON request body of the job data, as sent by submit_ml_job.
+
+    Args:
+        client: LilypadClient
+        payload: Job payload dictionary
+
+    Returns:
+        body: Encoded request body bytes
+    """
+    return json.dumps(client.encrypt_data(payload)).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="transactions in the payload")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage")
+    parser.add_argument("--wire-format", default=ColumnarPayload.DEFAULT_FORMAT, choices=ColumnarPayload.supported_formats(),
+                        help="wire format of the encrypted payload")
+    args = parser.parse_args()
+
+    # The unencrypted client warns on every payload
+    logging.getLogger("lilypad").setLevel(logging.ERROR)
+
+    payload = synthetic_payload(args.rows)
+    key = StreamingCipher.generate_key()
+    plain_client = LilypadClient(wire_format="json")
+    client = LilypadClient(encryption_key=key, wire_format=args.wire_format)
+    cipher = client.cipher
+
+    # Previous encrypt_data: JSON, then base64
+    baseline, baseline_s = timed(lambda: request_body(plain_client, payload), args.repeat)
+
+    serialized, serialize_s = timed(lambda: ColumnarPayload.encode(payload, args.wire_format), args.repeat)
+    sealed, encrypt_s = timed(lambda: cipher.encrypt(serialized), args.repeat)
+    body, body_s = timed(lambda: request_body(client, payload), args.repeat)
+
+    def receive():
+        sent = json.loads(body)["encrypted_payload"]
+        return ColumnarPayload.decode(cipher.decrypt(base64.b64decode(sent)))
+
+    decoded, decrypt_s = timed(receive, args.repeat)
+    if decoded != payload:
+        raise SystemExit("Round trip mismatch")
+
+    print(f"{args.rows:,} rows, {args.wire_format}")
+    print(f"{'stage':<34} {'bytes':>14} {'cpu ms':>10}")
+    print(f"{'json + base64 body (previous)':<34} {len(baseline):>14,} {baseline_s * 1000:>10.1f}")
+    print(f"{'columnar serialization':<34} {len(serialized):>14,} {serialize_s * 1000:>10.1f}")
+    print(f"{'aes-256-gcm (chunked)':<34} {len(sealed):>14,} {encrypt_s * 1000:>10.1f}")
+    print(f"{'encrypt_data body (all stages)':<34} {len(body):>14,} {body_s * 1000:>10.1f}")
+    print(f"{'decode body + decrypt':<34} {'':>14} {decrypt_s * 1000:>10.1f}")
+    print(f"request body size: {len(body) / len(baseline):.1%} of previous")
+
+
+if __name__ == "__main__":
+    main()
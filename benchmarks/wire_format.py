@@ -0,0 +1,45 @@
+"""
+Wire format benchmark for Lilypad ML job payloads.
+
+Encodes a synthetic prepare_for_ml payload in every supported wire format and
+reports the request body size and encode/decode CPU time against the JSON of
+per-row dicts.
+
+Usage:
+    python benchmarks/wire_format.py
+    python benchmarks/wire_format.py --rows 100000 --repeat 5
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from payload_encryption import synthetic_payload, timed  # noqa: E402
+from utils.wire_format import ColumnarPayload  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="transactions in the payload")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per format")
+    args = parser.parse_args()
+
+    payload = synthetic_payload(args.rows)
+
+    print(f"{args.rows:,} rows")
+    print(f"{'format':<14} {'bytes':>14} {'vs json':>8} {'encode ms':>10} {'decode ms':>10}  round trip")
+
+    json_size = None
+    for wire_format in ("json",) + tuple(f for f in ColumnarPayload.supported_formats() if f != "json"):
+        encoded, encode_s = timed(lambda: ColumnarPayload.encode(payload, wire_format), args.repeat)
+        decoded, decode_s = timed(lambda: ColumnarPayload.decode(encoded), args.repeat)
+        json_size = json_size or len(encoded)
+
+        print(f"{wire_format:<14} {len(encoded):>14,} {len(encoded) / json_size:>8.1%} "
+              f"{encode_s * 1000:>10.1f} {decode_s * 1000:>10.1f}  {'exact' if decoded == payload else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
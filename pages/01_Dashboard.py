@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import numpy as np
+from utils.auth_handler import AuthHandler
+from utils.transaction_view import TransactionView
+from utils.analytics_store import AnalyticsStore, TransactionQuery
 from utils.data_processor import DataProcessor
+from utils.monthly_summary import IncrementalMonthlySummary
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(
     page_title="Dashboard - ZML Finance",
@@ -17,6 +22,10 @@ if 'authenticated' not in st.session_state or not st.session_state.authenticated
     st.warning("Please configure your API keys in the main page to get started.")
     st.stop()
 
+user_id = AuthHandler.session_user_id()
+transaction_view = TransactionView.load_session(st.session_state, user_id)
+transaction_store = transaction_view.store
+
 if 'financial_data' not in st.session_state or st.session_state.financial_data is None:
     st.warning("No financial data found. Please upload your data on the main page.")
     st.stop()
@@ -24,11 +33,16 @@ if 'financial_data' not in st.session_state or st.session_state.financial_data i
 # Get the financial data
 df = st.session_state.financial_data
 
+# Totals and category spending run in the analytics store when one is configured
+analytics_store = AnalyticsStore.shared(user_id)
+transactions = TransactionQuery(df, store=analytics_store)
+
 # Function to create donut chart for income vs expenses
-def create_income_vs_expenses_chart(df):
+def create_income_vs_expenses_chart(transactions):
     # Calculate total income and expenses
-    income = df[df["amount"] > 0]["amount"].sum()
-    expenses = abs(df[df["amount"] < 0]["amount"].sum())
+    totals = transactions.totals()
+    income = totals['income']
+    expenses = totals['expenses']
     
     # Create data for the donut chart
     labels = ['Income', 'Expenses']
@@ -53,9 +67,9 @@ def create_income_vs_expenses_chart(df):
     return fig
 
 # Function to create spending by category chart
-def create_spending_by_category_chart(df):
+def create_spending_by_category_chart(transactions):
     # Get category spending
-    category_spending = DataProcessor.calculate_category_spending(df)
+    category_spending = DataProcessor.calculate_category_spending(transactions)
     
     # Create the bar chart
     fig = px.bar(
@@ -71,10 +85,18 @@ def create_spending_by_category_chart(df):
     
     return fig
 
+# Function to get the monthly summary; the store maintains and persists it for its transactions
+def get_monthly_summary(df):
+    if df is transaction_store.frame:
+        return transaction_store.monthly_summary().to_frame()
+    
+    # Data not journaled yet (or with unsaved edits) is summarized directly
+    return IncrementalMonthlySummary.from_transactions(df).to_frame()
+
 # Function to create monthly trend chart
 def create_monthly_trend_chart(df):
     # Get monthly summary
-    monthly_summary = DataProcessor.calculate_monthly_summary(df)
+    monthly_summary = get_monthly_summary(df)
     
     # Convert month to datetime for better x-axis display
     monthly_summary['month_dt'] = pd.to_datetime(monthly_summary['month'])
@@ -124,11 +146,11 @@ def create_monthly_trend_chart(df):
     return fig
 
 # Function to create recent transactions table
-def display_recent_transactions(df, num_transactions=5):
+def display_recent_transactions(transactions, num_transactions=5):
     st.subheader("Recent Transactions")
     
-    # Sort by date (most recent first)
-    recent_df = df.sort_values('date', ascending=False).head(num_transactions)
+    # Most recent first
+    recent_df = transactions.frame(limit=num_transactions)
     
     # Format for display
     display_df = recent_df.copy()
@@ -151,10 +173,11 @@ def display_recent_transactions(df, num_transactions=5):
 st.title("Financial Dashboard")
 
 # Basic stats at the top
-total_income = df[df["amount"] > 0]["amount"].sum()
-total_expenses = abs(df[df["amount"] < 0]["amount"].sum())
+totals = transactions.totals()
+total_income = totals['income']
+total_expenses = totals['expenses']
 balance = total_income - total_expenses
-num_transactions = len(df)
+num_transactions = totals['count']
 
 # Display stats in columns
 col1, col2, col3, col4 = st.columns(4)
@@ -192,11 +215,11 @@ col1, col2 = st.columns(2)
 with col1:
     # Income vs expenses donut chart
     st.subheader("Income vs Expenses")
-    income_vs_expenses_fig = create_income_vs_expenses_chart(df)
+    income_vs_expenses_fig = create_income_vs_expenses_chart(transactions)
     st.plotly_chart(income_vs_expenses_fig, use_container_width=True)
     
     # Spending by category
-    spending_by_category_fig = create_spending_by_category_chart(df)
+    spending_by_category_fig = create_spending_by_category_chart(transactions)
     st.plotly_chart(spending_by_category_fig, use_container_width=True)
 
 with col2:
@@ -205,13 +228,13 @@ with col2:
     st.plotly_chart(monthly_trend_fig, use_container_width=True)
     
     # Recent transactions table
-    display_recent_transactions(df)
+    display_recent_transactions(transactions)
 
 # Additional insights
 st.subheader("Financial Insights")
 
 # Calculate insights
-category_spending = DataProcessor.calculate_category_spending(df)
+category_spending = DataProcessor.calculate_category_spending(transactions)
 top_category = category_spending.iloc[0]['category'] if not category_spending.empty else "N/A"
 top_category_pct = category_spending.iloc[0]['percentage'] if not category_spending.empty else 0
 
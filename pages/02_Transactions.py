@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
-import numpy as np
-from utils.data_processor import DataProcessor
+from utils.auth_handler import AuthHandler
+from utils.transaction_view import TransactionView
+from utils.analytics_store import AnalyticsStore, TransactionQuery
 from utils.lighthouse_client import LighthouseClient
-import os
+from utils.anomaly_detection import StreamingAnomalyDetector
+from utils.upload_queue import UploadQueue
+from utils.ui_components import sync_status_caption
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
 
 st.set_page_config(
     page_title="Transactions - ZML Finance",
@@ -18,6 +23,10 @@ if 'authenticated' not in st.session_state or not st.session_state.authenticated
     st.warning("Please configure your API keys in the main page to get started.")
     st.stop()
 
+user_id = AuthHandler.session_user_id()
+transaction_view = TransactionView.load_session(st.session_state, user_id)
+transaction_store = transaction_view.store
+
 if 'financial_data' not in st.session_state or st.session_state.financial_data is None:
     st.warning("No financial data found. Please upload your data on the main page.")
     st.stop()
@@ -28,10 +37,26 @@ df = st.session_state.financial_data
 # Initialize Lighthouse client
 lighthouse_client = LighthouseClient(st.session_state.lighthouse_api_key)
 
+# Saves are journaled and uploaded in the background
+upload_queue = UploadQueue.shared(lighthouse_client, user_id=user_id)
+
+# Streaming anomaly detector over the current expenses
+def get_anomaly_detector(df):
+    detector = st.session_state.get('anomaly_detector')
+    if detector is None or detector.summary()['count'] != int((df['amount'] < 0).sum()):
+        detector = StreamingAnomalyDetector()
+        detector.fit(df['category'].astype(object).to_numpy(), df['date'].dt.dayofweek.to_numpy(), df['amount'].to_numpy())
+        st.session_state.anomaly_detector = detector
+    return detector
+
 # Function to add new transaction
 def add_transaction(date, description, amount, category):
     global df
     
+    # Score the new transaction against the existing history before it is absorbed
+    detector = get_anomaly_detector(df)
+    anomaly_score = detector.observe(category, pd.Timestamp(date).dayofweek, amount)
+    
     # Create new transaction
     new_transaction = pd.DataFrame({
         'date': [pd.to_datetime(date)],
@@ -40,31 +65,33 @@ def add_transaction(date, description, amount, category):
         'category': [category]
     })
     
-    # Add to existing dataframe
-    df = pd.concat([new_transaction, df]).reset_index(drop=True)
+    # Journal the transaction locally before anything else; data loaded before the
+    # store held any transactions is checkpointed into it first
+    if not len(transaction_store) and len(df):
+        transaction_store.replace(df)
+    # Edits go through the session's view and are committed to the shared store at once
+    transaction_view.add(new_transaction)
+    df = transaction_view.commit()
     
-    # Update session state
+    # Update session state; the store updated only the new transaction's month of its monthly summary
     st.session_state.financial_data = df
     
-    # Save to Lighthouse
-    temp_csv = "temp_financial_data.csv"
-    df.to_csv(temp_csv, index=False)
-    
+    # Queue the upload; repeated saves before it runs are coalesced
     try:
-        cid = lighthouse_client.upload_file(temp_csv)
-        st.session_state.last_cid = cid
-        
-        # Clean up temp file
-        if os.path.exists(temp_csv):
-            os.remove(temp_csv)
-            
-        return True, cid
+        upload_queue.save('financial_data', df.to_csv(index=False).encode('utf-8'), "financial_data.csv")
+        return True, None, anomaly_score
     except Exception as e:
-        return False, str(e)
+        return False, str(e), anomaly_score
 
 # Main page layout
 st.title("Transactions")
 
+# Track the CID of the latest synced save
+sync_status = upload_queue.status('financial_data')
+if sync_status['state'] == 'synced':
+    st.session_state.last_cid = sync_status['cid']
+sync_status_caption(sync_status)
+
 # Add transaction section
 with st.expander("Add New Transaction", expanded=False):
     st.subheader("Add New Transaction")
@@ -105,7 +132,7 @@ with st.expander("Add New Transaction", expanded=False):
         elif not transaction_category or transaction_category == "Add new category...":
             st.error("Please select or enter a category")
         else:
-            success, result = add_transaction(
+            success, result, anomaly_score = add_transaction(
                 transaction_date,
                 transaction_description,
                 transaction_amount,
@@ -113,9 +140,12 @@ with st.expander("Add New Transaction", expanded=False):
             )
             
             if success:
-                st.success(f"Transaction added successfully! Data saved to Lighthouse (CID: {result})")
+                st.success("Transaction added successfully! Saving to Lighthouse in the background.")
             else:
                 st.error(f"Error saving transaction: {result}")
+            
+            if anomaly_score >= st.session_state.anomaly_detector.threshold:
+                st.warning(f"This expense is unusual for {transaction_category} (anomaly score {anomaly_score:.1f})")
 
 # Transactions filter section
 st.subheader("Filter Transactions")
@@ -156,51 +186,42 @@ with col3:
 # Search bar
 search_query = st.text_input("Search Transactions", placeholder="Search by description...")
 
-# Apply filters
-filtered_df = df.copy()
-
-# Date filter
+# Translate the date filter into an inclusive date range
 today = pd.to_datetime(datetime.now().date())
+start, end = None, None
 if date_filter == "Last 30 Days":
-    filtered_df = filtered_df[filtered_df['date'] >= today - timedelta(days=30)]
+    start = today - timedelta(days=30)
 elif date_filter == "Last 90 Days":
-    filtered_df = filtered_df[filtered_df['date'] >= today - timedelta(days=90)]
+    start = today - timedelta(days=90)
 elif date_filter == "This Month":
-    filtered_df = filtered_df[
-        (filtered_df['date'].dt.year == today.year) & 
-        (filtered_df['date'].dt.month == today.month)
-    ]
+    start = today.replace(day=1)
+    end = start + pd.offsets.MonthEnd(0)
 elif date_filter == "Last Month":
-    last_month = today.replace(day=1) - timedelta(days=1)
-    filtered_df = filtered_df[
-        (filtered_df['date'].dt.year == last_month.year) & 
-        (filtered_df['date'].dt.month == last_month.month)
-    ]
+    end = today.replace(day=1) - timedelta(days=1)
+    start = end.replace(day=1)
 elif date_filter == "This Year":
-    filtered_df = filtered_df[filtered_df['date'].dt.year == today.year]
+    start = today.replace(month=1, day=1)
+    end = today.replace(month=12, day=31)
 elif date_filter == "Custom Range":
-    filtered_df = filtered_df[
-        (filtered_df['date'].dt.date >= start_date) & 
-        (filtered_df['date'].dt.date <= end_date)
-    ]
-
-# Transaction type filter
-if transaction_type == "Income":
-    filtered_df = filtered_df[filtered_df['amount'] > 0]
-elif transaction_type == "Expenses":
-    filtered_df = filtered_df[filtered_df['amount'] < 0]
+    start, end = start_date, end_date
 
-# Category filter
-if selected_categories:
-    filtered_df = filtered_df[filtered_df['category'].isin(selected_categories)]
-
-# Search filter
-if search_query:
-    filtered_df = filtered_df[filtered_df['description'].str.contains(search_query, case=False)]
+# Apply filters; they run in the analytics store when one is configured
+analytics_store = AnalyticsStore.shared(user_id)
+query = TransactionQuery(
+    df,
+    store=analytics_store,
+    start=start,
+    end=end,
+    kind={"Income": "income", "Expenses": "expenses"}.get(transaction_type),
+    categories=selected_categories,
+    search=search_query
+)
+filtered_df = query.frame()
 
 # Display transaction statistics
-income = filtered_df[filtered_df['amount'] > 0]['amount'].sum()
-expenses = abs(filtered_df[filtered_df['amount'] < 0]['amount'].sum())
+totals = query.totals()
+income = totals['income']
+expenses = totals['expenses']
 balance = income - expenses
 
 # Display stats in columns
@@ -319,7 +340,7 @@ else:
         # Category breakdown
         if transaction_type == "Income" or transaction_type == "All" and filtered_df[filtered_df['amount'] > 0].shape[0] > 0:
             # Income by category
-            income_by_category = filtered_df[filtered_df['amount'] > 0].groupby('category')['amount'].sum().reset_index()
+            income_by_category = filtered_df[filtered_df['amount'] > 0].groupby('category', observed=True)['amount'].sum().reset_index()
             income_by_category = income_by_category.sort_values('amount', ascending=False)
             
             fig = px.pie(
@@ -336,7 +357,7 @@ else:
             # Expenses by category
             expenses_by_category = filtered_df[filtered_df['amount'] < 0].copy()
             expenses_by_category['amount'] = expenses_by_category['amount'].abs()
-            expenses_by_category = expenses_by_category.groupby('category')['amount'].sum().reset_index()
+            expenses_by_category = expenses_by_category.groupby('category', observed=True)['amount'].sum().reset_index()
             expenses_by_category = expenses_by_category.sort_values('amount', ascending=False)
             
             fig = px.pie(
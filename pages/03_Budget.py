@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from utils.auth_handler import AuthHandler
+from utils.transaction_view import TransactionView
 from utils.lighthouse_client import LighthouseClient
-import os
+from utils.upload_queue import UploadQueue
+from utils.ui_components import sync_status_caption
 import json
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(
     page_title="Budget - ZML Finance",
@@ -19,6 +23,9 @@ if 'authenticated' not in st.session_state or not st.session_state.authenticated
     st.warning("Please configure your API keys in the main page to get started.")
     st.stop()
 
+user_id = AuthHandler.session_user_id()
+transaction_view = TransactionView.load_session(st.session_state, user_id)
+
 if 'financial_data' not in st.session_state or st.session_state.financial_data is None:
     st.warning("No financial data found. Please upload your data on the main page.")
     st.stop()
@@ -29,6 +36,9 @@ df = st.session_state.financial_data
 # Initialize Lighthouse client
 lighthouse_client = LighthouseClient(st.session_state.lighthouse_api_key)
 
+# Saves are journaled and uploaded in the background
+upload_queue = UploadQueue.shared(lighthouse_client, user_id=user_id)
+
 # Initialize budget session state if it doesn't exist
 if 'budget' not in st.session_state:
     # Calculate default budgets based on historical spending
@@ -53,25 +63,27 @@ if 'budget' not in st.session_state:
 
 # Save budget to Lighthouse
 def save_budget():
+    # An unchanged budget keeps its timestamp, so its bytes match the stored copy
+    # and the upload is skipped
+    saved = st.session_state.get('saved_budget')
+    if saved is not None and saved['budget'] == st.session_state.budget:
+        last_updated = saved['last_updated']
+    else:
+        last_updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
     budget_data = {
         'budget': st.session_state.budget,
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        'last_updated': last_updated
     }
     
-    # Save to temporary file
-    temp_file = "temp_budget.json"
-    with open(temp_file, 'w') as f:
-        json.dump(budget_data, f)
-    
+    # Queue the upload; repeated saves before it runs are coalesced
     try:
-        cid = lighthouse_client.upload_file(temp_file)
-        st.session_state.budget_cid = cid
-        
-        # Clean up temporary file
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-            
-        return True, cid
+        upload_queue.save('budget', json.dumps(budget_data).encode('utf-8'), "budget.json")
+        st.session_state.saved_budget = {
+            'budget': dict(st.session_state.budget),
+            'last_updated': last_updated
+        }
+        return True, None
     except Exception as e:
         return False, str(e)
 
@@ -88,13 +100,19 @@ def calculate_current_month_spending():
     expenses['amount'] = expenses['amount'].abs()
     
     # Group by category
-    category_spending = expenses.groupby('category')['amount'].sum()
+    category_spending = expenses.groupby('category', observed=True)['amount'].sum()
     
     return category_spending
 
 # Main page layout
 st.title("Budget Planner")
 
+# Track the CID of the latest synced budget
+sync_status = upload_queue.status('budget')
+if sync_status['state'] == 'synced':
+    st.session_state.budget_cid = sync_status['cid']
+sync_status_caption(sync_status)
+
 # Tabs for different budget views
 tab1, tab2, tab3 = st.tabs(["Budget Overview", "Set Budgets", "Budget Analysis"])
 
@@ -317,7 +335,7 @@ with tab2:
             success, result = save_budget()
             
             if success:
-                st.success(f"Budgets saved successfully! Data saved to Lighthouse (CID: {result})")
+                st.success("Budgets saved successfully! Saving to Lighthouse in the background.")
             else:
                 st.error(f"Error saving budgets: {result}")
 
@@ -332,12 +350,12 @@ with tab3:
     if len(months_str) <= 1:
         st.info("Need at least two months of data for historical budget analysis.")
     else:
-        # Group by month and category
-        df['month'] = df['date'].dt.to_period('M')
+        # Group by month and category; the shared transaction frame itself is read-only
         expenses = df[df['amount'] < 0].copy()
+        expenses['month'] = expenses['date'].dt.to_period('M')
         expenses['amount'] = expenses['amount'].abs()
         
-        monthly_category_spending = expenses.groupby(['month', 'category'])['amount'].sum().reset_index()
+        monthly_category_spending = expenses.groupby(['month', 'category'], observed=True)['amount'].sum().reset_index()
         
         # Compare with budget
         st.subheader("Monthly Category Spending")
@@ -438,7 +456,7 @@ with tab3:
         st.subheader("Budget Recommendations")
         
         # Calculate average spending by category
-        avg_by_category = expenses.groupby('category')['amount'].mean().reset_index()
+        avg_by_category = expenses.groupby('category', observed=True)['amount'].mean().reset_index()
         avg_by_category = avg_by_category.rename(columns={'amount': 'avg_spending'})
         
         # Compare with current budgets
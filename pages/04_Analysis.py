@@ -1,13 +1,15 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from utils.auth_handler import AuthHandler
+from utils.transaction_view import TransactionView
 from utils.data_processor import DataProcessor
 from utils.ml_models import FinancialMLModels
-from utils.lilypad_client import LilypadClient
 import time
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(
     page_title="Analysis - ZML Finance",
@@ -20,6 +22,9 @@ if 'authenticated' not in st.session_state or not st.session_state.authenticated
     st.warning("Please configure your API keys in the main page to get started.")
     st.stop()
 
+user_id = AuthHandler.session_user_id()
+transaction_view = TransactionView.load_session(st.session_state, user_id)
+
 if 'financial_data' not in st.session_state or st.session_state.financial_data is None:
     st.warning("No financial data found. Please upload your data on the main page.")
     st.stop()
@@ -27,11 +32,11 @@ if 'financial_data' not in st.session_state or st.session_state.financial_data i
 # Get the financial data
 df = st.session_state.financial_data
 
-# Initialize Lilypad client
-lilypad_client = LilypadClient()
-
-# Initialize ML models
-ml_models = FinancialMLModels(lilypad_client)
+# Initialize ML models once per session so fitted forecast state is reused
+# across reruns (the Lilypad client is constructed on first use)
+if 'ml_models' not in st.session_state:
+    st.session_state.ml_models = FinancialMLModels()
+ml_models = st.session_state.ml_models
 
 # Main page layout
 st.title("Financial Analysis")
@@ -82,8 +87,12 @@ with tab1:
             # Prepare data for ML
             ml_data = DataProcessor.prepare_for_ml(df)
             
-            # Get forecast
-            forecast_result = ml_models.predict_spending(ml_data, forecast_periods=forecast_days)
+            # Get forecast (locally when no Lilypad API key is configured)
+            forecast_result = ml_models.predict_spending(
+                ml_data,
+                forecast_periods=forecast_days,
+                local=not ml_models.lilypad_client.api_key
+            )
             
             if "error" in forecast_result:
                 st.error(f"Error generating forecast: {forecast_result['error']}")
@@ -139,6 +148,27 @@ with tab1:
                     # Create figures
                     fig = go.Figure()
                     
+                    # Add prediction interval band if the model provides one
+                    interval = forecast_result.get("forecast", {}).get("interval")
+                    if interval:
+                        fig.add_trace(go.Scatter(
+                            x=forecast_df['date'],
+                            y=[abs(v) for v in interval["lower"]],
+                            mode='lines',
+                            line=dict(width=0),
+                            showlegend=False,
+                            hoverinfo='skip'
+                        ))
+                        fig.add_trace(go.Scatter(
+                            x=forecast_df['date'],
+                            y=[abs(v) for v in interval["upper"]],
+                            mode='lines',
+                            line=dict(width=0),
+                            fill='tonexty',
+                            fillcolor='rgba(231, 76, 60, 0.15)',
+                            name=f"{interval['level']*100:.0f}% Prediction Interval"
+                        ))
+                    
                     # Add expense trace
                     fig.add_trace(go.Scatter(
                         x=forecast_df['date'],
@@ -5,6 +5,11 @@ import json
 from datetime import datetime
 from utils.lighthouse_client import LighthouseClient
 from utils.filecoin_client import FilecoinClient
+from utils.deal_tracker import DealTracker
+from utils.incremental_backup import IncrementalBackup
+from utils.restore_pipeline import RestorePipeline
+from utils.auth_handler import AuthHandler
+from utils.transaction_view import TransactionView
 from utils.data_processor import DataProcessor
 import time
 
@@ -21,7 +26,20 @@ if 'authenticated' not in st.session_state or not st.session_state.authenticated
 
 # Initialize clients
 lighthouse_client = LighthouseClient(st.session_state.lighthouse_api_key)
-filecoin_client = FilecoinClient(st.session_state.lighthouse_api_key)
+backup_engine = IncrementalBackup(lighthouse_client)
+
+user_id = AuthHandler.session_user_id()
+transaction_view = TransactionView.load_session(st.session_state, user_id)
+transaction_store = transaction_view.store
+
+# Keep the Filecoin client across reruns so its deal status cache survives
+filecoin_client = st.session_state.get('filecoin_client')
+if filecoin_client is None or filecoin_client.api_key != st.session_state.lighthouse_api_key:
+    filecoin_client = FilecoinClient(st.session_state.lighthouse_api_key)
+    st.session_state.filecoin_client = filecoin_client
+
+# Deal status is polled in the background; renders only read the local state
+deal_tracker = DealTracker.shared(filecoin_client)
 
 # Main page layout
 st.title("Settings & Data Management")
@@ -121,7 +139,10 @@ with tab2:
                 confirm = st.button("Yes, delete all data")
                 
                 if confirm:
+                    transaction_store.replace(None)
+                    transaction_view.discard()
                     st.session_state.financial_data = None
+                    st.session_state.anomaly_detector = None
                     st.session_state.data_loaded = False
                     st.session_state.last_cid = None
                     st.success("All data has been reset. You can upload new data from the home page.")
@@ -136,19 +157,23 @@ with tab2:
                 # Clean and anonymize data for secure backup
                 cleaned_df = DataProcessor.clean_transaction_data(df)
                 
-                # Save to temp file and upload
-                temp_file = f"backup_financial_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                cleaned_df.to_csv(temp_file, index=False)
+                # Upload only the chunks that changed since earlier backups
+                content = cleaned_df.to_csv(index=False).encode('utf-8')
                 
                 try:
-                    cid = lighthouse_client.upload_file(temp_file)
-                    
-                    # Clean up temp file
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
+                    backup = backup_engine.backup(
+                        content,
+                        name=f"backup_financial_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                        metadata={'transactions': len(df)}
+                    )
+                    cid = backup['cid']
                     
                     st.success(f"Backup created successfully! CID: {cid}")
-                    st.info("Save this CID to restore your data later.")
+                    st.info(
+                        f"Uploaded {backup['new_chunks']} of {backup['chunks']} chunks "
+                        f"({backup['uploaded_bytes'] / 1024:.1f} KB of {backup['total_bytes'] / 1024:.1f} KB). "
+                        "Save this CID to restore your data later."
+                    )
                     
                     # Store in session state
                     if 'backups' not in st.session_state:
@@ -157,7 +182,8 @@ with tab2:
                     st.session_state.backups.append({
                         'cid': cid,
                         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'transactions': len(df)
+                        'transactions': len(df),
+                        'uploaded_kb': round(backup['uploaded_bytes'] / 1024, 1)
                     })
                     
                 except Exception as e:
@@ -166,35 +192,36 @@ with tab2:
         # Restore from CID
         with st.expander("Restore from CID"):
             restore_cid = st.text_input("Enter Backup CID to Restore")
+            merge_restore = st.checkbox("Merge with current data", value=False)
             
             if st.button("Restore Data") and restore_cid:
-                with st.spinner("Restoring data from Lighthouse..."):
-                    # Download from Lighthouse
-                    temp_restore_file = "temp_restore.csv"
+                progress_bar = st.progress(0.0, text="Restoring data from Lighthouse...")
+                
+                def report_progress(done, total, stage):
+                    # Downloading fills the first half of the bar, parsing the second
+                    fraction = done / total / 2 + (0.5 if stage == "parse" else 0.0)
+                    progress_bar.progress(fraction, text=f"{'Downloading' if stage == 'download' else 'Parsing'} part {done} of {total}...")
+                
+                try:
+                    # Download parts concurrently and parse them on all cores
+                    restored_df = RestorePipeline(backup_engine).restore(restore_cid, progress=report_progress)
+                    
+                    if merge_restore:
+                        restored_df = RestorePipeline.merge(st.session_state.get('financial_data'), restored_df)
                     
-                    try:
-                        lighthouse_client.download_file(restore_cid, temp_restore_file)
-                        
-                        # Load the CSV
-                        restored_df = pd.read_csv(temp_restore_file)
-                        
-                        # Convert date to datetime
-                        restored_df['date'] = pd.to_datetime(restored_df['date'])
-                        
-                        # Update session state
-                        st.session_state.financial_data = restored_df
-                        st.session_state.data_loaded = True
-                        st.session_state.last_cid = restore_cid
-                        
-                        # Clean up temp file
-                        if os.path.exists(temp_restore_file):
-                            os.remove(temp_restore_file)
-                        
-                        st.success(f"Data restored successfully! Loaded {len(restored_df)} transactions.")
-                        time.sleep(2)
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Error restoring data: {str(e)}")
+                    # Persist locally, then update session state
+                    restored_df = transaction_store.replace(restored_df)
+                    transaction_view.discard()
+                    st.session_state.financial_data = restored_df
+                    st.session_state.anomaly_detector = None
+                    st.session_state.data_loaded = True
+                    st.session_state.last_cid = restore_cid
+                    
+                    st.success(f"Data restored successfully! Loaded {len(restored_df)} transactions.")
+                    time.sleep(2)
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error restoring data: {str(e)}")
         
         # Previous backups
         if 'backups' in st.session_state and st.session_state.backups:
@@ -203,12 +230,19 @@ with tab2:
             # Create dataframe for display
             backup_df = pd.DataFrame(st.session_state.backups)
             
+            # Show the last known Filecoin status of every backup
+            deal_tracker.track_many(backup_df['cid'])
+            statuses = deal_tracker.statuses(backup_df['cid'])
+            backup_df['filecoin'] = [statuses.get(cid, {}).get('status', 'unknown') for cid in backup_df['cid']]
+            
             st.dataframe(
                 backup_df,
                 column_config={
                     "cid": "CID",
                     "timestamp": "Backup Time",
-                    "transactions": "Transactions"
+                    "transactions": "Transactions",
+                    "uploaded_kb": "Uploaded (KB)",
+                    "filecoin": "Filecoin Status"
                 },
                 use_container_width=True
             )
@@ -230,9 +264,16 @@ with tab3:
         
         # Check if already on Filecoin
         try:
-            deals = filecoin_client.get_filecoin_deals(current_cid)
+            deal_tracker.track(current_cid)
+            deal_status = deal_tracker.status(current_cid)
+            deals = deal_status.get('details', []) if deal_status else []
             
-            if deals:
+            if deal_status is None or deal_status['status'] == 'unknown':
+                st.info("Checking Filecoin storage status in the background. Refresh the page in a moment.")
+            elif deal_status['status'] == 'error':
+                retry_at = datetime.fromtimestamp(deal_status['next_check_at']).strftime('%H:%M:%S')
+                st.warning(f"Could not check Filecoin storage status: {deal_status['last_error']}. Retrying at {retry_at}.")
+            elif deals:
                 st.success(f"This data is already stored on Filecoin with {len(deals)} storage deals.")
                 
                 # Display deals
@@ -257,6 +298,7 @@ with tab3:
                     with st.spinner("Initiating Filecoin storage..."):
                         try:
                             job_id = filecoin_client.store_on_filecoin(current_cid)
+                            deal_tracker.track(current_cid, check_now=True)
                             
                             st.success(f"Storage process initiated! Job ID: {job_id}")
                             st.info("The storage process may take some time to complete. Check back later for status updates.")
@@ -14,6 +14,7 @@ setup(
         "plotly>=5.14.0",
         "requests>=2.28.0",
         "pycryptodome>=3.17.0",
+        "zstandard>=0.22.0",
         "streamlit-option-menu>=0.3.2",
         "python-dotenv>=1.0.0",
     ],
@@ -0,0 +1,77 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+
+
+def synthetic_history(rows, seed=0, days=3650, categories=DataProcessor.CATEGORY_VOCABULARY, missing_categories=0.0):
+    """
+    Build a user's transaction history, shared by the tests and benchmarks.
+
+    Args:
+        rows: Number of transactions
+        seed: Random seed
+        days: Days the history spans, starting on 2015-01-01
+        categories: Categories drawn for the transactions
+        missing_categories: Share of transactions without a category
+
+    Returns:
+        df: Transaction DataFrame, newest first, indexed by transaction id
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64('2015-01-01') + np.sort(rng.integers(0, days, rows))[::-1]
+    category = rng.choice(np.asarray(categories, dtype=object), rows)
+    category[rng.random(rows) < missing_categories] = None
+    df = pd.DataFrame({
+        'date': dates.astype('datetime64[ns]'),
+        'amount': np.round(rng.normal(-40, 120, rows), 2),
+        'description': rng.choice(['Uber ride', 'Grocery store', 'Netflix', 'Salary', 'Rent', 'Coffee'], rows),
+        'category': category
+    }, index=pd.Index(np.arange(1, rows + 1, dtype=np.int64), name='id'))
+    return DataProcessor.optimize_dtypes(df)
+
+
+class ContentStoreClient:
+    """
+    In-memory stand-in for LighthouseClient that stores uploads by content hash.
+
+    Args:
+        api_key: API key identifying the account
+    """
+
+    def __init__(self, api_key='key'):
+        self.api_key = api_key
+        self.files = {}
+        self.uploaded = []
+        self.downloads = 0
+
+    def upload_bytes(self, content, filename):
+        cid = 'cid-' + hashlib.sha256(content).hexdigest()[:32]
+        self.files[cid] = bytes(content)
+        self.uploaded.append(filename)
+        return cid
+
+    def download_file(self, cid):
+        self.downloads += 1
+        return self.files[cid]
+
+
+def transaction_rows(*amounts, category='Food'):
+    """
+    Build new transactions with the given amounts, one day apart from 2024-01-01.
+
+    Args:
+        *amounts: Transaction amounts
+        category: Category of every transaction
+
+    Returns:
+        df: Transaction DataFrame without ids
+    """
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-01'] * len(amounts)) + pd.to_timedelta(range(len(amounts)), unit='D'),
+        'description': [f"purchase {i}" for i in range(len(amounts))],
+        'amount': list(amounts),
+        'category': [category] * len(amounts)
+    })
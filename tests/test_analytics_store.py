@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from utils.analytics_store import AnalyticsStore, TransactionQuery
+from tests.fixtures import synthetic_history
+
+
+def history(rows=600, seed=0):
+    # Few days and shuffled ids, so date ties are broken by id
+    df = synthetic_history(rows, seed=seed, days=120)
+    df.index = pd.Index(np.random.default_rng(seed).permutation(rows) + 1, name='id')
+    return df
+
+
+QUERIES = (
+    {},
+    {'kind': 'expenses'},
+    {'kind': 'income', 'start': '2015-02-01', 'end': '2015-02-28'},
+    {'categories': ['Food', 'Travel']},
+    {'search': 'uber'},
+    {'search': '%'},
+)
+
+
+class TestAnalyticsStoreParity(unittest.TestCase):
+
+    def setUp(self):
+        self.df = history()
+        self.store = AnalyticsStore("user", db_path=":memory:")
+
+    def queries(self, **filters):
+        return TransactionQuery(self.df, store=self.store, **filters), TransactionQuery(self.df, **filters)
+
+    def test_frames_match(self):
+        for filters in QUERIES:
+            sql, memory = self.queries(**filters)
+            for limit, offset in ((None, 0), (25, 10)):
+                expected = memory.frame(limit=limit, offset=offset)
+                actual = sql.frame(limit=limit, offset=offset)
+                self.assertEqual(actual.index.tolist(), expected.index.tolist(), filters)
+                np.testing.assert_allclose(actual['amount'].to_numpy(), expected['amount'].to_numpy())
+
+    def test_totals_match(self):
+        for filters in QUERIES:
+            sql, memory = self.queries(**filters)
+            expected, actual = memory.totals(), sql.totals()
+            self.assertEqual(actual['count'], expected['count'], filters)
+            self.assertAlmostEqual(actual['income'], expected['income'], places=6)
+            self.assertAlmostEqual(actual['expenses'], expected['expenses'], places=6)
+
+    def test_summaries_match(self):
+        for filters in QUERIES:
+            sql, memory = self.queries(**filters)
+            expected, actual = memory.monthly_summary(), sql.monthly_summary()
+            self.assertEqual(actual['month'].astype(str).tolist(), expected['month'].astype(str).tolist())
+            np.testing.assert_allclose(actual['net'].to_numpy(), expected['net'].to_numpy(), atol=1e-6)
+
+            expected, actual = memory.category_spending(), sql.category_spending()
+            self.assertEqual(
+                actual['category'].astype(str).tolist(), expected['category'].astype(str).tolist(), filters
+            )
+            np.testing.assert_allclose(actual['total'].to_numpy(), expected['total'].to_numpy(), atol=1e-6)
+
+    def test_sync_writes_only_changes(self):
+        self.assertEqual(self.store.sync(self.df), len(self.df))
+        self.assertEqual(self.store.sync(self.df), 0)
+
+        edited = self.df.copy()
+        edited.iloc[0, edited.columns.get_loc('amount')] = 1.0
+        edited = edited.iloc[1:]
+
+        self.assertEqual(self.store.sync(edited), 1)
+        self.assertEqual(TransactionQuery(edited, store=self.store).totals()['count'], len(self.df) - 1)
+
+    def test_accounts_are_isolated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "analytics.db")
+            AnalyticsStore("user", db_path=db_path).sync(self.df)
+            other = AnalyticsStore("other", db_path=db_path)
+
+            reopened = AnalyticsStore("user", db_path=db_path)
+
+            self.assertEqual(other.sync(self.df.iloc[:10]), 10)
+            self.assertEqual(reopened.sync(self.df), 0)
+            self.assertEqual(TransactionQuery(self.df, store=reopened).totals()['count'], len(self.df))
+            self.assertEqual(TransactionQuery(self.df.iloc[:10], store=other).totals()['count'], 10)
+
+
+class TestSharedStore(unittest.TestCase):
+
+    def test_store_is_opt_in(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('ANALYTICS_BACKEND', None)
+            self.assertIsNone(AnalyticsStore.shared("user", db_path=":memory:"))
+
+        with mock.patch.dict(os.environ, {'ANALYTICS_BACKEND': 'SQLite'}):
+            store = AnalyticsStore.shared("user", db_path=":memory:")
+
+        self.assertEqual(store.backend, "sqlite")
+        self.assertIs(AnalyticsStore.shared("user", db_path=":memory:", backend="sqlite"), store)
+        self.assertIsNone(AnalyticsStore.shared("user", db_path=":memory:", backend="pandas"))
+
+
+if __name__ == '__main__':
+    unittest.main()
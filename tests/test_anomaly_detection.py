@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils.anomaly_detection import StreamingAnomalyDetector, GroupedAnomalyScorer
+
+
+class TestGroupedAnomalyScorer(unittest.TestCase):
+
+    def test_constant_group_ignores_cent_changes(self):
+        frame = pd.DataFrame({
+            'user_id': ['a'] * 7,
+            'category': ['Rent'] * 7,
+            'amount': [-1500.0] * 6 + [-1500.5]
+        })
+
+        scores = GroupedAnomalyScorer().score(frame)
+
+        self.assertLess(scores['score'].iloc[-1], 1.0)
+        self.assertFalse(scores['is_anomaly'].any())
+
+    def test_constant_group_flags_large_changes(self):
+        frame = pd.DataFrame({
+            'user_id': ['a'] * 7,
+            'category': ['Rent'] * 7,
+            'amount': [-1500.0] * 6 + [-1900.0]
+        })
+
+        scores = GroupedAnomalyScorer().score(frame)
+
+        self.assertTrue(scores['is_anomaly'].iloc[-1])
+        self.assertEqual(scores['severity'].iloc[-1], 'high')
+
+    def test_missing_keys_are_grouped(self):
+        frame = pd.DataFrame({
+            'user_id': ['a', 'a', None, 'b'],
+            'category': ['Food', np.nan, 'Food', np.nan],
+            'amount': [-20.0, -30.0, -40.0, 100.0]
+        })
+
+        for category in (frame['category'], frame['category'].astype('category'), frame['category'].astype(str)):
+            scores = GroupedAnomalyScorer().score(frame.assign(category=category))
+            self.assertEqual(scores['score'].notna().sum(), 3)
+            self.assertTrue(np.isnan(scores['score'].iloc[3]))
+
+    def test_outlier_scored_against_its_user_and_category(self):
+        rng = np.random.default_rng(0)
+        frame = pd.DataFrame({
+            'user_id': ['a'] * 50 + ['b'] * 50,
+            'category': ['Food'] * 100,
+            'amount': np.concatenate([-rng.normal(20, 2, 50), -rng.normal(500, 50, 50)])
+        })
+        frame.loc[0, 'amount'] = -200.0
+
+        scores = GroupedAnomalyScorer().score(frame)
+
+        self.assertTrue(scores['is_anomaly'].iloc[0])
+        self.assertFalse(scores['is_anomaly'].iloc[50:].any())
+
+
+class TestStreamingAnomalyDetector(unittest.TestCase):
+
+    def test_robust_constant_window(self):
+        detector = StreamingAnomalyDetector(robust=True)
+        detector.fit(np.array(['Rent'] * 6), np.zeros(6, dtype=np.int64), np.full(6, -1500.0))
+
+        scores = detector.score_batch(np.array(['Rent', 'Rent']), np.array([0, 0]), np.array([-1500.5, -1900.0]))
+
+        self.assertLess(scores[0], detector.threshold)
+        self.assertGreater(scores[1], detector.high_threshold)
+
+    def test_observe_absorbs_expense(self):
+        detector = StreamingAnomalyDetector(min_count=3)
+        detector.fit(np.array(['Food'] * 10), np.arange(10) % 7, -np.linspace(18, 22, 10))
+
+        score = detector.observe('Food', 2, -100.0)
+
+        self.assertGreater(score, detector.threshold)
+        self.assertEqual(detector.summary()['count'], 11)
+
+    def test_income_is_not_scored(self):
+        detector = StreamingAnomalyDetector()
+        detector.fit(np.array(['Food'] * 5), np.zeros(5, dtype=np.int64), np.full(5, -10.0))
+
+        scores = detector.score_batch(np.array(['Income']), np.array([0]), np.array([1000.0]))
+
+        self.assertTrue(np.isnan(scores[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from utils.batch_analytics import BatchAnalyticsRunner, analyze_shard
+from utils.transaction_partitions import TransactionPartitions
+from tests.fixtures import synthetic_history
+
+
+def history(seed=0, missing_categories=0.0):
+    return synthetic_history(300, seed=seed, days=180, categories=['Food', 'Housing', 'Shopping'],
+                             missing_categories=missing_categories)
+
+
+class TestBatchAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.partitions = TransactionPartitions(os.path.join(self.directory.name, "transactions"), commit_delay=0)
+        for i, user in enumerate(("alice", "bob", "carol")):
+            self.partitions.get(user).replace(history(seed=i, missing_categories=0.25 if user == "bob" else 0.0))
+        self.partitions.release()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def shard(self):
+        return [(entry["partition"], entry["directory"]) for entry in self.partitions.partitions()]
+
+    def runner(self):
+        return BatchAnalyticsRunner(
+            self.partitions, db_path=os.path.join(self.directory.name, "summaries.db"), workers=0
+        )
+
+    def test_analyze_shard(self):
+        results = dict(analyze_shard(self.shard(), savings_target=500.0))
+
+        self.assertEqual(len(results), 3)
+        for partition, analyses in results.items():
+            self.assertNotIn("error", analyses, partition)
+            self.assertEqual(len(analyses["monthly_summary"]), 6)
+            self.assertNotIn("error", analyses["savings_plan"])
+            self.assertGreater(analyses["anomalies"]["count"], 0)
+        # Missing categories are grouped rather than failing the user or the shard
+        plan = results[self.partitions.partition_key("bob")]["savings_plan"]
+        self.assertIn("Uncategorized", [row["category"] for row in plan["recommendations"]])
+
+    def test_failing_user_does_not_fail_the_shard(self):
+        snapshot = os.path.join(self.partitions.directory("alice"), "CURRENT")
+        with open(snapshot, "w") as f:
+            f.write("snapshot-missing")
+
+        results = dict(analyze_shard(self.shard(), savings_target=500.0))
+
+        self.assertIn("error", results[self.partitions.partition_key("alice")])
+        self.assertNotIn("error", results[self.partitions.partition_key("bob")])
+        self.assertNotIn("error", results[self.partitions.partition_key("carol")])
+
+    def test_run_keeps_previous_results_on_error(self):
+        runner = self.runner()
+        run = runner.run()
+        self.assertEqual((run["users"], run["errors"]), (3, 0))
+        previous = runner.summary("alice")
+
+        with open(os.path.join(self.partitions.directory("alice"), "CURRENT"), "w") as f:
+            f.write("snapshot-missing")
+        run = runner.run()
+
+        self.assertEqual((run["users"], run["errors"]), (3, 1))
+        summary = runner.summary("alice")
+        self.assertIn("error", summary)
+        self.assertEqual(summary["monthly_summary"], previous["monthly_summary"])
+        self.assertNotIn("error", runner.summary("bob"))
+
+    def test_shards_are_balanced(self):
+        rows = {"a": 90, "b": 60, "c": 40, "d": 10}
+        entries = [{"partition": name, "directory": name, "rows": count} for name, count in rows.items()]
+
+        shards = self.runner().shard(entries, 2)
+
+        self.assertEqual(sorted(sum(rows[name] for name, _ in shard) for shard in shards), [100, 100])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+
+from utils.content_id import ContentId
+
+
+def raw_cid_bytes(data):
+    return bytes.fromhex("01551220") + hashlib.sha256(data).digest()
+
+
+class TestContentId(unittest.TestCase):
+
+    def test_known_raw_leaf_vectors(self):
+        # CIDs reported by `ipfs add --cid-version=1` for single-chunk content
+        self.assertEqual(ContentId.compute(b""), "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku")
+        self.assertEqual(ContentId.compute(b"hello world"), "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e")
+
+    def test_full_chunk_is_a_single_leaf(self):
+        data = b"x" * ContentId.CHUNK_SIZE
+
+        self.assertTrue(ContentId.compute(data).startswith("bafkrei"))
+
+    def test_two_chunks_are_linked_by_a_dag_pb_node(self):
+        first = b"a" * ContentId.CHUNK_SIZE
+        second = b"a" * 10
+
+        # PBNode with two PBLinks (hash, empty name, tsize) and UnixFS file data
+        # (type 2, filesize 262154, blocksizes 262144 and 10), encoded by hand
+        block = (
+            bytes.fromhex("122c0a24") + raw_cid_bytes(first) + bytes.fromhex("1200188080" "10")
+            + bytes.fromhex("122a0a24") + raw_cid_bytes(second) + bytes.fromhex("1200180a")
+            + bytes.fromhex("0a0c" "0802" "188a8010" "20808010" "200a")
+        )
+        root = bytes.fromhex("01701220") + hashlib.sha256(block).digest()
+        expected = "b" + base64.b32encode(root).decode("ascii").lower().rstrip("=")
+
+        self.assertEqual(ContentId.compute(first + second), expected)
+        self.assertTrue(expected.startswith("bafybei"))
+
+    def test_file_matches_bytes(self):
+        data = os.urandom(ContentId.CHUNK_SIZE * 2 + 123)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "content.bin")
+            with open(path, "wb") as f:
+                f.write(data)
+
+            self.assertEqual(ContentId.compute_file(path), ContentId.compute(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+
+
+def transactions():
+    return pd.DataFrame({
+        'date': ['2024-01-03', '2024-01-01', 'not a date', '2024-01-02'],
+        'description': [' Coffee ', 'Salary', 'Rent', None],
+        'amount': ['-4.5', '2500', '-1200', '-60'],
+        'category': ['food', 'Income', 'Housing', 'Gadgets']
+    })
+
+
+class TestCategoryEncoding(unittest.TestCase):
+
+    def test_vocabulary_codes_are_stable(self):
+        dtype = DataProcessor.category_dtype(['Zoo', 'Food', 'Arcade'])
+
+        vocabulary = list(DataProcessor.CATEGORY_VOCABULARY)
+        self.assertEqual(list(dtype.categories[:len(vocabulary)]), vocabulary)
+        self.assertEqual(list(dtype.categories[len(vocabulary):]), ['Arcade', 'Zoo'])
+        self.assertEqual(
+            list(DataProcessor.category_dtype().categories).index('Food'), vocabulary.index('Food')
+        )
+
+    def test_clean_transaction_data_encodes_columns(self):
+        cleaned = DataProcessor.clean_transaction_data(transactions())
+
+        self.assertEqual(len(cleaned), 3)
+        self.assertIsInstance(cleaned['category'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(cleaned['description'].dtype, pd.CategoricalDtype)
+        self.assertEqual(cleaned['category'].tolist(), ['Food', 'Gadgets', 'Income'])
+        self.assertEqual(cleaned['description'].tolist(), ['Coffee', 'Unknown', 'Salary'])
+        self.assertTrue(cleaned['date'].is_monotonic_decreasing)
+
+    def test_optimize_dtypes_leaves_input_unchanged(self):
+        df = pd.DataFrame({'description': ['a', 'b', 'a'], 'category': ['Food', None, 'Food'], 'amount': [1.0, 2.0, 3.0]})
+
+        optimized = DataProcessor.optimize_dtypes(df)
+
+        self.assertNotIsInstance(df['category'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(optimized['category'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.isna(optimized['category'].iloc[1]))
+        self.assertEqual(optimized['description'].cat.categories.tolist(), ['a', 'b'])
+
+    def test_prepare_for_ml_uses_vocabulary_codes(self):
+        cleaned = DataProcessor.clean_transaction_data(transactions())
+
+        ml_data = DataProcessor.prepare_for_ml(cleaned)
+
+        mapping = ml_data['category_mapping']
+        for name, code in mapping.items():
+            self.assertEqual(DataProcessor.category_dtype(mapping).categories[code], name)
+        codes = [feature['category_code'] for feature in ml_data['features']]
+        self.assertEqual(codes, [mapping['Food'], mapping['Gadgets'], mapping['Income']])
+        self.assertEqual(mapping['Food'], list(DataProcessor.CATEGORY_VOCABULARY).index('Food'))
+        self.assertTrue(np.all(np.array(codes) >= 0))
+
+    def test_prepare_for_ml_codes_missing_categories_as_uncategorized(self):
+        df = DataProcessor.optimize_dtypes(pd.DataFrame({
+            'date': pd.to_datetime(['2024-01-02', '2024-01-01']),
+            'description': ['Coffee', 'Cash'],
+            'amount': [-4.5, -20.0],
+            'category': ['Food', None]
+        }))
+
+        ml_data = DataProcessor.prepare_for_ml(df)
+
+        codes = [feature['category_code'] for feature in ml_data['features']]
+        self.assertEqual(codes, [ml_data['category_mapping']['Food'], ml_data['category_mapping']['Uncategorized']])
+
+
+if __name__ == '__main__':
+    unittest.main()
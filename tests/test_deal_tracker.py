@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.deal_tracker import DealTracker
+
+
+class FakeFilecoinClient:
+    """Answers storage status lookups from a dict of CID -> result"""
+
+    def __init__(self, api_key='key-a'):
+        self.api_key = api_key
+        self.results = {}
+        self.lookups = []
+        self.invalidated = []
+
+    def invalidate_status(self, cid):
+        self.invalidated.append(cid)
+
+    def get_storage_status_many(self, cids):
+        cids = list(cids)
+        self.lookups.append(cids)
+        return {cid: self.results.get(cid, {'status': 'pending'}) for cid in cids}
+
+
+def stored(active=1):
+    return {'status': 'stored', 'active_deals': active, 'total_deals': active, 'details': [{'deal_id': 7}]}
+
+
+class TestDealTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeFilecoinClient()
+        self.tracker = DealTracker(self.client, db_path=':memory:', min_interval=10, max_interval=100,
+                                   stored_interval=1000)
+
+    def test_tracked_cid_is_unknown_until_checked(self):
+        self.tracker.track('cid1')
+        self.tracker.track('cid1')
+
+        self.assertEqual(self.tracker.status('cid1')['status'], 'unknown')
+        self.assertIsNone(self.tracker.status('untracked'))
+        self.assertEqual(self.tracker.pending_count(), 1)
+
+    def test_status_changes_are_recorded(self):
+        self.tracker.track_many(['cid1', 'cid2', 'cid1', None])
+
+        self.assertEqual(self.tracker.poll_once(now=1e10), 2)
+        self.client.results['cid1'] = stored()
+        self.tracker.poll_once(now=2e10)
+
+        status = self.tracker.status('cid1')
+        self.assertEqual(status['status'], 'stored')
+        self.assertEqual(status['details'], [{'deal_id': 7}])
+        self.assertEqual(status['next_check_at'], 2e10 + 1000)
+        self.assertEqual([t['new_status'] for t in self.tracker.transitions('cid1')], ['pending', 'stored'])
+        self.assertEqual(self.tracker.pending_count(), 1)
+        self.assertEqual(sorted(self.client.invalidated), ['cid1', 'cid1', 'cid2', 'cid2'])
+
+    def test_unchanged_status_backs_off(self):
+        self.tracker.track('cid1')
+        now = 1e10
+        intervals = []
+        for _ in range(5):
+            self.tracker.poll_once(now=now)
+            status = self.tracker.status('cid1')
+            intervals.append(status['next_check_at'] - now)
+            now = status['next_check_at']
+
+        self.assertEqual(intervals, [10, 20, 40, 80, 100])
+
+    def test_only_due_cids_are_checked(self):
+        self.tracker.track('cid1')
+        self.tracker.poll_once(now=1e10)
+
+        self.assertEqual(self.tracker.poll_once(now=1e10 + 5), 0)
+        self.assertEqual(self.tracker.poll_once(now=1e10 + 10), 1)
+
+    def test_failed_lookups(self):
+        self.tracker.track_many(['cid1', 'cid2'])
+        self.client.results['cid2'] = stored()
+        self.tracker.poll_once(now=1e10)
+
+        self.client.results = {cid: {'status': 'error', 'message': 'timeout'} for cid in ['cid1', 'cid2', 'cid3']}
+        self.tracker.track('cid3')
+        self.tracker.poll_once(now=2e10)
+
+        self.assertEqual(self.tracker.status('cid3')['status'], 'error')
+        self.assertEqual(self.tracker.status('cid3')['last_error'], 'timeout')
+        self.assertEqual(self.tracker.status('cid1')['status'], 'pending')
+        self.assertEqual(self.tracker.status('cid2')['status'], 'stored')
+
+    def test_statuses(self):
+        self.tracker.track_many(f'cid{i}' for i in range(600))
+
+        self.assertEqual(len(self.tracker.statuses()), 600)
+        self.assertEqual(set(self.tracker.statuses(['cid1', 'cid599', 'missing'])), {'cid1', 'cid599'})
+
+
+class TestSharedDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.db_path = os.path.join(self.directory, 'deals.db')
+
+    def test_accounts_are_isolated(self):
+        tracker_a = DealTracker(FakeFilecoinClient('key-a'), db_path=self.db_path)
+        client_b = FakeFilecoinClient('key-b')
+        tracker_b = DealTracker(client_b, db_path=self.db_path)
+
+        tracker_a.track('cid-a')
+        tracker_b.track('cid-b')
+        tracker_b.poll_once(now=1e10)
+
+        self.assertEqual(set(tracker_a.statuses()), {'cid-a'})
+        self.assertEqual(client_b.lookups, [['cid-b']])
+        self.assertEqual(tracker_a.status('cid-a')['status'], 'unknown')
+
+    def test_state_survives_restart(self):
+        client = FakeFilecoinClient()
+        client.results['cid1'] = stored()
+        tracker = DealTracker(client, db_path=self.db_path)
+        tracker.track('cid1')
+        tracker.poll_once(now=1e10)
+
+        self.assertEqual(DealTracker(client, db_path=self.db_path).status('cid1')['status'], 'stored')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from utils.forecasting import LocalForecaster
+
+
+def weekly_spending(days=120, seed=0, start='2024-01-01'):
+    """Daily expenses with a strong weekly pattern: Saturdays cost five times more."""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64(start) + np.arange(days)
+    weekdays = (dates.astype(np.int64) + 3) % 7
+    amounts = -(np.where(weekdays == 5, 100.0, 20.0) + rng.normal(0, 1, days))
+    return amounts, np.datetime_as_string(dates, unit='D').tolist()
+
+
+class TestLocalForecaster(unittest.TestCase):
+
+    def test_daily_expenses_fills_gaps_and_ignores_income(self):
+        start, values = LocalForecaster.daily_expenses(
+            [-10.0, 500.0, -5.0, -2.5], ['2024-01-03', '2024-01-01', '2024-01-03', '2024-01-01']
+        )
+
+        self.assertEqual(start, np.datetime64('2024-01-01'))
+        np.testing.assert_allclose(values, [2.5, 0.0, 15.0])
+
+    def test_forecast_follows_weekly_season(self):
+        forecaster = LocalForecaster()
+        forecaster.fit('user', *weekly_spending())
+
+        prediction = forecaster.forecast('user', 14)
+
+        dates = np.array(prediction['forecast']['dates'], dtype='datetime64[D]')
+        values = -np.array(prediction['forecast']['values'])
+        saturdays = (dates.astype(np.int64) + 3) % 7 == 5
+        self.assertEqual(len(dates), 14)
+        self.assertEqual(dates[0], np.datetime64('2024-04-30'))
+        np.testing.assert_allclose(values[saturdays], 100.0, rtol=0.1)
+        np.testing.assert_allclose(values[~saturdays], 20.0, rtol=0.15)
+        lower = -np.array(prediction['forecast']['interval']['upper'])
+        upper = -np.array(prediction['forecast']['interval']['lower'])
+        self.assertTrue(np.all(lower <= values) and np.all(values <= upper))
+
+    def test_fit_many_matches_single_fits(self):
+        series = {key: weekly_spending(seed=seed) for seed, key in enumerate(['a', 'b', 'c'])}
+        batch = LocalForecaster()
+        batch.fit_many(series)
+
+        for key, (amounts, dates) in series.items():
+            single = LocalForecaster()
+            single.fit(key, amounts, dates)
+            np.testing.assert_allclose(
+                batch.forecast(key, 7)['forecast']['values'], single.forecast(key, 7)['forecast']['values']
+            )
+
+    def test_update_rolls_forward_without_refit(self):
+        amounts, dates = weekly_spending(days=130)
+        incremental = LocalForecaster(refit_every=28)
+        incremental.fit('user', amounts[:120], dates[:120])
+        parameters = incremental.forecast('user', 1)['metadata']['parameters']
+
+        state = incremental.update('user', amounts, dates)
+
+        self.assertEqual(state['last_date'], dates[-1])
+        self.assertEqual(incremental.forecast('user', 1)['metadata']['parameters'], parameters)
+        self.assertEqual(incremental.forecast('user', 1)['forecast']['dates'], ['2024-05-10'])
+
+    def test_changed_history_triggers_refit(self):
+        amounts, dates = weekly_spending()
+        forecaster = LocalForecaster()
+        forecaster.fit('user', amounts, dates)
+        edited = amounts.copy()
+        edited[0] -= 1000.0
+
+        state = forecaster.update('user', edited, dates)
+
+        self.assertAlmostEqual(state['total'], -edited[edited < 0].sum())
+
+    def test_empty_series(self):
+        forecaster = LocalForecaster()
+
+        self.assertIsNone(forecaster.fit('user', [], []))
+        self.assertIn('error', forecaster.forecast('user', 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.incremental_backup import ContentChunker, IncrementalBackup
+from tests.fixtures import ContentStoreClient, synthetic_history
+
+
+def history_csv(rows=2000, seed=0):
+    return synthetic_history(rows, seed=seed).to_csv().encode('utf-8')
+
+
+class TestContentChunker(unittest.TestCase):
+
+    def setUp(self):
+        self.chunker = ContentChunker(min_size=256, avg_size=1024, max_size=4096)
+        self.content = history_csv()
+
+    def test_chunks_cover_content_in_whole_lines(self):
+        chunks = self.chunker.chunks(self.content)
+
+        self.assertEqual(b''.join(chunks), self.content)
+        self.assertTrue(all(bytes(chunk).endswith(b'\n') for chunk in chunks))
+        self.assertTrue(all(256 < len(chunk) <= 4096 for chunk in chunks[:-1]))
+        self.assertEqual(self.chunker.chunks(b''), [])
+
+    def test_edit_only_changes_nearby_chunks(self):
+        lines = self.content.splitlines(keepends=True)
+        edited = b''.join(lines[:1000] + [b'9999,2020-01-01,-1.0,Edited,Food\n'] + lines[1000:])
+
+        before = {hashlib.sha256(c).digest() for c in self.chunker.chunks(self.content)}
+        after = [hashlib.sha256(c).digest() for c in self.chunker.chunks(edited)]
+
+        self.assertLessEqual(sum(digest not in before for digest in after), 2)
+
+    def test_cuts_anywhere_without_delimiter(self):
+        chunker = ContentChunker(min_size=64, avg_size=128, max_size=256, delimiter=None)
+
+        chunks = chunker.chunks(bytes(range(256)) * 20)
+
+        self.assertEqual(b''.join(chunks), bytes(range(256)) * 20)
+        self.assertTrue(all(len(chunk) <= 256 for chunk in chunks))
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            ContentChunker(min_size=2048, avg_size=1024)
+
+
+class TestIncrementalBackup(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.db_path = os.path.join(self.directory, 'chunks.db')
+        self.client = ContentStoreClient()
+        self.chunker = ContentChunker(min_size=256, avg_size=1024, max_size=4096)
+        self.backups = IncrementalBackup(self.client, db_path=self.db_path, chunker=self.chunker)
+        self.content = history_csv()
+
+    def test_round_trip(self):
+        result = self.backups.backup(self.content, metadata={'rows': 2000})
+
+        self.assertEqual(self.backups.restore(result['cid']), self.content)
+        self.assertEqual(result['new_chunks'], result['chunks'])
+        self.assertEqual(result['total_bytes'], len(self.content))
+        manifest = IncrementalBackup.parse_manifest(self.client.files[result['cid']])
+        self.assertEqual(manifest['metadata'], {'rows': 2000})
+
+    def test_only_changed_chunks_are_uploaded(self):
+        first = self.backups.backup(self.content)
+        appended = self.content + b'2001,2025-01-01,-5.0,Coffee,Food\n'
+
+        second = IncrementalBackup(self.client, db_path=self.db_path, chunker=self.chunker).backup(appended)
+
+        self.assertLessEqual(second['new_chunks'], 2)
+        self.assertLess(second['uploaded_bytes'], first['uploaded_bytes'] / 5)
+        self.assertEqual(self.backups.restore(second['cid']), appended)
+
+    def test_repeated_chunks_are_uploaded_once(self):
+        content = b'a,b\n' + b'1,2\n' * 5000
+
+        result = IncrementalBackup(self.client, db_path=':memory:', chunker=ContentChunker(16, 64, 64)).backup(content)
+
+        self.assertLess(result['new_chunks'], result['chunks'])
+        self.assertEqual(len(self.client.uploaded), result['new_chunks'] + 1)
+
+    def test_accounts_do_not_share_chunks(self):
+        self.backups.backup(self.content)
+        other = IncrementalBackup(ContentStoreClient('other-key'), db_path=self.db_path, chunker=self.chunker)
+
+        result = other.backup(self.content)
+
+        self.assertEqual(result['new_chunks'], result['chunks'])
+
+    def test_single_file_backup_is_restored_as_is(self):
+        cid = self.client.upload_bytes(self.content, 'transactions.csv')
+
+        self.assertEqual(self.backups.restore(cid), self.content)
+
+    def test_corrupted_chunk_is_rejected(self):
+        result = self.backups.backup(self.content)
+        manifest = IncrementalBackup.parse_manifest(self.client.files[result['cid']])
+        self.client.files[manifest['chunks'][1]['cid']] = b'tampered\n'
+
+        with self.assertRaises(ValueError):
+            self.backups.restore(result['cid'])
+
+    def test_parse_manifest(self):
+        self.assertIsNone(IncrementalBackup.parse_manifest(b'date,amount\n'))
+        self.assertIsNone(IncrementalBackup.parse_manifest(b'{"format": "other"}'))
+        self.assertIsNone(IncrementalBackup.parse_manifest(b'{not json'))
+        with self.assertRaises(ValueError):
+            IncrementalBackup.parse_manifest(json.dumps({'format': IncrementalBackup.MANIFEST_FORMAT, 'version': 99}).encode())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import threading
+import time
+import unittest
+
+from app.utils.job_coalescer import JobCoalescer
+
+
+class FakeLilypadClient:
+    """Records single and batched job submissions"""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.jobs = []
+        self.lock = threading.Lock()
+
+    def _record(self, model_name, inputs, hyperparameters):
+        with self.lock:
+            self.jobs.append((model_name, inputs, hyperparameters))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+    def run_ml_job_and_wait(self, model_name, data, hyperparameters=None):
+        self._record(model_name, [data], hyperparameters)
+        return {'output': data}
+
+    def run_ml_batch_and_wait(self, model_name, inputs, hyperparameters=None):
+        self._record(model_name, inputs, hyperparameters)
+        return [{'output': data} for data in inputs]
+
+
+class TestJobCoalescer(unittest.TestCase):
+
+    def coalescer(self, client, **kwargs):
+        coalescer = JobCoalescer(client, **kwargs)
+        self.addCleanup(coalescer.shutdown)
+        return coalescer
+
+    def test_requests_run_as_single_jobs_by_default(self):
+        client = FakeLilypadClient()
+        coalescer = self.coalescer(client, window_ms=200)
+
+        futures = [coalescer.submit('financial_forecast', i) for i in range(3)]
+
+        self.assertEqual([f.result(timeout=5)['output'] for f in futures], [0, 1, 2])
+        self.assertEqual(len(client.jobs), 3)
+        self.assertEqual(futures[0].result()['batch'], {'size': 1, 'index': 0})
+
+    def test_requests_within_window_share_a_job(self):
+        client = FakeLilypadClient()
+        coalescer = self.coalescer(client, window_ms=200, batch_jobs=True)
+
+        futures = [coalescer.submit('financial_forecast', i, {'periods': 30}) for i in range(3)]
+        results = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual(client.jobs, [('financial_forecast', [0, 1, 2], {'periods': 30})])
+        self.assertEqual([r['output'] for r in results], [0, 1, 2])
+        self.assertEqual([r['batch'] for r in results], [{'size': 3, 'index': i} for i in range(3)])
+
+    def test_batches_are_keyed_by_model_and_hyperparameters(self):
+        client = FakeLilypadClient()
+        coalescer = self.coalescer(client, window_ms=100, batch_jobs=True)
+
+        futures = [
+            coalescer.submit('financial_forecast', 1, {'a': 1, 'b': 2}),
+            coalescer.submit('financial_forecast', 2, {'b': 2, 'a': 1}),
+            coalescer.submit('financial_forecast', 3, {'a': 2}),
+            coalescer.submit('transaction_categorizer', 4, {'a': 1, 'b': 2}),
+        ]
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertEqual(sorted(inputs for _, inputs, _ in client.jobs), [[1, 2], [3], [4]])
+
+    def test_full_batch_is_submitted_without_waiting(self):
+        client = FakeLilypadClient()
+        coalescer = self.coalescer(client, window_ms=10000, max_batch_size=2, batch_jobs=True)
+
+        futures = [coalescer.submit('financial_forecast', i) for i in range(2)]
+
+        self.assertEqual([f.result(timeout=5)['output'] for f in futures], [0, 1])
+        self.assertEqual(coalescer.metrics()['pending_batches'], 0)
+
+    def test_failed_job_reaches_every_caller(self):
+        client = FakeLilypadClient(error=RuntimeError('job failed'))
+        coalescer = self.coalescer(client, window_ms=100, batch_jobs=True)
+
+        futures = [coalescer.submit('financial_forecast', i) for i in range(2)]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+        self.assertEqual(coalescer.metrics()['failed_batches'], 1)
+
+    def test_run_times_out(self):
+        coalescer = self.coalescer(FakeLilypadClient(delay=0.5))
+
+        with self.assertRaises(TimeoutError):
+            coalescer.run('financial_forecast', 1, timeout=0.05)
+
+    def test_metrics(self):
+        coalescer = self.coalescer(FakeLilypadClient(), window_ms=50, batch_jobs=True)
+
+        for future in [coalescer.submit('financial_forecast', i) for i in range(4)]:
+            future.result(timeout=5)
+        metrics = coalescer.metrics()
+
+        self.assertEqual(metrics['requests'], 4)
+        self.assertEqual(metrics['batches'], 1)
+        self.assertEqual(metrics['batch_size']['max'], 4)
+        self.assertGreater(metrics['queue_delay_ms']['max'], 0)
+
+    def test_shutdown_flushes_filling_batches(self):
+        client = FakeLilypadClient()
+        coalescer = JobCoalescer(client, window_ms=10000, batch_jobs=True)
+
+        future = coalescer.submit('financial_forecast', 1)
+        coalescer.shutdown()
+
+        self.assertEqual(future.result(timeout=0)['output'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from utils.data_processor import DataProcessor
+from utils.ml_models import FinancialMLModels
+from tests.fixtures import synthetic_history
+
+
+def ml_data(rows, seed=0, missing_categories=0.0):
+    history = synthetic_history(rows, seed=seed, days=180, missing_categories=missing_categories)
+    return DataProcessor.prepare_for_ml(history)
+
+
+class TestSavingsPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.models = FinancialMLModels(lilypad_client=object())
+
+    def test_plan_recommends_highest_spending_first(self):
+        plan = self.models.generate_savings_plan(ml_data(400), 5000)
+
+        self.assertEqual(plan['status'], 'gap')
+        spending = [r['current_monthly_spending'] for r in plan['recommendations']]
+        self.assertEqual(spending, sorted(spending, reverse=True))
+        self.assertTrue(all(amount >= 20 for amount in spending))
+        self.assertAlmostEqual(plan['potential_savings'], sum(r['potential_monthly_savings'] for r in plan['recommendations']))
+
+    def test_plan_on_track_when_target_met(self):
+        plan = self.models.generate_savings_plan(ml_data(400), -1e9)
+
+        self.assertEqual(plan['status'], 'on_track')
+        self.assertGreater(plan['surplus'], 0)
+
+    def test_batch_matches_single_plans(self):
+        data = {user: ml_data(300, seed=seed) for seed, user in enumerate(['alice', 'bob', 'carol'])}
+        targets = {'alice': 5000, 'bob': 100, 'carol': -1e9}
+
+        plans = self.models.batch_savings_plans(data, targets)
+
+        for user in data:
+            self.assertEqual(plans[user], self.models.generate_savings_plan(data[user], targets[user]))
+
+    def test_missing_categories_are_grouped_as_uncategorized(self):
+        plan = self.models.generate_savings_plan(ml_data(400, missing_categories=0.5), 1e6)
+
+        self.assertIn('Uncategorized', [r['category'] for r in plan['recommendations']])
+
+    def test_negative_category_codes_do_not_fail(self):
+        data = ml_data(400)
+        for feature in data['features'][::3]:
+            feature['category_code'] = -1
+        del data['category_mapping']['Uncategorized']
+
+        plan = self.models.generate_savings_plan(data, 1e6)
+
+        self.assertNotIn('error', plan)
+        self.assertIn('Uncategorized', [r['category'] for r in plan['recommendations']])
+
+
+if __name__ == '__main__':
+    unittest.main()
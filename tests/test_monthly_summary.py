@@ -0,0 +1,133 @@
+import json
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tests.fixtures import synthetic_history
+from utils.data_processor import DataProcessor
+from utils.monthly_summary import IncrementalMonthlySummary
+from utils.transaction_store import TransactionStore
+
+
+class SummaryAssertions:
+
+    def assertMatchesFullRecompute(self, summary, df):
+        expected = DataProcessor.calculate_monthly_summary(df).reset_index(drop=True)
+        actual = summary.to_frame().reset_index(drop=True)
+        self.assertEqual(actual['month'].astype(str).tolist(), expected['month'].astype(str).tolist())
+        for column in ('income', 'expenses', 'net'):
+            np.testing.assert_allclose(actual[column].to_numpy(), expected[column].to_numpy(), atol=1e-6)
+
+
+class TestIncrementalMonthlySummary(SummaryAssertions, unittest.TestCase):
+
+    def setUp(self):
+        self.df = synthetic_history(200, days=180)
+
+    def test_from_transactions_matches_full_recompute(self):
+        self.assertMatchesFullRecompute(IncrementalMonthlySummary.from_transactions(self.df), self.df)
+
+    def test_add_and_remove(self):
+        summary = IncrementalMonthlySummary.from_transactions(self.df)
+        new = pd.DataFrame({'date': [pd.Timestamp('2015-09-15')], 'description': ['y'], 'amount': [-42.0], 'category': ['Food']})
+
+        summary.add(new['date'].iloc[0], -42.0)
+        self.assertMatchesFullRecompute(summary, pd.concat([self.df, new], ignore_index=True))
+
+        summary.remove(new['date'].iloc[0], -42.0)
+        self.assertMatchesFullRecompute(summary, self.df)
+        self.assertNotIn('2015-09', summary.to_frame()['month'].tolist())
+
+    def test_update_moves_between_months(self):
+        summary = IncrementalMonthlySummary.from_transactions(self.df)
+        row = self.df.iloc[0]
+        edited = self.df.copy()
+        edited.loc[edited.index[0], 'date'] = pd.Timestamp('2014-12-31')
+        edited.loc[edited.index[0], 'amount'] = 100.0
+
+        summary.update(row['date'], row['amount'], pd.Timestamp('2014-12-31'), 100.0)
+
+        self.assertMatchesFullRecompute(summary, edited)
+
+    def test_remove_from_empty_month_raises(self):
+        with self.assertRaises(KeyError):
+            IncrementalMonthlySummary().remove('2024-01-01', -1.0)
+
+    def test_recompute_month(self):
+        summary = IncrementalMonthlySummary.from_transactions(self.df)
+        summary.add('2015-02-10', -1000.0)
+
+        summary.recompute_month(self.df, '2015-02')
+
+        self.assertMatchesFullRecompute(summary, self.df)
+
+    def test_is_current(self):
+        df = self.df.iloc[:20]
+        summary = IncrementalMonthlySummary.from_transactions(df, version=7)
+
+        self.assertTrue(summary.is_current(df))
+        self.assertTrue(summary.is_current(df, 7))
+        # Same row count, newer data
+        self.assertFalse(summary.is_current(df, 8))
+        self.assertFalse(summary.is_current(df.iloc[1:], 7))
+        self.assertTrue(IncrementalMonthlySummary.from_transactions(None).is_current(None))
+
+    def test_dict_round_trip(self):
+        summary = IncrementalMonthlySummary.from_transactions(self.df, version=3)
+
+        restored = IncrementalMonthlySummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+
+        self.assertEqual(restored.version, 3)
+        pd.testing.assert_frame_equal(restored.to_frame(), summary.to_frame())
+
+
+class TestStoredMonthlySummary(SummaryAssertions, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        self.store = TransactionStore(self.path, commit_delay=0)
+        self.store.replace(synthetic_history(200, days=180))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_summary_is_stored_with_the_snapshot(self):
+        summary = TransactionStore.read_snapshot(self.path)[3]
+
+        self.assertEqual(summary.version, self.store.version)
+        self.assertMatchesFullRecompute(summary, self.store.frame)
+
+    def test_changes_update_the_summary(self):
+        before = self.store.monthly_summary()
+        self.store.add(pd.DataFrame({'date': [pd.Timestamp('2016-03-01')], 'amount': [-5.0], 'category': ['Food']}))
+        first, second = self.store.frame.index[1:3]
+        self.store.update([first], {'amount': 250.0})
+        self.store.update([second], {'date': pd.Timestamp('2014-06-01')})
+        self.store.update([second], {'category': 'Travel'})
+        self.store.delete(self.store.frame.index[3:6])
+
+        summary = self.store.monthly_summary()
+
+        # Maintained in place rather than rebuilt
+        self.assertIs(summary, before)
+        self.assertEqual(summary.version, self.store.version)
+        self.assertMatchesFullRecompute(summary, self.store.frame)
+
+    def test_summary_survives_restart(self):
+        self.store.add(pd.DataFrame({'date': [pd.Timestamp('2016-03-01')], 'amount': [-5.0], 'category': ['Food']}))
+        self.store.checkpoint()
+        self.store.delete(self.store.frame.index[:2])
+
+        reopened = TransactionStore(self.path)
+
+        # Loaded from the snapshot and brought up to date by the log replay
+        self.assertIsNotNone(reopened._summary)
+        self.assertEqual(reopened.monthly_summary().version, reopened.version)
+        self.assertMatchesFullRecompute(reopened.monthly_summary(), reopened.frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
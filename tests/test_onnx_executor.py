@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from utils.data_processor import DataProcessor
+from utils.onnx_executor import OnnxExecutor
+from tests.fixtures import synthetic_history
+
+try:
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    import onnxruntime  # noqa: F401
+except ImportError:
+    onnx = None
+
+REGISTRY = {
+    "financial_forecast": {"id": "forecast-onnx-model", "type": "onnx-runtime"},
+    "financial_anomaly_detector": {"id": "anomaly-onnx-model", "type": "onnx-runtime"},
+    "transaction_categorizer": {"id": "categorizer-onnx-model", "type": "onnx-runtime"},
+}
+
+
+def save_linear_model(path, weight, softmax=False):
+    """Save a graph computing `x @ weight` (optionally softmaxed) with a dynamic batch axis"""
+    weight = np.asarray(weight, dtype=np.float32)
+    nodes = [helper.make_node("MatMul", ["x", "w"], ["y" if not softmax else "logits"])]
+    if softmax:
+        nodes.append(helper.make_node("Softmax", ["logits"], ["y"], axis=1))
+    graph = helper.make_graph(
+        nodes, "linear",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", weight.shape[0]])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch", weight.shape[1]])],
+        initializer=[numpy_helper.from_array(weight, "w")]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+class CountingExecutor(OnnxExecutor):
+    """Executor that counts session runs to observe batching"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.runs = 0
+
+    def _create_session(self, model_name):
+        session = super()._create_session(model_name)
+        executor = self
+
+        class Counting:
+            def get_inputs(self):
+                return session.get_inputs()
+
+            def get_outputs(self):
+                return session.get_outputs()
+
+            def run(self, *args):
+                executor.runs += 1
+                return session.run(*args)
+
+        return Counting()
+
+
+@unittest.skipIf(onnx is None, "onnx and onnxruntime are required")
+class TestOnnxExecutor(unittest.TestCase):
+
+    HISTORY_DAYS = 14
+    HORIZON_DAYS = 30
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = tempfile.mkdtemp()
+        # Forecast every day as the mean of the window
+        save_linear_model(os.path.join(cls.model_dir, "forecast-onnx-model.onnx"),
+                          np.full((cls.HISTORY_DAYS, cls.HORIZON_DAYS), 1 / cls.HISTORY_DAYS))
+        # Score is the absolute amount in hundreds
+        save_linear_model(os.path.join(cls.model_dir, "anomaly-onnx-model.onnx"), [[-0.01], [0], [0], [0]])
+        # Income is category 1, spending category 0
+        save_linear_model(os.path.join(cls.model_dir, "categorizer-onnx-model.onnx"),
+                          [[-1, 1], [0, 0], [0, 0]], softmax=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.model_dir)
+
+    def executor(self, **kwargs):
+        return CountingExecutor(REGISTRY, model_dir=self.model_dir, **kwargs)
+
+    def test_availability(self):
+        executor = self.executor()
+
+        self.assertTrue(executor.is_available("financial_forecast"))
+        self.assertFalse(executor.is_available("unknown"))
+        self.assertFalse(OnnxExecutor(REGISTRY, model_dir=tempfile.gettempdir()).is_available("financial_forecast"))
+        self.assertEqual(executor.run("unknown", {}), {"error": "Unknown model name"})
+
+    def test_concurrent_requests_are_batched(self):
+        executor = self.executor(pool_size=1, max_wait_ms=200)
+        executor.warm_up(["financial_anomaly_detector"])
+        requests = [np.full((i + 1, 4), -100.0 * i, dtype=np.float32) for i in range(8)]
+        results = [None] * len(requests)
+
+        def call(i):
+            results[i] = executor.infer("financial_anomaly_detector", requests[i])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i, result in enumerate(results):
+            np.testing.assert_allclose(result, np.full((i + 1, 1), float(i)), rtol=1e-6)
+        self.assertLess(executor.runs, len(requests))
+
+    def test_inference_errors_reach_the_caller(self):
+        executor = self.executor()
+
+        with self.assertRaises(Exception):
+            executor.infer("financial_anomaly_detector", np.zeros((2, 3)))
+        self.assertEqual(executor.infer("financial_anomaly_detector", np.zeros((0, 4))).shape, (0,))
+
+    def test_forecast_uses_recent_window(self):
+        prepared = DataProcessor.prepare_for_ml(synthetic_history(200, days=60))
+
+        result = self.executor().run("financial_forecast", {"data": prepared, "parameters": {"forecast_periods": 7}})
+
+        self.assertEqual(result["metadata"]["history_days"], self.HISTORY_DAYS)
+        self.assertFalse(result["metadata"]["provable"])
+        self.assertEqual(len(result["forecast"]["dates"]), 7)
+        self.assertGreater(result["forecast"]["dates"][0], max(prepared["dates"]))
+        self.assertTrue(all(value <= 0 for value in result["forecast"]["values"]))
+        too_long = self.executor().run("financial_forecast", {"data": prepared, "parameters": {"forecast_periods": 60}})
+        self.assertIn("error", too_long)
+
+    def test_anomaly_detection_flags_large_expenses(self):
+        prepared = DataProcessor.prepare_for_ml(synthetic_history(200))
+        amounts = np.array([f["amount"] for f in prepared["features"]])
+
+        result = self.executor().run("financial_anomaly_detector", {"data": prepared, "parameters": {"threshold": 2.5}})
+
+        self.assertEqual(len(result["anomalies"]), int((amounts < -250).sum()))
+        self.assertTrue(all(a["amount"] < -250 for a in result["anomalies"]))
+        self.assertTrue(all(a["category"] in prepared["category_mapping"] for a in result["anomalies"]))
+
+    def test_categorization_returns_one_suggestion_per_transaction(self):
+        prepared = DataProcessor.prepare_for_ml(synthetic_history(50))
+        names = {code: name for name, code in prepared["category_mapping"].items()}
+
+        result = self.executor().run("transaction_categorizer", {"data": prepared})
+
+        self.assertEqual(len(result["categories"]), 50)
+        for feature, suggestion in zip(prepared["features"], result["categories"]):
+            self.assertEqual(suggestion["suggested_category"], names[1 if feature["amount"] > 0 else 0])
+            self.assertGreaterEqual(suggestion["confidence"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
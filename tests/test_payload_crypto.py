@@ -0,0 +1,111 @@
+import base64
+import json
+import unittest
+from unittest import mock
+
+from utils.lilypad_client import LilypadClient
+from utils.payload_crypto import StreamingCipher
+from utils.wire_format import ColumnarPayload
+
+
+class TestStreamingCipher(unittest.TestCase):
+
+    CHUNK_SIZE = 16
+    HEADER_SIZE = 17
+    FRAME_SIZE = 5 + CHUNK_SIZE + StreamingCipher.TAG_SIZE
+
+    def setUp(self):
+        self.cipher = StreamingCipher(StreamingCipher.generate_key(), chunk_size=self.CHUNK_SIZE)
+        self.data = bytes(range(64))
+
+    def frames(self, sealed):
+        body = sealed[self.HEADER_SIZE:]
+        return sealed[:self.HEADER_SIZE], [body[i:i + self.FRAME_SIZE] for i in range(0, len(body), self.FRAME_SIZE)]
+
+    def test_round_trip(self):
+        for data in [b"", b"x", self.data, self.data + b"tail"]:
+            self.assertEqual(self.cipher.decrypt(self.cipher.encrypt(data)), data)
+
+    def test_stream_of_buffers_matches_joined_plaintext(self):
+        buffers = [self.data[:5], memoryview(self.data[5:40]), bytearray(self.data[40:])]
+
+        sealed = b"".join(self.cipher.encrypt_stream(buffers))
+
+        self.assertEqual(self.cipher.decrypt(sealed), self.data)
+        # Four full chunks and an empty final one
+        self.assertEqual(len(self.frames(sealed)[1]), 5)
+
+    def test_nonces_differ_between_payloads(self):
+        self.assertNotEqual(self.cipher.encrypt(self.data), self.cipher.encrypt(self.data))
+
+    def test_tampered_chunk_fails(self):
+        sealed = bytearray(self.cipher.encrypt(self.data))
+        sealed[self.HEADER_SIZE + 8] ^= 1
+
+        with self.assertRaises(ValueError):
+            self.cipher.decrypt(bytes(sealed))
+
+    def test_reordered_chunks_fail(self):
+        header, frames = self.frames(self.cipher.encrypt(self.data))
+        frames[0], frames[1] = frames[1], frames[0]
+
+        with self.assertRaises(ValueError):
+            self.cipher.decrypt(header + b"".join(frames))
+
+    def test_truncated_stream_fails(self):
+        header, frames = self.frames(self.cipher.encrypt(self.data))
+
+        for truncated in [header + b"".join(frames[:-1]), header[:-1], header + frames[0][:-1]]:
+            with self.assertRaises(ValueError):
+                self.cipher.decrypt(truncated)
+
+    def test_associated_data_is_authenticated(self):
+        sealed = self.cipher.encrypt(self.data, associated_data=b"job-1")
+
+        self.assertEqual(self.cipher.decrypt(sealed, associated_data=b"job-1"), self.data)
+        with self.assertRaises(ValueError):
+            self.cipher.decrypt(sealed, associated_data=b"job-2")
+
+    def test_wrong_key_fails(self):
+        sealed = self.cipher.encrypt(self.data)
+
+        with self.assertRaises(ValueError):
+            StreamingCipher(StreamingCipher.generate_key()).decrypt(sealed)
+        with self.assertRaises(ValueError):
+            StreamingCipher(b"short")
+
+
+class TestEncryptData(unittest.TestCase):
+
+    def setUp(self):
+        self.payload = {
+            "data": {
+                "features": [{"amount": -12.5, "category_code": 3}, {"amount": 900.0, "category_code": 1}],
+                "dates": ["2024-01-02", "2024-01-01"],
+                "category_mapping": {"Food": 3, "Income": 1}
+            },
+            "task": "time_series_forecast"
+        }
+
+    def test_encrypted_body_decrypts_to_payload(self):
+        key = StreamingCipher.generate_key()
+        client = LilypadClient(encryption_key=key, wire_format="lpwf-1")
+
+        body = json.loads(json.dumps(client.encrypt_data(self.payload)))
+
+        self.assertEqual(body["encryption_mode"], "aes-256-gcm-chunked")
+        self.assertEqual(body["payload_format"], "lpwf-1")
+        sealed = base64.b64decode(body["encrypted_payload"])
+        self.assertEqual(ColumnarPayload.decode(StreamingCipher(key).decrypt(sealed)), self.payload)
+
+    def test_key_is_read_from_environment(self):
+        key = StreamingCipher.generate_key()
+        with mock.patch.dict("os.environ", {"LILYPAD_ENCRYPTION_KEY": key.hex()}):
+            client = LilypadClient(wire_format="lpwf-1")
+
+        self.assertEqual(client.encryption_key, key)
+        self.assertEqual(client.encrypt_data(self.payload)["encryption_mode"], "aes-256-gcm-chunked")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from unittest import mock
+
+from app.utils.lilypad_client import LilypadClient
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self.payload
+
+
+class FakeLilypadAPI:
+    """Answers status, result and proof verification requests of one job"""
+
+    def __init__(self, proof=None, verify_status=200):
+        self.proof = proof if proof is not None else {'pi': [1, 2, 3]}
+        self.verify_status = verify_status
+        self.verifications = 0
+
+    def get(self, url, headers=None):
+        if url.endswith('/result'):
+            return FakeResponse(200, {'value': 42, 'proof': self.proof})
+        return FakeResponse(200, {'status': 'completed'})
+
+    def post(self, url, headers=None):
+        self.verifications += 1
+        if self.verify_status != 200:
+            return FakeResponse(self.verify_status, 'verifier unavailable')
+        return FakeResponse(200, {'verified': True, 'protocol': 'zk-SNARK'})
+
+
+class TestProofVerification(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeLilypadAPI()
+        patcher = mock.patch('app.utils.lilypad_client.requests', self.api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = LilypadClient(api_key='test-key', max_workers=2)
+        self.addCleanup(self.client.pool.shutdown)
+
+    def test_verification_is_cached(self):
+        first = self.client.verify_zk_proof('job_1')
+        second = self.client.verify_zk_proof('job_1')
+
+        self.assertTrue(first['verified'])
+        self.assertEqual(second, first)
+        self.assertEqual(self.api.verifications, 1)
+
+    def test_failed_verification_is_not_cached(self):
+        self.api.verify_status = 503
+
+        verification = self.client.verify_zk_proof('job_1')
+
+        self.assertFalse(verification['verified'])
+        self.assertIn('error', verification)
+        self.assertIsNone(self.client._cached_verification('job_1'))
+
+        self.api.verify_status = 200
+        self.assertTrue(self.client.verify_zk_proof('job_1')['verified'])
+        self.assertEqual(self.api.verifications, 2)
+
+    def test_job_result_with_failed_verification(self):
+        self.api.verify_status = 503
+
+        result = self.client.get_job_result('job_1')
+
+        self.assertEqual(result['result']['value'], 42)
+        self.assertFalse(result['proof']['verified'])
+        self.assertIsNone(self.client._cached_verification('job_1'))
+
+        self.api.verify_status = 200
+        self.assertTrue(self.client.get_job_result('job_1')['proof']['verified'])
+
+    def test_job_result_reuses_verification_until_proof_changes(self):
+        self.client.get_job_result('job_1')
+        self.client.get_job_result('job_1')
+        self.assertEqual(self.api.verifications, 1)
+
+        self.api.proof = {'pi': [4, 5, 6]}
+        self.assertTrue(self.client.get_job_result('job_1')['proof']['verified'])
+        self.assertEqual(self.api.verifications, 2)
+
+    def test_verify_many_serves_cached_jobs(self):
+        self.client.verify_zk_proof('job_1')
+
+        verifications = self.client.verify_zk_proofs(['job_1', 'job_2', 'job_1'])
+
+        self.assertEqual(set(verifications), {'job_1', 'job_2'})
+        self.assertEqual(self.api.verifications, 2)
+
+    def test_cache_evicts_least_recently_used(self):
+        self.client.VERIFICATION_CACHE_SIZE = 2
+        for job_id in ['job_1', 'job_2']:
+            self.client.verify_zk_proof(job_id)
+        self.client.verify_zk_proof('job_1')
+        self.client.verify_zk_proof('job_3')
+
+        self.assertIsNotNone(self.client._cached_verification('job_1'))
+        self.assertIsNone(self.client._cached_verification('job_2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import unittest
+
+import pandas as pd
+
+from utils.incremental_backup import ContentChunker, IncrementalBackup
+from utils.restore_pipeline import RestorePipeline
+from tests.fixtures import ContentStoreClient, synthetic_history
+
+
+def multiline_history(rows=3000):
+    """History whose descriptions often span several lines inside quotes"""
+    df = synthetic_history(rows, days=1000).reset_index(drop=True)
+    df['description'] = [
+        f'Note {i}\n"quoted" line\n\nend' if i % 5 == 0 else str(description)
+        for i, description in enumerate(df['description'])
+    ]
+    return df
+
+
+class TestRestorePipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ContentStoreClient()
+        self.backups = IncrementalBackup(self.client, db_path=':memory:',
+                                         chunker=ContentChunker(min_size=256, avg_size=1024, max_size=4096))
+        self.history = multiline_history()
+        self.content = self.history.to_csv(index=False).encode('utf-8')
+
+    def assertRestored(self, restored):
+        self.assertEqual(len(restored), len(self.history))
+        self.assertEqual(restored['description'].astype(str).tolist(), self.history['description'].tolist())
+        self.assertEqual(restored['amount'].tolist(), self.history['amount'].tolist())
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(restored['date']))
+        self.assertIsInstance(restored['category'].dtype, pd.CategoricalDtype)
+
+    def test_parts_cut_inside_quoted_fields(self):
+        chunks = self.backups.chunker.chunks(self.content)
+        quotes = 0
+        cut_inside_quotes = False
+        for chunk in chunks[:-1]:
+            quotes += bytes(chunk).count(b'"')
+            cut_inside_quotes |= quotes % 2 == 1
+        self.assertTrue(cut_inside_quotes)
+
+        result = self.backups.backup(self.content)
+
+        self.assertRestored(RestorePipeline(self.backups, parse_workers=0).restore(result['cid']))
+
+    def test_single_file_backup(self):
+        cid = self.client.upload_bytes(self.content, 'transactions.csv')
+
+        self.assertRestored(RestorePipeline(self.backups, parse_workers=0).restore(cid))
+
+    def test_worker_processes(self):
+        result = self.backups.backup(self.content)
+
+        self.assertRestored(RestorePipeline(self.backups, parse_workers=2).restore(result['cid']))
+
+    def test_progress_is_reported(self):
+        result = self.backups.backup(self.content)
+        reports = []
+
+        RestorePipeline(self.backups, parse_workers=0).restore(result['cid'], progress=lambda *args: reports.append(args))
+
+        downloads = [done for done, _, stage in reports if stage == 'download']
+        self.assertEqual(downloads[-1], result['chunks'])
+        self.assertEqual(downloads, sorted(downloads))
+        self.assertTrue(any(stage == 'parse' for _, _, stage in reports))
+
+    def test_manifest_mismatch_is_rejected(self):
+        result = self.backups.backup(self.content)
+        manifest = json.loads(self.client.files[result['cid']])
+        manifest['sha256'] = '0' * 64
+        cid = self.client.upload_bytes(json.dumps(manifest).encode('utf-8'), 'tampered.manifest.json')
+
+        with self.assertRaises(ValueError):
+            RestorePipeline(self.backups, parse_workers=0).restore(cid)
+
+    def test_empty_backup(self):
+        cid = self.client.upload_bytes(b'', 'empty.csv')
+
+        self.assertTrue(RestorePipeline(self.backups, parse_workers=0).restore(cid).empty)
+
+    def test_merge_skips_transactions_already_present(self):
+        history = synthetic_history(100).reset_index(drop=True)
+        current, restored = history.iloc[:60], history.iloc[40:]
+
+        merged = RestorePipeline.merge(current, restored)
+
+        self.assertEqual(len(merged), 100)
+        self.assertTrue(merged['date'].is_monotonic_decreasing)
+        self.assertIs(RestorePipeline.merge(None, restored), restored)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from utils.transaction_partitions import TransactionPartitions
+from utils.transaction_view import TransactionView
+from tests.fixtures import transaction_rows
+
+
+class TestTransactionPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_least_recently_used_partitions_are_evicted(self):
+        partitions = TransactionPartitions(self.root, max_partitions=2, commit_delay=0)
+        for user in ("a", "b", "c"):
+            partitions.get(user).add(transaction_rows(-1.0))
+        partitions.get("b")
+
+        self.assertEqual(
+            partitions.loaded(), [partitions.partition_key("c"), partitions.partition_key("b")]
+        )
+        # The evicted partition was checkpointed and indexed
+        index = {entry["partition"]: entry for entry in partitions.partitions()}
+        self.assertEqual(index[partitions.partition_key("a")]["rows"], 1)
+        self.assertEqual(os.path.getsize(os.path.join(partitions.directory("a"), "wal.log")), 0)
+
+    def test_partition_in_use_is_not_reopened(self):
+        partitions = TransactionPartitions(self.root, max_partitions=1, commit_delay=0)
+        store = partitions.get("a")
+        partitions.get("b")
+
+        self.assertIs(partitions.get("a"), store)
+
+    def test_index_is_rebuilt_from_snapshots(self):
+        partitions = TransactionPartitions(self.root, commit_delay=0)
+        partitions.get("a").replace(transaction_rows(-1.0, -2.0))
+        partitions._conn.close()
+        os.remove(os.path.join(self.root, TransactionPartitions.INDEX_FILE))
+
+        rebuilt = TransactionPartitions(self.root)
+
+        self.assertEqual([entry["rows"] for entry in rebuilt.partitions()], [2])
+
+class TestLoadSession(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.partitions = TransactionPartitions(self.directory.name, commit_delay=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_session_sees_only_its_users_partition(self):
+        self.partitions.get("alice").add(transaction_rows(-1.0, -2.0))
+        session = {}
+
+        view = TransactionView.load_session(session, "alice", self.partitions)
+
+        self.assertIs(view.store, self.partitions.get("alice"))
+        self.assertIs(session['financial_data'], view.frame)
+        self.assertEqual(len(session['financial_data']), 2)
+
+        other = TransactionView.load_session({}, "bob", self.partitions)
+        self.assertEqual(len(other), 0)
+
+    def test_empty_partition_is_not_published(self):
+        session = {'financial_data': None}
+
+        TransactionView.load_session(session, "alice", self.partitions)
+
+        self.assertIsNone(session['financial_data'])
+
+    def test_switching_user_replaces_the_view(self):
+        session = {}
+        view = TransactionView.load_session(session, "alice", self.partitions)
+        view.delete([1])
+
+        switched = TransactionView.load_session(session, "bob", self.partitions)
+
+        self.assertIsNot(switched, view)
+        self.assertEqual(switched.pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from utils.transaction_store import TransactionStore
+from tests.fixtures import transaction_rows
+
+
+class TestTransactionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_log_is_replayed_on_open(self):
+        store = TransactionStore(self.path, commit_delay=0)
+        store.add(transaction_rows(-10.0, -20.0))
+        store.update([1], {'amount': -15.0, 'category': 'Groceries'})
+        store.delete([2])
+        version = store.version
+
+        reopened = TransactionStore(self.path, commit_delay=0)
+
+        self.assertEqual(reopened.version, version)
+        self.assertEqual(reopened.frame['amount'].tolist(), [-15.0])
+        self.assertEqual(reopened.frame['category'].tolist(), ['Groceries'])
+        pd.testing.assert_frame_equal(TransactionStore.read_frame(self.path), reopened.frame)
+
+    def test_torn_tail_is_discarded(self):
+        store = TransactionStore(self.path, commit_delay=0)
+        store.add(transaction_rows(-10.0))
+        store.add(transaction_rows(-20.0))
+        store._wal.close()
+        wal_path = os.path.join(self.path, "wal.log")
+        os.truncate(wal_path, os.path.getsize(wal_path) - 3)
+
+        with self.assertLogs("transactions", level="WARNING"):
+            reopened = TransactionStore(self.path, commit_delay=0)
+
+        self.assertEqual(reopened.frame['amount'].tolist(), [-10.0])
+        reopened.add(transaction_rows(-30.0))
+        self.assertEqual(TransactionStore(self.path).frame['amount'].tolist(), [-30.0, -10.0])
+
+    def test_checkpoint_truncates_the_log(self):
+        store = TransactionStore(self.path, checkpoint_records=3, commit_delay=0)
+        for amount in (-1.0, -2.0, -3.0):
+            store.add(transaction_rows(amount))
+
+        self.assertEqual(os.path.getsize(store.wal_path), 0)
+        self.assertEqual(TransactionStore.read_snapshot(self.path)[1], store.version)
+        self.assertEqual(TransactionStore(self.path).frame['amount'].tolist(), [-3.0, -2.0, -1.0])
+
+    def test_checkpoint_keeps_frames_in_use_readable(self):
+        store = TransactionStore(self.path, commit_delay=0)
+        store.replace(transaction_rows(-1.0, -2.0))
+        frame = store.frame
+
+        # A second checkpoint of the same state must not remove the mapped snapshot
+        store.checkpoint()
+        store.release()
+
+        self.assertEqual(frame['amount'].tolist(), [-1.0, -2.0])
+        snapshots = [entry for entry in os.listdir(self.path) if entry.startswith("snapshot-")]
+        self.assertEqual(len(snapshots), 1)
+        self.assertEqual(TransactionStore(self.path).frame['amount'].tolist(), [-1.0, -2.0])
+
+if __name__ == '__main__':
+    unittest.main()
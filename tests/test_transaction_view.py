@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+
+from utils.transaction_store import TransactionStore
+from utils.transaction_view import TransactionView
+from tests.fixtures import transaction_rows
+
+
+class TestTransactionView(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = TransactionStore(self.directory.name, commit_delay=0)
+        self.store.replace(transaction_rows(-1.0, -2.0))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_overlay_is_private_until_committed(self):
+        view = TransactionView.for_session({}, self.store)
+        view.add(transaction_rows(-5.0, category='Travel'))
+        view.update([1], {'amount': -1.5})
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view.pending, 2)
+
+        committed = view.commit()
+
+        self.assertEqual(view.pending, 0)
+        self.assertIs(view.frame, self.store.frame)
+        self.assertEqual(sorted(committed['amount'].tolist()), [-5.0, -2.0, -1.5])
+        self.assertTrue((committed.index > 0).all())
+
+    def test_discard(self):
+        view = TransactionView.for_session({}, self.store)
+        view.delete([1])
+
+        view.discard()
+
+        self.assertIs(view.frame, self.store.frame)
+    def test_sessions_have_separate_overlays(self):
+        first, second = {}, {}
+        view = TransactionView.for_session(first, self.store)
+        other = TransactionView.for_session(second, self.store)
+        view.delete([1])
+
+        self.assertIs(TransactionView.for_session(first, self.store), view)
+        self.assertEqual(len(view), 1)
+        self.assertIs(other.frame, self.store.frame)
+
+    def test_overlay_follows_commits_of_other_sessions(self):
+        view = TransactionView.for_session({}, self.store)
+        view.update([2], {'category': 'Travel'})
+
+        other = TransactionView.for_session({}, self.store)
+        other.add(transaction_rows(-3.0))
+        other.commit()
+
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view.frame.loc[2, 'category'], 'Travel')
+        self.assertNotIn(-1, view.frame.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from utils.upload_index import UploadIndex
+
+
+class FakeLighthouseClient:
+    """Lists a fixed set of uploads newest first"""
+
+    def __init__(self, api_key='key-a'):
+        self.api_key = api_key
+        self.uploads = []
+        self.listed = 0
+
+    def add(self, cid, created, file_name=None, deal_status='queued', size=100):
+        self.uploads.insert(0, {'cid': cid, 'createdAt': created * 1000, 'fileName': file_name or f'{cid}.csv',
+                                'fileSizeInBytes': size, 'dealStatus': deal_status})
+
+    def iter_uploads(self, page_size=100):
+        for upload in list(self.uploads):
+            self.listed += 1
+            yield dict(upload)
+
+
+class TestUploadIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeLighthouseClient()
+        for i in range(5):
+            self.client.add(f'cid{i}', 1_700_000_000 + i)
+        self.index = UploadIndex(self.client, db_path=':memory:')
+
+    def cids(self, **kwargs):
+        return [upload['cid'] for upload in self.index.query(**kwargs)[0]]
+
+    def test_first_sync_indexes_full_listing(self):
+        self.assertEqual(self.index.sync(), 5)
+
+        self.assertEqual(self.cids(), ['cid4', 'cid3', 'cid2', 'cid1', 'cid0'])
+        self.assertEqual(self.cids(descending=False, limit=2, offset=1), ['cid1', 'cid2'])
+        self.assertEqual(self.index.query(limit=1)[1], 5)
+
+    def test_incremental_sync_stops_at_indexed_uploads(self):
+        self.index.sync()
+        self.client.add('cid5', 1_700_000_005)
+        self.client.listed = 0
+
+        self.index.sync(full=False)
+
+        self.assertEqual(self.cids()[0], 'cid5')
+        # The new upload, the newest indexed one (same createdAt) and the first older one
+        self.assertEqual(self.client.listed, 3)
+
+    def test_recent_sync_is_skipped_until_invalidated(self):
+        self.index.sync()
+
+        self.assertEqual(self.index.sync(max_age=60, full=False), 0)
+        self.index.invalidate()
+        self.assertEqual(self.index.sync(max_age=60, full=False), 1)
+
+    def test_full_sync_picks_up_changes_and_deletions(self):
+        self.index.sync()
+        self.client.uploads = [u for u in self.client.uploads if u['cid'] != 'cid2']
+        self.client.uploads[-1]['dealStatus'] = 'stored'
+
+        self.index.sync(full=True)
+
+        self.assertEqual(self.cids(), ['cid4', 'cid3', 'cid1', 'cid0'])
+        self.assertEqual(self.cids(deal_status='stored'), ['cid0'])
+
+    def test_full_sync_is_due_after_interval(self):
+        self.index.full_sync_interval = 0
+        self.index.sync()
+        self.client.uploads.pop()
+        self.client.listed = 0
+
+        self.index.sync()
+
+        self.assertEqual(self.client.listed, 4)
+        self.assertNotIn('cid0', self.cids())
+
+    def test_search_and_sort(self):
+        self.client.add('cid5', 1_700_000_005, file_name='100%_Budget.csv', size=5)
+        self.client.add('cid6', 1_700_000_006, file_name='100x budget.csv', size=1)
+        self.index.sync()
+
+        self.assertEqual(self.cids(search='100%_'), ['cid5'])
+        self.assertEqual(self.cids(search='BUDGET'), ['cid6', 'cid5'])
+        self.assertEqual(self.cids(sort='fileSizeInBytes', descending=False)[:2], ['cid6', 'cid5'])
+        with self.assertRaises(ValueError):
+            self.index.query(sort='cid')
+
+    def test_known_content(self):
+        self.index.sync()
+        self.index.record_content('bafy-local', 'cid1', 100)
+
+        self.assertEqual(self.index.known_cid('bafy-local'), 'cid1')
+        self.assertIsNone(self.index.known_cid('bafy-other'))
+
+        self.index.forget_content('cid1')
+        self.assertIsNone(self.index.known_cid('bafy-local'))
+        self.assertNotIn('cid1', self.cids())
+
+    def test_full_sync_forgets_content_no_longer_listed(self):
+        self.index.record_content('bafy-kept', 'cid1', 100)
+        self.index.record_content('bafy-gone', 'cid9', 100)
+        time.sleep(0.01)
+
+        self.index.sync(full=True)
+
+        self.assertEqual(self.index.known_cid('bafy-kept'), 'cid1')
+        self.assertIsNone(self.index.known_cid('bafy-gone'))
+
+    def test_reset(self):
+        self.index.sync()
+        self.index.reset()
+
+        self.assertEqual(self.cids(), [])
+        self.assertEqual(self.index.sync(max_age=60), 5)
+
+    def test_accounts_are_isolated(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        db_path = os.path.join(directory, 'uploads.db')
+        UploadIndex(self.client, db_path=db_path).sync()
+
+        other = UploadIndex(FakeLighthouseClient('key-b'), db_path=db_path)
+
+        self.assertEqual(other.query()[1], 0)
+        self.assertEqual(UploadIndex(self.client, db_path=db_path).query()[1], 5)
+
+    def test_created_timestamp(self):
+        self.assertEqual(UploadIndex.created_timestamp(1_700_000_000_000), 1_700_000_000)
+        self.assertEqual(UploadIndex.created_timestamp(1_700_000_000), 1_700_000_000)
+        self.assertEqual(UploadIndex.created_timestamp('2024-01-01T00:00:00+00:00'), 1_704_067_200)
+        self.assertEqual(UploadIndex.created_timestamp('yesterday'), 0.0)
+        self.assertEqual(UploadIndex.created_timestamp(None), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+
+from utils.upload_queue import UploadQueue
+
+
+class FakeLighthouseClient:
+
+    def __init__(self, api_key="key", failures=0):
+        self.api_key = api_key
+        self.failures = failures
+        self.uploads = []
+
+    def upload_bytes(self, content, filename):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Lighthouse unavailable")
+        self.uploads.append((filename, content))
+        return f"cid-{len(self.uploads)}"
+
+
+class TestUploadQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "queue.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_saves_are_coalesced(self):
+        client = FakeLighthouseClient()
+        queue = UploadQueue(client, db_path=self.db_path, delay=60)
+        for i in range(3):
+            queue.save("financial_data", f"version {i}".encode(), "financial_data.csv")
+
+        self.assertEqual(queue.process_due(), 0)
+        self.assertEqual(queue.status("financial_data")["state"], "pending")
+
+        self.assertEqual(queue.process_due(now=time.time() + 60), 1)
+        self.assertEqual(client.uploads, [("financial_data.csv", b"version 2")])
+        status = queue.status("financial_data")
+        self.assertEqual((status["state"], status["cid"]), ("synced", "cid-1"))
+
+    def test_failed_upload_is_retried_with_backoff(self):
+        client = FakeLighthouseClient(failures=2)
+        queue = UploadQueue(client, db_path=self.db_path, delay=0, retry_interval=10, max_retry_interval=15)
+        queue.save("budget", b"{}", "budget.json")
+
+        self.assertEqual(queue.process_due(), 0)
+        status = queue.status("budget")
+        self.assertEqual((status["state"], status["attempts"]), ("error", 1))
+        self.assertIn("unavailable", status["error"])
+        self.assertEqual(queue.process_due(), 0)
+        self.assertEqual(queue.process_due(now=time.time() + 9), 0)
+
+        self.assertEqual(queue.process_due(now=time.time() + 30), 0)
+        self.assertEqual(queue.status("budget")["attempts"], 2)
+        self.assertEqual(queue.process_due(now=time.time() + 30), 1)
+        self.assertEqual(queue.status("budget")["state"], "synced")
+
+    def test_journal_survives_restart(self):
+        UploadQueue(FakeLighthouseClient(), db_path=self.db_path, delay=60).save("budget", b"{}", "budget.json")
+        client = FakeLighthouseClient()
+        queue = UploadQueue(client, db_path=self.db_path)
+
+        self.assertEqual(queue.pending_count(), 1)
+        self.assertTrue(queue.flush())
+        self.assertEqual(client.uploads, [("budget.json", b"{}")])
+
+    def test_users_sharing_a_key_have_separate_journals(self):
+        client = FakeLighthouseClient()
+        first = UploadQueue(client, db_path=self.db_path, user_id="alice")
+        second = UploadQueue(client, db_path=self.db_path, user_id="bob")
+        first.save("budget", b"alice", "budget.json")
+
+        self.assertEqual(second.pending_count(), 0)
+        self.assertIsNone(second.status("budget")["state"])
+        self.assertEqual(first.pending_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
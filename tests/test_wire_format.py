@@ -0,0 +1,93 @@
+import base64
+import unittest
+from unittest import mock
+
+import requests
+
+from utils.data_processor import DataProcessor
+from utils.lilypad_client import LilypadClient
+from utils.wire_format import ColumnarPayload
+from tests.fixtures import synthetic_history
+
+
+def prepared(n=500, seed=0):
+    return DataProcessor.prepare_for_ml(synthetic_history(n, seed=seed, days=400))
+
+
+class TestColumnarPayload(unittest.TestCase):
+
+    def test_round_trip_every_supported_format(self):
+        payload = {'task': 'savings_plan', 'parameters': {'target': 500.0}, 'data': prepared()}
+
+        for wire_format in ColumnarPayload.supported_formats():
+            decoded = ColumnarPayload.decode(ColumnarPayload.encode(payload, wire_format))
+            self.assertEqual(decoded, payload, wire_format)
+
+    def test_round_trip_prepared_data(self):
+        data = prepared()
+
+        self.assertEqual(ColumnarPayload.decode(ColumnarPayload.encode(data, 'lpwf-2+zlib')), data)
+
+    def test_payload_without_features(self):
+        payload = {'task': 'ping', 'values': [1, 2, 3]}
+
+        self.assertEqual(ColumnarPayload.decode(ColumnarPayload.encode(payload)), payload)
+
+    def test_compact_format_is_smaller_than_json(self):
+        payload = {'data': prepared(5000)}
+
+        compact = ColumnarPayload.encode(payload, 'lpwf-2+zlib')
+
+        self.assertLess(len(compact), len(ColumnarPayload.encode(payload, 'json')) / 5)
+
+    def test_negotiate(self):
+        self.assertEqual(ColumnarPayload.negotiate(['json', 'lpwf-2+zlib']), 'lpwf-2+zlib')
+        self.assertEqual(ColumnarPayload.negotiate(['json']), 'json')
+        self.assertIsNone(ColumnarPayload.negotiate(['protobuf']))
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ColumnarPayload.encode({'data': prepared(10)}, 'lpwf-9')
+
+
+class TestClientWireFormat(unittest.TestCase):
+
+    def capabilities(self, formats=None, error=None):
+        fake = mock.Mock(exceptions=requests.exceptions)
+        if error is not None:
+            fake.get.side_effect = error
+        else:
+            fake.get.return_value.json.return_value = {'payload_formats': formats}
+        patcher = mock.patch('utils.lilypad_client.requests', fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return fake
+
+    def test_negotiates_most_compact_accepted_format(self):
+        fake = self.capabilities(['json', 'lpwf-1', 'lpwf-2+zlib'])
+        client = LilypadClient(api_key='test-key')
+
+        self.assertEqual(client.wire_format, 'lpwf-2+zlib')
+        self.assertEqual(client.wire_format, 'lpwf-2+zlib')
+        self.assertEqual(fake.get.call_count, 1)
+
+    def test_falls_back_to_json(self):
+        self.capabilities(error=requests.exceptions.ConnectionError('unreachable'))
+        self.assertEqual(LilypadClient(api_key='test-key').wire_format, 'json')
+        self.assertEqual(LilypadClient(api_key='').wire_format, 'json')
+
+    def test_unencrypted_payload_uses_negotiated_format(self):
+        self.capabilities(['lpwf-2+zlib'])
+        with mock.patch.dict('os.environ', {'LILYPAD_ENCRYPTION_KEY': ''}):
+            client = LilypadClient(api_key='test-key')
+        payload = {'data': prepared(50)}
+
+        with self.assertLogs('lilypad', 'WARNING'):
+            body = client.encrypt_data(payload)
+
+        self.assertEqual(body['payload_format'], 'lpwf-2+zlib')
+        self.assertEqual(ColumnarPayload.decode(base64.b64decode(body['encrypted_payload'])), payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,552 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+
+
+class AnalyticsStore:
+    """
+    Embedded analytical store for transactions.
+
+    Transactions of every account are kept in one indexed table of a local
+    SQLite (default) or DuckDB database, so filters and summaries run as SQL
+    over the (account, date) and (account, category, date) indexes instead of
+    pandas scans over a per-session copy of the full history. The table is
+    kept in step with the account's transaction frame by sync(), which only
+    writes the rows whose content changed.
+
+    The store is opt-in: pages evaluate queries on the in-memory frame they
+    already hold unless ANALYTICS_BACKEND is set to "sqlite" or "duckdb" (if
+    installed). The frame is still loaded and synced on every render, so the
+    store does not reduce session memory.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            account TEXT NOT NULL,
+            id BIGINT NOT NULL,
+            date BIGINT NOT NULL,
+            month INTEGER NOT NULL,
+            amount DOUBLE NOT NULL,
+            description TEXT,
+            category TEXT,
+            row_hash BIGINT NOT NULL,
+            PRIMARY KEY (account, id)
+        )
+        """,
+        # Trailing columns make the indexes covering for the summaries
+        "CREATE INDEX IF NOT EXISTS transactions_date ON transactions (account, date, month, amount)",
+        "CREATE INDEX IF NOT EXISTS transactions_category ON transactions (account, category, date, amount)"
+    )
+
+    # Columns mirrored from the transaction frame
+    COLUMNS = ('date', 'amount', 'description', 'category')
+
+    BACKENDS = ("sqlite", "duckdb")
+
+    # Stores shared by every page render in this process
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, user_id, db_path=None, backend="sqlite"):
+        """
+        Open the store for an account.
+
+        Args:
+            user_id: User identifier (Replit user id, or the Lighthouse API key without Replit Auth)
+            db_path: Database path (defaults to ANALYTICS_DB or ~/.finsecure/analytics.db / analytics.duckdb)
+            backend: "sqlite" or "duckdb"
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown analytics backend: {backend}")
+
+        self.backend = backend
+        self.db_path = db_path or os.getenv(
+            "ANALYTICS_DB",
+            os.path.join(os.path.expanduser("~"), ".finsecure", "analytics.duckdb" if backend == "duckdb" else "analytics.db")
+        )
+        self.logger = logging.getLogger("transactions")
+
+        # Rows of different accounts share the table, keyed by a hash of the user id
+        self.account = hashlib.sha256(str(user_id or "").encode("utf-8")).hexdigest()[:16]
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        if backend == "duckdb":
+            import duckdb
+            self._conn = duckdb.connect(self.db_path)
+        else:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            self._commit()
+
+        # Row hashes by id as last written, and the frame they were computed from
+        self._hashes = None
+        self._synced_frame = None
+
+    @classmethod
+    def shared(cls, user_id, db_path=None, backend=None):
+        """
+        Get the process-wide store of an account, opened on first use.
+
+        Args:
+            user_id: User identifier, the same one the user's transaction partition is kept under
+            db_path: Database path
+            backend: "sqlite", "duckdb" or "pandas" (defaults to ANALYTICS_BACKEND or "pandas")
+
+        Returns:
+            store: AnalyticsStore instance, or None if queries should run on pandas frames
+        """
+        backend = (backend or os.getenv("ANALYTICS_BACKEND", "pandas")).lower()
+        if backend == "pandas":
+            return None
+        if backend == "duckdb":
+            try:
+                import duckdb  # noqa: F401
+            except ImportError:
+                logging.getLogger("transactions").warning("duckdb is not installed, using SQLite for analytics")
+                backend = "sqlite"
+
+        key = (db_path, backend, user_id)
+        with cls._shared_lock:
+            store = cls._shared.get(key)
+            if store is None:
+                store = cls(user_id, db_path=db_path, backend=backend)
+                cls._shared[key] = store
+            return store
+
+    def _commit(self):
+        if self.backend == "sqlite":
+            self._conn.commit()
+
+    def _fetchall(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, list(params)).fetchall()
+
+    # Loading
+
+    @classmethod
+    def _rows(cls, df):
+        """
+        Convert a transaction frame to the table's column layout.
+
+        Args:
+            df: Transaction DataFrame, ideally indexed by unique transaction ids
+
+        Returns:
+            rows: DataFrame with id, date, month, amount, description, category and row_hash
+        """
+        ids = cls._ids(df)
+        dates = pd.to_datetime(df['date']).astype('datetime64[ns]')
+        columns = df[[column for column in cls.COLUMNS if column in df.columns]]
+        return pd.DataFrame({
+            'id': ids,
+            'date': dates.to_numpy().view(np.int64),
+            'month': (dates.dt.year * 100 + dates.dt.month).to_numpy(dtype=np.int64),
+            'amount': df['amount'].to_numpy(dtype=np.float64),
+            'description': cls._text(df, 'description'),
+            'category': cls._text(df, 'category'),
+            'row_hash': pd.util.hash_pandas_object(columns, index=False).to_numpy().view(np.int64)
+        })
+
+    @staticmethod
+    def _ids(df):
+        """
+        Row ids of a transaction frame: its index if that holds unique integers, else row positions.
+
+        Args:
+            df: Transaction DataFrame
+
+        Returns:
+            ids: int64 array
+        """
+        if pd.api.types.is_integer_dtype(df.index) and df.index.is_unique:
+            return df.index.to_numpy(dtype=np.int64)
+        return np.arange(len(df), dtype=np.int64)
+
+    @staticmethod
+    def _text(df, column):
+        if column not in df.columns:
+            return np.full(len(df), None, dtype=object)
+        values = df[column].astype(object)
+        return values.where(values.notna(), None).to_numpy()
+
+    def _stored_hashes(self):
+        rows = self._fetchall("SELECT id, row_hash FROM transactions WHERE account = ?", (self.account,))
+        if not rows:
+            return pd.Series([], index=pd.Index([], dtype=np.int64), dtype=np.int64)
+        ids, hashes = zip(*rows)
+        return pd.Series(np.asarray(hashes, dtype=np.int64), index=pd.Index(np.asarray(ids, dtype=np.int64)))
+
+    def sync(self, df):
+        """
+        Bring the account's rows in line with its transaction frame.
+
+        Only rows added, changed or removed since the last sync are written; a
+        frame already synced (the same object) is skipped without any work.
+
+        Args:
+            df: Current transaction DataFrame (None clears the account)
+
+        Returns:
+            written: Number of rows inserted, replaced or deleted
+        """
+        if df is None:
+            df = pd.DataFrame(columns=list(self.COLUMNS))
+        with self._sync_lock:
+            if df is self._synced_frame:
+                return 0
+
+            rows = self._rows(df)
+            current = pd.Series(rows['row_hash'].to_numpy(), index=pd.Index(rows['id'].to_numpy()))
+            stored = self._hashes if self._hashes is not None else self._stored_hashes()
+
+            changed = rows[stored.reindex(current.index, fill_value=0).to_numpy() != current.to_numpy()]
+            removed = stored.index.difference(current.index)
+            stale = np.concatenate([removed.to_numpy(), changed['id'].to_numpy()])
+
+            with self._lock:
+                if self.backend == "duckdb":
+                    self._conn.begin()
+                    self._conn.register("stale_ids", pd.DataFrame({'id': stale}))
+                    self._conn.register("changed_rows", changed)
+                    self._conn.execute(
+                        "DELETE FROM transactions WHERE account = ? AND id IN (SELECT id FROM stale_ids)", [self.account]
+                    )
+                    self._conn.execute(
+                        "INSERT INTO transactions SELECT ?, id, date, month, amount, description, category, row_hash "
+                        "FROM changed_rows",
+                        [self.account]
+                    )
+                    self._conn.unregister("stale_ids")
+                    self._conn.unregister("changed_rows")
+                    self._conn.commit()
+                else:
+                    with self._conn:
+                        self._conn.executemany(
+                            "DELETE FROM transactions WHERE account = ? AND id = ?",
+                            [(self.account, int(i)) for i in stale]
+                        )
+                        self._conn.executemany(
+                            "INSERT INTO transactions (account, id, date, month, amount, description, category, row_hash) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            zip(
+                                [self.account] * len(changed),
+                                changed['id'].tolist(),
+                                changed['date'].tolist(),
+                                changed['month'].tolist(),
+                                changed['amount'].tolist(),
+                                changed['description'].tolist(),
+                                changed['category'].tolist(),
+                                changed['row_hash'].tolist()
+                            )
+                        )
+
+            self._hashes = current
+            self._synced_frame = df
+            if len(stale):
+                self.logger.info(f"Synced analytics store: {len(changed)} rows written, {len(removed)} removed")
+            return len(changed) + len(removed)
+
+    # Queries
+
+    def _where(self, filters):
+        """
+        Build the WHERE clause for a set of query filters.
+
+        Args:
+            filters: Dict of TransactionQuery filters
+
+        Returns:
+            condition: SQL condition
+            params: Condition parameters
+        """
+        where = ["account = ?"]
+        params = [self.account]
+        if filters.get('start') is not None:
+            where.append("date >= ?")
+            params.append(TransactionQuery.day_start(filters['start']))
+        if filters.get('end') is not None:
+            where.append("date < ?")
+            params.append(TransactionQuery.day_after(filters['end']))
+        if filters.get('kind') == "income":
+            where.append("amount > 0")
+        elif filters.get('kind') == "expenses":
+            where.append("amount < 0")
+        if filters.get('categories'):
+            where.append(f"category IN ({', '.join('?' * len(filters['categories']))})")
+            params.extend(filters['categories'])
+        if filters.get('search'):
+            like = "ILIKE" if self.backend == "duckdb" else "LIKE"
+            where.append(f"description {like} ? ESCAPE '\\'")
+            search = filters['search']
+            params.append("%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        return " AND ".join(where), params
+
+    def frame(self, filters, limit=None, offset=0):
+        """
+        Fetch matching transactions, newest first.
+
+        Args:
+            filters: Dict of TransactionQuery filters
+            limit: Optional maximum number of transactions
+            offset: Number of matching transactions to skip
+
+        Returns:
+            df: Transaction DataFrame indexed by transaction id
+        """
+        condition, params = self._where(filters)
+        paging = ""
+        if limit is not None:
+            paging = " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        elif offset:
+            # SQLite only accepts OFFSET after a LIMIT
+            paging = " LIMIT -1 OFFSET ?" if self.backend == "sqlite" else " OFFSET ?"
+            params.append(offset)
+        rows = self._fetchall(
+            f"SELECT id, date, amount, description, category FROM transactions WHERE {condition} "
+            f"ORDER BY date DESC, id DESC{paging}",
+            params
+        )
+        df = pd.DataFrame.from_records(rows, columns=['id', 'date', 'amount', 'description', 'category'])
+        df['date'] = pd.to_datetime(df['date'].astype(np.int64), unit='ns')
+        df['amount'] = df['amount'].astype(np.float64)
+        return DataProcessor.optimize_dtypes(df.set_index('id'))
+
+    def totals(self, filters):
+        """
+        Income, expenses and count of matching transactions.
+
+        Args:
+            filters: Dict of TransactionQuery filters
+
+        Returns:
+            totals: Dict with income, expenses and count
+        """
+        condition, params = self._where(filters)
+        income, expenses, count = self._fetchall(
+            "SELECT SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), "
+            "-SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END), COUNT(*) "
+            f"FROM transactions WHERE {condition}",
+            params
+        )[0]
+        return {'income': float(income or 0), 'expenses': float(expenses or 0), 'count': int(count)}
+
+    def monthly_summary(self, filters):
+        """
+        Monthly income, expenses and savings of matching transactions.
+
+        Args:
+            filters: Dict of TransactionQuery filters
+
+        Returns:
+            monthly_summary: DataFrame shaped like DataProcessor.calculate_monthly_summary
+        """
+        condition, params = self._where(filters)
+        rows = self._fetchall(
+            "SELECT month, SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), "
+            "-SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END), SUM(amount) "
+            f"FROM transactions WHERE {condition} GROUP BY month ORDER BY month",
+            params
+        )
+        monthly = pd.DataFrame.from_records(rows, columns=['month', 'income', 'expenses', 'net'])
+        monthly[['income', 'expenses', 'net']] = monthly[['income', 'expenses', 'net']].astype(np.float64)
+        monthly['savings_rate'] = (monthly['income'] - monthly['expenses']) / monthly['income'] * 100
+        monthly['savings_rate'] = monthly['savings_rate'].fillna(0)
+        monthly['month'] = [f"{month // 100:04d}-{month % 100:02d}" for month in monthly['month']]
+        return monthly
+
+    def category_spending(self, filters):
+        """
+        Spending by category of matching transactions.
+
+        Args:
+            filters: Dict of TransactionQuery filters
+
+        Returns:
+            category_spending: DataFrame shaped like DataProcessor.calculate_category_spending
+        """
+        condition, params = self._where(filters)
+        rows = self._fetchall(
+            "SELECT category, -SUM(amount), COUNT(*), -AVG(amount) "
+            f"FROM transactions WHERE {condition} AND amount < 0 AND category IS NOT NULL GROUP BY category",
+            params
+        )
+        spending = pd.DataFrame.from_records(rows, columns=['category', 'total', 'count', 'avg'])
+        spending[['total', 'avg']] = spending[['total', 'avg']].astype(np.float64)
+        spending['percentage'] = spending['total'] / spending['total'].sum() * 100
+        return spending.sort_values('total', ascending=False).reset_index(drop=True)
+
+
+class TransactionQuery:
+    """
+    Filtered view of an account's transactions.
+
+    Pages describe what they need (a date range, income or expenses, categories,
+    a description search) and the query is evaluated by the AnalyticsStore when
+    one is configured, or on the in-memory frame otherwise. DataProcessor's
+    summary functions accept a query in place of a DataFrame and push down to it.
+    """
+
+    def __init__(self, df, store=None, start=None, end=None, kind=None, categories=None, search=None):
+        """
+        Initialize the query.
+
+        Args:
+            df: Transaction DataFrame of the account
+            store: Optional AnalyticsStore holding the same transactions
+            start: Optional first date (inclusive)
+            end: Optional last date (inclusive)
+            kind: Optional "income" (amount > 0) or "expenses" (amount < 0)
+            categories: Optional list of categories to keep
+            search: Optional case-insensitive substring of the description
+        """
+        if kind not in (None, "income", "expenses"):
+            raise ValueError(f"Unknown transaction kind: {kind}")
+
+        self.df = df
+        self.store = store
+        self.filters = {
+            'start': start,
+            'end': end,
+            'kind': kind,
+            'categories': list(categories) if categories else None,
+            'search': search or None
+        }
+        if store is not None:
+            store.sync(df)
+
+    @staticmethod
+    def day_start(date):
+        """
+        Epoch nanoseconds of the start of a day.
+
+        Args:
+            date: Date-like value
+
+        Returns:
+            timestamp: Nanoseconds since the epoch
+        """
+        return pd.Timestamp(date).normalize().value
+
+    @staticmethod
+    def day_after(date):
+        """
+        Epoch nanoseconds of the start of the following day.
+
+        Args:
+            date: Date-like value
+
+        Returns:
+            timestamp: Nanoseconds since the epoch
+        """
+        return (pd.Timestamp(date).normalize() + pd.Timedelta(days=1)).value
+
+    def _filtered(self):
+        """
+        Select the matching rows of the in-memory frame.
+
+        Returns:
+            df: Matching transactions
+        """
+        mask = self._mask()
+        return self.df if mask.all() else self.df[mask]
+
+    def _mask(self):
+        """
+        Evaluate the filters on the in-memory frame.
+
+        Returns:
+            mask: Boolean array selecting the matching transactions
+        """
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        filters = self.filters
+        if filters['start'] is not None or filters['end'] is not None:
+            dates = df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+            if filters['start'] is not None:
+                mask &= dates >= self.day_start(filters['start'])
+            if filters['end'] is not None:
+                mask &= dates < self.day_after(filters['end'])
+        if filters['kind'] == "income":
+            mask &= (df['amount'] > 0).to_numpy()
+        elif filters['kind'] == "expenses":
+            mask &= (df['amount'] < 0).to_numpy()
+        if filters['categories']:
+            mask &= df['category'].isin(filters['categories']).to_numpy()
+        if filters['search']:
+            mask &= df['description'].astype(str).str.contains(filters['search'], case=False, regex=False).to_numpy()
+        return mask
+
+    def frame(self, limit=None, offset=0):
+        """
+        Matching transactions.
+
+        Args:
+            limit: Optional maximum number of transactions
+            offset: Number of matching transactions to skip
+
+        Returns:
+            df: Transaction DataFrame, newest first
+        """
+        if self.store is not None:
+            return self.store.frame(self.filters, limit=limit, offset=offset)
+        # Same order as the SQL query: date, then transaction id, both descending
+        mask = self._mask()
+        dates = self.df['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)[mask]
+        ids = AnalyticsStore._ids(self.df)[mask]
+        order = np.lexsort((ids, dates))[::-1]
+        df = self.df if mask.all() else self.df[mask]
+        return df.iloc[order[offset:None if limit is None else offset + limit]]
+
+    def totals(self):
+        """
+        Income, expenses and count of matching transactions.
+
+        Returns:
+            totals: Dict with income, expenses and count
+        """
+        if self.store is not None:
+            return self.store.totals(self.filters)
+        df = self._filtered()
+        return {
+            'income': float(df.loc[df['amount'] > 0, 'amount'].sum()),
+            'expenses': float(abs(df.loc[df['amount'] < 0, 'amount'].sum())),
+            'count': len(df)
+        }
+
+    def monthly_summary(self):
+        """
+        Monthly income, expenses and savings of matching transactions.
+
+        Returns:
+            monthly_summary: DataFrame shaped like DataProcessor.calculate_monthly_summary
+        """
+        if self.store is not None:
+            return self.store.monthly_summary(self.filters)
+        return DataProcessor.calculate_monthly_summary(self._filtered())
+
+    def category_spending(self):
+        """
+        Spending by category of matching transactions.
+
+        Returns:
+            category_spending: DataFrame shaped like DataProcessor.calculate_category_spending
+        """
+        if self.store is not None:
+            return self.store.category_spending(self.filters)
+        return DataProcessor.calculate_category_spending(self._filtered())
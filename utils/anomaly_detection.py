@@ -0,0 +1,593 @@
+import bisect
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class StreamingAnomalyDetector:
+    """
+    Online anomaly detector for expenses.
+
+    Running statistics are kept per (category, day of week), per category and
+    globally, using Welford's algorithm so that every new transaction is scored
+    and absorbed in O(1). A transaction is scored against the most specific level
+    that has at least `min_count` observations, so a rent payment is compared with
+    other rent payments rather than with groceries.
+
+    In robust mode the location and scale are the median and MAD (scaled to match
+    the standard deviation under normality) of a bounded window of recent
+    expenses per level, which keeps a few extreme payments from masking others.
+    """
+
+    # Scale factor that makes the MAD a consistent estimator of the standard deviation
+    MAD_SCALE = 1.4826
+
+    # Smallest robust scale: one currency unit, or a fraction of the typical
+    # amount, so cent-level changes of constant payments (rent, subscriptions)
+    # are not scored as extreme deviations
+    MIN_SCALE = 1.0
+    MIN_RELATIVE_SCALE = 0.05
+
+    def __init__(self, threshold=2.5, high_threshold=3.5, min_count=5, robust=False, window=256):
+        """
+        Initialize the detector.
+
+        Args:
+            threshold: Score above which an expense is flagged
+            high_threshold: Score above which an anomaly is rated high severity
+            min_count: Observations a level needs before it is used for scoring
+            robust: Use median/MAD instead of mean/standard deviation
+            window: Number of recent expenses kept per level in robust mode
+        """
+        self.threshold = threshold
+        self.high_threshold = high_threshold
+        self.min_count = min_count
+        self.robust = robust
+        self.window = window
+
+        # Category label -> internal index
+        self._category_index = {}
+
+        # Welford state: count, mean and sum of squared deviations.
+        # Cell arrays have shape (categories, 7); category arrays (categories,).
+        self._cell = self._empty_stats((0, 7))
+        self._category = self._empty_stats((0,))
+        self._global = self._empty_stats(())
+
+        # Robust mode: sorted windows per level, with cached median/scale
+        self._windows = {}
+        self._robust_cache = {}
+
+    @staticmethod
+    def _empty_stats(shape):
+        return {
+            'count': np.zeros(shape),
+            'mean': np.zeros(shape),
+            'm2': np.zeros(shape)
+        }
+
+    def _index_categories(self, categories):
+        """
+        Map category labels to internal indices, growing the statistics arrays.
+
+        Args:
+            categories: Array of category labels
+
+        Returns:
+            indices: Integer array of internal category indices
+        """
+        uniques, inverse = np.unique(np.asarray(categories), return_inverse=True)
+        lookup = np.empty(len(uniques), dtype=np.int64)
+        for i, label in enumerate(uniques.tolist()):
+            if label not in self._category_index:
+                self._category_index[label] = len(self._category_index)
+            lookup[i] = self._category_index[label]
+
+        self._grow()
+        return lookup[inverse.reshape(-1)]
+
+    def _grow(self):
+        """
+        Extend the per-category statistics arrays to cover every known category.
+        """
+        grow = len(self._category_index) - self._category['count'].shape[0]
+        if grow > 0:
+            for stats, shape in ((self._cell, (grow, 7)), (self._category, (grow,))):
+                for name in stats:
+                    stats[name] = np.concatenate((stats[name], np.zeros(shape)))
+
+    def _levels(self, category, day_of_week):
+        """
+        Statistics levels of a single transaction, most specific first.
+
+        Args:
+            category: Internal category index, or None for an unknown category
+            day_of_week: Day of week (0 = Monday)
+
+        Returns:
+            levels: List of (key, stats, index) tuples
+        """
+        levels = []
+        if category is not None:
+            levels.append((('cell', category, day_of_week), self._cell, (category, day_of_week)))
+            levels.append((('category', category), self._category, category))
+        levels.append((('global',), self._global, ()))
+        return levels
+
+    def update(self, category, day_of_week, amount):
+        """
+        Absorb a single transaction in O(1). Income is ignored.
+
+        Args:
+            category: Category label or code
+            day_of_week: Day of week (0 = Monday)
+            amount: Transaction amount (negative for expenses)
+        """
+        amount = float(amount)
+        if amount >= 0:
+            return
+        value = -amount
+
+        if category not in self._category_index:
+            self._category_index[category] = len(self._category_index)
+            self._grow()
+        index = self._category_index[category]
+
+        # Welford step on each level
+        for key, stats, position in self._levels(index, int(day_of_week)):
+            count = stats['count'][position] + 1
+            delta = value - stats['mean'][position]
+            mean = stats['mean'][position] + delta / count
+            stats['m2'][position] += delta * (value - mean)
+            stats['count'][position] = count
+            stats['mean'][position] = mean
+
+            if self.robust:
+                self._push_window(key, value)
+
+    def score(self, category, day_of_week, amount):
+        """
+        Score a single transaction in O(1) without absorbing it.
+
+        Args:
+            category: Category label or code
+            day_of_week: Day of week (0 = Monday)
+            amount: Transaction amount (negative for expenses)
+
+        Returns:
+            score: Anomaly score (NaN for income or when no statistics exist yet)
+        """
+        amount = float(amount)
+        if amount >= 0 or self._global['count'] == 0:
+            return float('nan')
+
+        levels = self._levels(self._category_index.get(category), int(day_of_week))
+        for key, stats, position in levels:
+            # Fall through to the global level when nothing more specific qualifies
+            if stats['count'][position] >= self.min_count or key == ('global',):
+                break
+
+        if self.robust:
+            location, scale = self._robust_stats(key)
+        else:
+            location = stats['mean'][position]
+            count = stats['count'][position]
+            variance = stats['m2'][position] / (count - 1) if count > 1 else 0.0
+            scale = np.sqrt(variance) if variance > 0 else 1.0
+
+        return float((-amount - location) / scale)
+
+    def observe(self, category, day_of_week, amount):
+        """
+        Score a newly arrived transaction, then absorb it.
+
+        Args:
+            category: Category label or code
+            day_of_week: Day of week (0 = Monday)
+            amount: Transaction amount (negative for expenses)
+
+        Returns:
+            score: Anomaly score of the transaction before it was absorbed
+        """
+        score = self.score(category, day_of_week, amount)
+        self.update(category, day_of_week, amount)
+        return score
+
+    def fit(self, categories, days_of_week, amounts):
+        """
+        Absorb a batch of transactions with vectorized group statistics.
+
+        Group counts, means and squared deviations are merged into the running
+        state with the parallel form of Welford's algorithm, so the result equals
+        absorbing the transactions one by one.
+
+        Args:
+            categories: Array of category labels or codes
+            days_of_week: Array of days of week (0 = Monday)
+            amounts: Array of transaction amounts (negative for expenses)
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        expense = amounts < 0
+        if not expense.any():
+            return
+
+        values = -amounts[expense]
+        category = self._index_categories(np.asarray(categories)[expense])
+        day = np.asarray(days_of_week, dtype=np.int64)[expense]
+        n_categories = self._category['count'].shape[0]
+
+        cell = category * 7 + day
+        self._merge(self._cell, cell, values, n_categories * 7)
+        self._merge(self._category, category, values, n_categories)
+        self._merge(self._global, np.zeros(values.size, dtype=np.int64), values, 1)
+
+        if self.robust:
+            for c, d, v in zip(category.tolist(), day.tolist(), values.tolist()):
+                for level in (('cell', c, d), ('category', c), ('global',)):
+                    self._push_window(level, v)
+
+    @staticmethod
+    def _merge(stats, groups, values, size):
+        """
+        Merge per-group batch statistics into running Welford state in place.
+
+        Args:
+            stats: Running statistics dictionary
+            groups: Flat group index per value
+            values: Observed values
+            size: Number of groups (flat)
+        """
+        count_b = np.bincount(groups, minlength=size).astype(float)
+        sum_b = np.bincount(groups, weights=values, minlength=size)
+        present = count_b > 0
+        mean_b = np.divide(sum_b, count_b, out=np.zeros(size), where=present)
+        m2_b = np.bincount(groups, weights=(values - mean_b[groups]) ** 2, minlength=size)
+
+        shape = stats['count'].shape
+        count_a = stats['count'].reshape(-1)
+        mean_a = stats['mean'].reshape(-1)
+        m2_a = stats['m2'].reshape(-1)
+
+        count = count_a + count_b
+        delta = mean_b - mean_a
+        safe = np.where(count > 0, count, 1)
+        mean = mean_a + delta * count_b / safe
+        m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / safe
+
+        stats['count'] = count.reshape(shape)
+        stats['mean'] = mean.reshape(shape)
+        stats['m2'] = m2.reshape(shape)
+
+    def _push_window(self, level, value):
+        """
+        Add a value to the bounded, sorted robust window of a level.
+
+        Args:
+            level: Level key tuple
+            value: Observed expense
+        """
+        recent, ordered = self._windows.setdefault(level, (deque(), []))
+        if len(recent) == self.window:
+            oldest = recent.popleft()
+            del ordered[bisect.bisect_left(ordered, oldest)]
+        recent.append(value)
+        bisect.insort(ordered, value)
+        self._robust_cache.pop(level, None)
+
+    def _robust_stats(self, level):
+        """
+        Median and scaled MAD of a level's window, cached until the window changes.
+
+        Args:
+            level: Level key tuple
+
+        Returns:
+            location: Median of the window
+            scale: Scaled median absolute deviation (at least min_scale of the median)
+        """
+        cached = self._robust_cache.get(level)
+        if cached is None:
+            ordered = np.asarray(self._windows[level][1])
+            median = float(np.median(ordered))
+            mad = float(np.median(np.abs(ordered - median))) * self.MAD_SCALE
+            cached = (median, max(mad, float(self.min_scale(median))))
+            self._robust_cache[level] = cached
+        return cached
+
+    def score_batch(self, categories, days_of_week, amounts):
+        """
+        Score a batch of transactions against the current statistics.
+
+        Args:
+            categories: Array of category labels or codes
+            days_of_week: Array of days of week (0 = Monday)
+            amounts: Array of transaction amounts (negative for expenses)
+
+        Returns:
+            scores: Array of anomaly scores (NaN for income or without statistics)
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        values = -amounts
+        n = amounts.size
+        scores = np.full(n, np.nan)
+        if n == 0 or self._global['count'] == 0:
+            return scores
+
+        # Unknown categories fall through to the global statistics
+        labels = np.asarray(categories).tolist()
+        category = np.array([self._category_index.get(label, -1) for label in labels], dtype=np.int64)
+        day = np.asarray(days_of_week, dtype=np.int64)
+        known = category >= 0
+        safe_category = np.where(known, category, 0)
+
+        cell_count = np.where(known, self._cell['count'][safe_category, day], 0)
+        category_count = np.where(known, self._category['count'][safe_category], 0)
+
+        # 0 = cell, 1 = category, 2 = global
+        level = np.where(cell_count >= self.min_count, 0, np.where(category_count >= self.min_count, 1, 2))
+
+        if self.robust:
+            (cell_location, cell_scale), (category_location, category_scale), (global_location, global_scale) = self._robust_arrays()
+        else:
+            cell_location, cell_scale = self._cell['mean'], self._scale(self._cell)
+            category_location, category_scale = self._category['mean'], self._scale(self._category)
+            global_location, global_scale = self._global['mean'], self._scale(self._global)
+
+        location = np.choose(level, [
+            cell_location[safe_category, day],
+            category_location[safe_category],
+            np.full(n, global_location)
+        ])
+        scale = np.choose(level, [
+            cell_scale[safe_category, day],
+            category_scale[safe_category],
+            np.full(n, global_scale)
+        ])
+
+        expense = amounts < 0
+        scores[expense] = ((values - location) / scale)[expense]
+        return scores
+
+    @classmethod
+    def min_scale(cls, location):
+        """
+        Smallest robust scale for a location.
+
+        Args:
+            location: Median expense (scalar or array)
+
+        Returns:
+            scale: MIN_SCALE or MIN_RELATIVE_SCALE of the location, whichever is larger
+        """
+        return np.maximum(cls.MIN_SCALE, cls.MIN_RELATIVE_SCALE * np.abs(location))
+
+    @staticmethod
+    def _scale(stats):
+        """
+        Sample standard deviation from Welford state.
+
+        Args:
+            stats: Running statistics dictionary
+
+        Returns:
+            scale: Array of standard deviations, 1.0 where it is undefined or zero
+        """
+        count = stats['count']
+        variance = np.divide(stats['m2'], count - 1, out=np.zeros_like(stats['m2']), where=count > 1)
+        # Avoid division by zero for constant spending
+        return np.where(variance > 0, np.sqrt(variance), 1.0)
+
+    def _robust_arrays(self):
+        """
+        Median/scaled-MAD arrays for every level, laid out like the Welford state.
+
+        Returns:
+            levels: ((cell_location, cell_scale), (category_location, category_scale),
+                (global_location, global_scale))
+        """
+        n_categories = self._category['count'].shape[0]
+        cell = (np.zeros((n_categories, 7)), np.ones((n_categories, 7)))
+        category = (np.zeros(n_categories), np.ones(n_categories))
+        overall = [0.0, 1.0]
+
+        for level in self._windows:
+            location, scale = self._robust_stats(level)
+            if level[0] == 'cell':
+                cell[0][level[1], level[2]] = location
+                cell[1][level[1], level[2]] = scale
+            elif level[0] == 'category':
+                category[0][level[1]] = location
+                category[1][level[1]] = scale
+            else:
+                overall = [location, scale]
+
+        return cell, category, tuple(overall)
+
+    def detect(self, categories, days_of_week, amounts, dates, category_names=None):
+        """
+        Score a batch and format the flagged expenses.
+
+        Args:
+            categories: Array of category labels or codes
+            days_of_week: Array of days of week (0 = Monday)
+            amounts: Array of transaction amounts (negative for expenses)
+            dates: Array of transaction dates
+            category_names: Optional mapping from category code to name
+
+        Returns:
+            anomalies: List of anomaly dictionaries
+        """
+        scores = self.score_batch(categories, days_of_week, amounts)
+        flagged = np.flatnonzero(scores > self.threshold)
+
+        amounts = np.asarray(amounts, dtype=float)[flagged].tolist()
+        flagged_scores = scores[flagged].tolist()
+        flagged_dates = np.asarray(dates)[flagged].tolist()
+        flagged_categories = np.asarray(categories)[flagged].tolist()
+
+        anomalies = []
+        for date, amount, z_score, category in zip(flagged_dates, amounts, flagged_scores, flagged_categories):
+            anomaly = {
+                "date": date,
+                "amount": amount,
+                "z_score": z_score,
+                "severity": "high" if z_score > self.high_threshold else "medium"
+            }
+            if category_names is not None:
+                anomaly["category"] = category_names.get(category, category)
+            anomalies.append(anomaly)
+
+        return anomalies
+
+    def summary(self):
+        """
+        Global expense statistics.
+
+        Returns:
+            stats: Dictionary with count, mean and standard deviation of expenses
+        """
+        return {
+            "count": int(self._global['count']),
+            "mean": float(self._global['mean']),
+            "std": float(self._scale(self._global))
+        }
+
+
+class GroupedAnomalyScorer:
+    """
+    Batch anomaly scorer for columnar multi-user transaction frames.
+
+    Statistics are computed per (user, category) with grouped NumPy/pandas
+    reductions, so millions of rows from many users are scored in one pass
+    instead of one detector call per user. Groups with fewer than `min_count`
+    expenses back off to the user level, then to the global statistics, in the
+    same way as StreamingAnomalyDetector.
+    """
+
+    # Group key of transactions without a user or category
+    MISSING_KEY = 'Uncategorized'
+
+    def __init__(self, threshold=2.5, high_threshold=3.5, min_count=5, robust=True):
+        """
+        Initialize the scorer.
+
+        Args:
+            threshold: Score above which an expense is flagged
+            high_threshold: Score above which an anomaly is rated high severity
+            min_count: Expenses a group needs before its statistics are used
+            robust: Use median/MAD instead of mean/standard deviation
+        """
+        self.threshold = threshold
+        self.high_threshold = high_threshold
+        self.min_count = min_count
+        self.robust = robust
+
+    def _group_stats(self, groups, values, size):
+        """
+        Location and scale of every group.
+
+        Args:
+            groups: Group index per expense
+            values: Expense values (positive)
+            size: Number of groups
+
+        Returns:
+            counts: Expenses per group
+            location: Mean or median per group
+            scale: Standard deviation or scaled MAD per group
+        """
+        counts = np.bincount(groups, minlength=size)
+
+        if not self.robust:
+            sums = np.bincount(groups, weights=values, minlength=size)
+            location = np.divide(sums, counts, out=np.zeros(size), where=counts > 0)
+            m2 = np.bincount(groups, weights=(values - location[groups]) ** 2, minlength=size)
+            variance = np.divide(m2, counts - 1, out=np.zeros(size), where=counts > 1)
+            # Avoid division by zero for constant spending
+            return counts, location, np.where(variance > 0, np.sqrt(variance), 1.0)
+
+        # Grouped medians use selection rather than a full sort of every group
+        location = pd.Series(values).groupby(groups).median().reindex(range(size)).to_numpy()
+        deviations = np.abs(values - location[groups])
+        mad = pd.Series(deviations).groupby(groups).median().reindex(range(size)).to_numpy()
+
+        scale = np.maximum(
+            np.nan_to_num(mad) * StreamingAnomalyDetector.MAD_SCALE,
+            StreamingAnomalyDetector.min_scale(np.nan_to_num(location))
+        )
+        return counts, location, scale
+
+    @staticmethod
+    def _fill_missing(keys, missing):
+        """
+        Replace missing group keys, which groupby would otherwise leave ungrouped.
+
+        Args:
+            keys: Series of user or category keys
+            missing: Key used for missing values
+
+        Returns:
+            keys: Series without missing values
+        """
+        if not keys.isna().any():
+            return keys
+        if isinstance(keys.dtype, pd.CategoricalDtype) and missing not in keys.cat.categories:
+            keys = keys.cat.add_categories([missing])
+        return keys.fillna(missing)
+
+    def score(self, frame, user_column='user_id', category_column='category', amount_column='amount'):
+        """
+        Score every transaction of a multi-user frame.
+
+        Args:
+            frame: Pandas DataFrame with user, category and amount columns
+            user_column: Name of the user identifier column
+            category_column: Name of the category column
+            amount_column: Name of the amount column (negative for expenses)
+
+        Returns:
+            scores: DataFrame aligned with `frame` with score (NaN for income),
+                is_anomaly and severity columns
+        """
+        amounts = frame[amount_column].to_numpy(dtype=float)
+        scores = np.full(amounts.size, np.nan)
+        expense = np.flatnonzero(amounts < 0)
+
+        if expense.size:
+            expenses = frame.iloc[expense]
+            values = -amounts[expense]
+
+            # Most specific level first: user x category, user, global
+            user_keys = self._fill_missing(expenses[user_column], self.MISSING_KEY)
+            category_keys = self._fill_missing(expenses[category_column], self.MISSING_KEY)
+            users = user_keys.groupby(user_keys, sort=False, observed=True).ngroup().to_numpy()
+            cells = user_keys.groupby([user_keys, category_keys], sort=False, observed=True).ngroup().to_numpy()
+            levels = [
+                (cells, int(cells.max()) + 1),
+                (users, int(users.max()) + 1),
+                (np.zeros(expense.size, dtype=np.int64), 1)
+            ]
+
+            location = np.empty(expense.size)
+            scale = np.empty(expense.size)
+            resolved = np.zeros(expense.size, dtype=bool)
+            for i, (groups, size) in enumerate(levels):
+                counts, group_location, group_scale = self._group_stats(groups, values, size)
+                use = ~resolved
+                if i < len(levels) - 1:
+                    use &= counts[groups] >= self.min_count
+                location[use] = group_location[groups[use]]
+                scale[use] = group_scale[groups[use]]
+                resolved |= use
+
+            scores[expense] = (values - location) / scale
+
+        flagged = scores > self.threshold
+        severity_codes = np.where(flagged, np.where(scores > self.high_threshold, 1, 0), -1)
+
+        return pd.DataFrame({
+            'score': scores,
+            'is_anomaly': flagged,
+            'severity': pd.Categorical.from_codes(severity_codes, categories=['medium', 'high'])
+        }, index=frame.index)
@@ -34,6 +34,17 @@ class AuthHandler:
             print(f"Authentication error: {e}")
             return False
     
+    @staticmethod
+    def current_user_id():
+        """Get the Replit user id of the current session, or None without Replit Auth"""
+        user = st.session_state.get('user')
+        return user.get('id') if user else None
+    
+    @staticmethod
+    def session_user_id():
+        """Get the id the current session's data is kept under: the Replit user id, or the Lighthouse API key without Replit Auth"""
+        return AuthHandler.current_user_id() or st.session_state.get('lighthouse_api_key')
+    
     def get_auth_status(self):
         """Get current authentication status"""
         if 'user' in st.session_state:
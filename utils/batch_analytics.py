@@ -0,0 +1,396 @@
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+from utils.monthly_summary import IncrementalMonthlySummary
+from utils.anomaly_detection import GroupedAnomalyScorer
+from utils.ml_models import FinancialMLModels
+from utils.transaction_store import TransactionStore
+
+
+def _categories(frame):
+    """
+    Categories of a user's transactions, with missing categories filled in.
+
+    Args:
+        frame: Transaction DataFrame
+
+    Returns:
+        categories: Categorical Series without missing values
+    """
+    missing = GroupedAnomalyScorer.MISSING_KEY
+    if 'category' not in frame.columns:
+        return pd.Series(pd.Categorical([missing] * len(frame)), index=frame.index)
+    categories = frame['category']
+    if not isinstance(categories.dtype, pd.CategoricalDtype):
+        categories = categories.astype(DataProcessor.category_dtype(categories.dropna().unique()))
+    if categories.isna().any():
+        if missing not in categories.cat.categories:
+            categories = categories.cat.add_categories([missing])
+        categories = categories.fillna(missing)
+    return categories
+
+
+def _per_user(compute, inputs, results):
+    """
+    Run a computation over a whole shard, falling back to one user at a time if it fails.
+
+    Args:
+        compute: Callable mapping a dict of per-user inputs to a dict of per-user outputs
+        inputs: Dict mapping partitions to their inputs
+        results: Dict of per-user results; users whose computation fails get an error dict
+
+    Returns:
+        outputs: Dict mapping partitions to their outputs
+    """
+    if not inputs:
+        return {}
+    try:
+        return compute(inputs)
+    except Exception:
+        outputs = {}
+        for partition, value in inputs.items():
+            try:
+                outputs.update(compute({partition: value}))
+            except Exception as e:
+                results[partition] = {"error": str(e)}
+        return outputs
+
+
+def _score_anomalies(frames):
+    """
+    Score the expenses of many users in one grouped pass.
+
+    Args:
+        frames: Dict mapping partitions to DataFrames of date, amount and category
+
+    Returns:
+        anomalies: Dict mapping partitions to their flagged transactions
+    """
+    stacked = pd.concat(
+        [frame.assign(user_id=partition) for partition, frame in frames.items()], ignore_index=True
+    )
+    scored = GroupedAnomalyScorer(threshold=2.5, high_threshold=3.5, robust=True).score(stacked)
+    stacked = pd.concat([stacked, scored], axis=1)
+    return {
+        partition: group for partition, group in stacked[stacked['is_anomaly']].groupby('user_id', sort=False)
+    }
+
+
+def analyze_shard(partitions, savings_target, top_anomalies=10):
+    """
+    Compute the batch analytics of a shard of users.
+
+    Runs in a worker process. Only partition names and directories are sent
+    to it; each user's columns are memory-mapped from the partition snapshot,
+    so transaction data is never pickled between processes. Anomalies and
+    savings plans are computed for the whole shard at once; if that fails,
+    they are computed user by user, so one user's data only fails that user.
+
+    Args:
+        partitions: List of (partition, directory) tuples
+        savings_target: Target monthly savings for the savings plans
+        top_anomalies: Highest scoring anomalies kept per user
+
+    Returns:
+        results: List of (partition, results) tuples, results mapping each
+            analysis to a JSON-serializable value (or an error dict)
+    """
+    frames = {}
+    results = {}
+    for partition, directory in partitions:
+        try:
+            frame = TransactionStore.read_frame(directory)
+        except Exception as e:
+            results[partition] = {"error": str(e)}
+            continue
+        if len(frame) and {'date', 'amount'}.issubset(frame.columns):
+            frames[partition] = frame
+        else:
+            results[partition] = {"error": "No transactions"}
+
+    # Missing categories would otherwise get the code -1, or drop out of the groups
+    categorized = {}
+    datasets = {}
+    for partition, frame in frames.items():
+        try:
+            categories = _categories(frame)
+            if 'category' in frame.columns:
+                categorized[partition] = pd.DataFrame({
+                    'date': frame['date'], 'amount': frame['amount'], 'category': categories.astype(object)
+                })
+            days = (frame['date'] - frame['date'].min()).dt.days
+            datasets[partition] = {
+                'features': pd.DataFrame({
+                    'amount': frame['amount'].to_numpy(dtype=float),
+                    'category_code': categories.cat.codes.to_numpy(dtype=np.int64),
+                    'days_since_first': days.to_numpy(dtype=np.int64)
+                }).to_dict(orient='records'),
+                'category_mapping': {name: code for code, name in enumerate(categories.cat.categories)}
+            }
+        except Exception as e:
+            results[partition] = {"error": str(e)}
+
+    # Anomalies and savings plans of the whole shard in one vectorized pass each
+    scores = _per_user(_score_anomalies, categorized, results)
+    models = FinancialMLModels()
+    plans = _per_user(lambda batch: models.batch_savings_plans(batch, savings_target), datasets, results)
+
+    for partition, frame in frames.items():
+        if partition in results:
+            continue
+        try:
+            monthly = IncrementalMonthlySummary.from_transactions(frame).to_frame()
+            spending = DataProcessor.calculate_category_spending(frame) if 'category' in frame.columns else pd.DataFrame()
+            anomalies = scores.get(partition)
+            if anomalies is None:
+                anomalies = pd.DataFrame(columns=['date', 'amount', 'category', 'score', 'severity'])
+            top = anomalies.nlargest(top_anomalies, 'score') if len(anomalies) else anomalies
+            results[partition] = {
+                "monthly_summary": monthly.to_dict(orient='records'),
+                "category_spending": spending.astype({'category': str}).to_dict(orient='records') if len(spending) else [],
+                "anomalies": {
+                    "count": len(anomalies),
+                    "high": int((anomalies['severity'] == 'high').sum()) if len(anomalies) else 0,
+                    "top": [
+                        {
+                            "date": row.date.strftime('%Y-%m-%d'),
+                            "amount": float(row.amount),
+                            "category": row.category,
+                            "score": float(row.score),
+                            "severity": str(row.severity)
+                        }
+                        for row in top.itertuples(index=False)
+                    ]
+                },
+                "savings_plan": plans.get(partition)
+            }
+        except Exception as e:
+            results[partition] = {"error": str(e)}
+
+    return list(results.items())
+
+
+class BatchAnalyticsRunner:
+    """
+    Nightly analytics for every user.
+
+    Users listed in the partition index are sharded across a process pool,
+    balancing shards by transaction count. Workers compute monthly summaries,
+    category spending, anomalies and savings plans of their shard straight
+    from the memory-mapped partition snapshots, and the results are written
+    to a SQLite summary store as they arrive.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS batch_runs (
+            run_id TEXT PRIMARY KEY,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            users INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS user_summaries (
+            partition TEXT NOT NULL,
+            analysis TEXT NOT NULL,
+            run_id TEXT NOT NULL,
+            result TEXT NOT NULL,
+            computed_at REAL NOT NULL,
+            PRIMARY KEY (partition, analysis)
+        );
+    """
+
+    def __init__(self, partitions, db_path=None, workers=None, shards_per_worker=4, savings_target=500.0):
+        """
+        Initialize the runner.
+
+        Args:
+            partitions: TransactionPartitions holding the users' transactions
+            db_path: Summary store path (defaults to BATCH_SUMMARY_DB or ~/.finsecure/batch_summaries.db)
+            workers: Worker processes (defaults to the CPU count; 0 runs in this process)
+            shards_per_worker: Shards per worker, so a slow shard does not hold up the run
+            savings_target: Target monthly savings for the savings plans
+        """
+        self.partitions = partitions
+        self.db_path = db_path or os.getenv(
+            "BATCH_SUMMARY_DB", os.path.join(os.path.expanduser("~"), ".finsecure", "batch_summaries.db")
+        )
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.shards_per_worker = shards_per_worker
+        self.savings_target = savings_target
+        self.logger = logging.getLogger("transactions")
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+    def shard(self, entries, shards):
+        """
+        Split partitions into shards of similar transaction counts.
+
+        Args:
+            entries: Partition index entries (see TransactionPartitions.partitions)
+            shards: Number of shards
+
+        Returns:
+            shards: List of non-empty lists of (partition, directory) tuples
+        """
+        bins = [[] for _ in range(max(shards, 1))]
+        loads = np.zeros(len(bins))
+        # Largest first, each to the least loaded shard
+        for entry in sorted(entries, key=lambda entry: entry["rows"], reverse=True):
+            i = int(loads.argmin())
+            bins[i].append((entry["partition"], entry["directory"]))
+            loads[i] += max(entry["rows"], 1)
+        return [shard for shard in bins if shard]
+
+    def _store(self, run_id, results):
+        """
+        Write a shard's results to the summary store.
+
+        A user's results replace those of earlier runs as a whole. If the
+        user's analytics failed, the earlier results are kept and the error is
+        recorded next to them.
+
+        Args:
+            run_id: Batch run identifier
+            results: List of (partition, results) tuples from analyze_shard
+
+        Returns:
+            errors: Number of users whose analytics failed
+        """
+        now = time.time()
+        rows = []
+        replaced = []
+        errors = 0
+        for partition, analyses in results:
+            if "error" in analyses:
+                errors += 1
+                rows.append((partition, "error", run_id, json.dumps(analyses["error"], default=str), now))
+                continue
+            replaced.append((partition,))
+            for analysis, result in analyses.items():
+                rows.append((partition, analysis, run_id, json.dumps(result, default=str), now))
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM user_summaries WHERE partition = ?", replaced)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO user_summaries (partition, analysis, run_id, result, computed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return errors
+
+    def _retry_each(self, pool, shard, pending):
+        """
+        Resubmit the users of a failed shard one at a time, so only the failing ones are reported.
+
+        Args:
+            pool: Executor running the shards
+            shard: List of (partition, directory) tuples of the failed shard
+            pending: Dict mapping pending futures to their shards, updated in place
+
+        Returns:
+            retried: Whether every user was resubmitted (False if the pool is unusable)
+        """
+        submitted = {}
+        try:
+            for entry in shard:
+                submitted[pool.submit(analyze_shard, [entry], self.savings_target)] = [entry]
+        except Exception:
+            for future in submitted:
+                future.cancel()
+            return False
+        pending.update(submitted)
+        return True
+
+    def run(self, progress=None):
+        """
+        Run the analytics for every indexed user.
+
+        Args:
+            progress: Optional callable(done, total) called with the number of users analyzed as shards complete
+
+        Returns:
+            run: Dict with run_id, users, errors and seconds
+        """
+        started = time.time()
+        run_id = uuid.uuid4().hex
+        report = progress or (lambda done, total: None)
+
+        # Analytics read snapshots and logs, so loaded partitions only need their index entries refreshed
+        self.partitions.release()
+        entries = self.partitions.partitions()
+        shards = self.shard(entries, max(self.workers, 1) * self.shards_per_worker)
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO batch_runs (run_id, started_at) VALUES (?, ?)", (run_id, started))
+
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            pool = ThreadPoolExecutor(max_workers=1)
+
+        users = 0
+        errors = 0
+        with pool:
+            pending = {pool.submit(analyze_shard, shard, self.savings_target): shard for shard in shards}
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    shard = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        error = str(e)
+                        if len(shard) > 1 and self._retry_each(pool, shard, pending):
+                            self.logger.warning(f"Error analyzing a shard of {len(shard)} users, retrying each: {error}")
+                            continue
+                        self.logger.error(f"Error analyzing {len(shard)} users: {error}")
+                        results = [(partition, {"error": error}) for partition, _ in shard]
+                    errors += self._store(run_id, results)
+                    users += len(results)
+                    report(users, len(entries))
+
+        finished = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE batch_runs SET finished_at = ?, users = ?, errors = ? WHERE run_id = ?",
+                (finished, users, errors, run_id)
+            )
+        self.logger.info(f"Batch analytics for {users} users finished in {finished - started:.1f} s ({errors} errors)")
+        return {"run_id": run_id, "users": users, "errors": errors, "seconds": finished - started}
+
+    def summary(self, user_id, analysis=None):
+        """
+        Latest batch results of a user.
+
+        Args:
+            user_id: User identifier
+            analysis: Optional analysis name (monthly_summary, category_spending, anomalies, savings_plan)
+
+        Returns:
+            results: Dict mapping analysis names to results (or one result if analysis is given, None if missing);
+                an "error" entry means the last run failed for the user and the other results are from an earlier run
+        """
+        partition = self.partitions.partition_key(user_id)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT analysis, result FROM user_summaries WHERE partition = ?", (partition,)
+            ).fetchall()
+        results = {row["analysis"]: json.loads(row["result"]) for row in rows}
+        return results.get(analysis) if analysis is not None else results
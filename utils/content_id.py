@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import io
+
+
+class ContentId:
+    """
+    Local computation of IPFS content identifiers.
+
+    Follows the layout IPFS uses for files added as CIDv1: the content is split
+    into 256 KiB chunks stored as raw leaves, and files of more than one chunk
+    are linked by a balanced tree of UnixFS dag-pb nodes with up to 174 links
+    each. A single-chunk file is addressed by its raw leaf. All hashes are
+    sha2-256 and the CID is rendered in base32.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+    MAX_LINKS = 174
+
+    RAW = 0x55
+    DAG_PB = 0x70
+    SHA2_256 = 0x12
+
+    # UnixFS Data.Type for files
+    UNIXFS_FILE = 2
+
+    @staticmethod
+    def _varint(value):
+        out = bytearray()
+        while True:
+            byte = value & 0x7F
+            value >>= 7
+            if value:
+                out.append(byte | 0x80)
+            else:
+                out.append(byte)
+                return bytes(out)
+
+    @classmethod
+    def _field(cls, number, value):
+        """
+        Encode a length-delimited protobuf field.
+
+        Args:
+            number: Field number
+            value: Field bytes
+
+        Returns:
+            encoded: Tag, length and value
+        """
+        return cls._varint(number << 3 | 2) + cls._varint(len(value)) + value
+
+    @classmethod
+    def _cid(cls, codec, content):
+        """
+        Binary CIDv1 of a block.
+
+        Args:
+            codec: Multicodec of the block (RAW or DAG_PB)
+            content: Block bytes
+
+        Returns:
+            cid: CID bytes
+        """
+        digest = hashlib.sha256(content).digest()
+        return cls._varint(1) + cls._varint(codec) + bytes([cls.SHA2_256, len(digest)]) + digest
+
+    @classmethod
+    def _node(cls, children):
+        """
+        Build a UnixFS file node linking to child blocks.
+
+        Args:
+            children: List of (cid, file size, cumulative block size) tuples
+
+        Returns:
+            node: (cid, file size, cumulative block size) of the new node
+        """
+        filesize = sum(child[1] for child in children)
+        unixfs = cls._varint(1 << 3) + cls._varint(cls.UNIXFS_FILE)
+        unixfs += cls._varint(3 << 3) + cls._varint(filesize)
+        for child in children:
+            unixfs += cls._varint(4 << 3) + cls._varint(child[1])
+
+        # dag-pb: links first, then data; each link carries an empty name
+        block = b"".join(
+            cls._field(2, cls._field(1, cid) + cls._field(2, b"") + cls._varint(3 << 3) + cls._varint(tsize))
+            for cid, _, tsize in children
+        )
+        block += cls._field(1, unixfs)
+        return cls._cid(cls.DAG_PB, block), filesize, len(block) + sum(child[2] for child in children)
+
+    @classmethod
+    def compute_stream(cls, readable):
+        """
+        Compute the CID of a file-like object's content.
+
+        Args:
+            readable: Binary file-like object, read in CHUNK_SIZE pieces
+
+        Returns:
+            cid: Base32 CIDv1 string
+        """
+        leaves = []
+        while True:
+            chunk = readable.read(cls.CHUNK_SIZE)
+            if not chunk and leaves:
+                break
+            leaves.append((cls._cid(cls.RAW, chunk), len(chunk), len(chunk)))
+            if len(chunk) < cls.CHUNK_SIZE:
+                break
+
+        level = leaves
+        while len(level) > 1:
+            level = [cls._node(level[i:i + cls.MAX_LINKS]) for i in range(0, len(level), cls.MAX_LINKS)]
+
+        return "b" + base64.b32encode(level[0][0]).decode("ascii").lower().rstrip("=")
+
+    @classmethod
+    def compute(cls, data):
+        """
+        Compute the CID of a byte string.
+
+        Args:
+            data: Content bytes
+
+        Returns:
+            cid: Base32 CIDv1 string
+        """
+        return cls.compute_stream(io.BytesIO(data))
+
+    @classmethod
+    def compute_file(cls, file_path):
+        """
+        Compute the CID of a file.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            cid: Base32 CIDv1 string
+        """
+        with open(file_path, 'rb') as file:
+            return cls.compute_stream(file)
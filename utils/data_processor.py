@@ -9,6 +9,75 @@ class DataProcessor:
     Utility class for processing financial data.
     """
     
+    # Stable category vocabulary. Codes for these categories never change, so
+    # `category_code` values stay comparable across sessions, backups and ML jobs.
+    # Categories outside the vocabulary are appended after it in sorted order.
+    CATEGORY_VOCABULARY = (
+        'Uncategorized',
+        'Income',
+        'Transportation',
+        'Food',
+        'Groceries',
+        'Housing',
+        'Healthcare',
+        'Fitness',
+        'Shopping',
+        'Subscriptions',
+        'Insurance',
+        'Utilities',
+        'Education',
+        'Entertainment',
+        'Transfers',
+        'Travel',
+        'Savings'
+    )
+    
+    @staticmethod
+    def category_dtype(categories=()):
+        """
+        Build the categorical dtype used for the category column.
+        
+        Args:
+            categories: Iterable of category names present in the data
+            
+        Returns:
+            dtype: CategoricalDtype with the stable vocabulary first, followed by
+                any extra categories in sorted order
+        """
+        known = set(DataProcessor.CATEGORY_VOCABULARY)
+        extra = sorted({c for c in categories if isinstance(c, str) and c not in known})
+        return pd.CategoricalDtype(list(DataProcessor.CATEGORY_VOCABULARY) + extra)
+    
+    @staticmethod
+    def optimize_dtypes(df):
+        """
+        Dictionary-encode the category and description columns.
+        
+        Args:
+            df: Pandas DataFrame with transaction data
+            
+        Returns:
+            optimized_df: DataFrame with categorical category and description columns
+        """
+        optimized_df = df.copy()
+        DataProcessor._encode_categoricals(optimized_df)
+        return optimized_df
+    
+    @staticmethod
+    def _encode_categoricals(df):
+        """
+        Encode the category and description columns of a DataFrame in place.
+        
+        Args:
+            df: Pandas DataFrame with transaction data
+        """
+        if 'category' in df.columns:
+            observed = df['category'].dropna().unique()
+            df['category'] = df['category'].astype(DataProcessor.category_dtype(observed))
+        
+        if 'description' in df.columns and not isinstance(df['description'].dtype, pd.CategoricalDtype):
+            df['description'] = df['description'].astype('category')
+    
     @staticmethod
     def clean_transaction_data(df):
         """
@@ -55,6 +124,9 @@ class DataProcessor:
         # Sort by date (newest first)
         cleaned_df = cleaned_df.sort_values('date', ascending=False)
         
+        # Dictionary-encode repeated strings
+        DataProcessor._encode_categoricals(cleaned_df)
+        
         return cleaned_df
     
     @staticmethod
@@ -102,6 +174,10 @@ class DataProcessor:
         if 'category' not in categorized_df.columns:
             categorized_df['category'] = 'Uncategorized'
         
+        # Decode so that categories outside the current dtype can be assigned
+        if isinstance(categorized_df['category'].dtype, pd.CategoricalDtype):
+            categorized_df['category'] = categorized_df['category'].astype(object)
+        
         # Function to determine category based on description
         def get_category(description):
             if pd.isna(description):
@@ -115,9 +191,12 @@ class DataProcessor:
             
             return 'Uncategorized'
         
-        # Only categorize uncategorized transactions
+        # Only categorize uncategorized transactions. On a categorical description
+        # column map() runs once per distinct description rather than once per row.
         mask = categorized_df['category'].isin(['Uncategorized', 'uncategorized', ''])
-        categorized_df.loc[mask, 'category'] = categorized_df.loc[mask, 'description'].apply(get_category)
+        categorized_df.loc[mask, 'category'] = categorized_df.loc[mask, 'description'].map(get_category).astype(object)
+        
+        DataProcessor._encode_categoricals(categorized_df)
         
         return categorized_df
     
@@ -127,11 +206,15 @@ class DataProcessor:
         Calculate monthly income, expenses, and savings.
         
         Args:
-            df: Pandas DataFrame with transaction data
+            df: Pandas DataFrame with transaction data, or a TransactionQuery to push down to
             
         Returns:
             monthly_summary: DataFrame with monthly summary
         """
+        from utils.analytics_store import TransactionQuery
+        if isinstance(df, TransactionQuery):
+            return df.monthly_summary()
+        
         # Ensure date is in datetime format
         df = df.copy()
         if not pd.api.types.is_datetime64_any_dtype(df['date']):
@@ -170,16 +253,20 @@ class DataProcessor:
         Calculate spending by category.
         
         Args:
-            df: Pandas DataFrame with transaction data
+            df: Pandas DataFrame with transaction data, or a TransactionQuery to push down to
             
         Returns:
             category_spending: DataFrame with spending by category
         """
+        from utils.analytics_store import TransactionQuery
+        if isinstance(df, TransactionQuery):
+            return df.category_spending()
+        
         # Filter for expenses only (negative amounts)
         expenses = df[df['amount'] < 0].copy()
         
         # Group by category and sum expenses
-        category_spending = expenses.groupby('category').agg({
+        category_spending = expenses.groupby('category', observed=True).agg({
             'amount': [
                 ('total', lambda x: abs(x.sum())),
                 ('count', 'count'),
@@ -219,13 +306,16 @@ class DataProcessor:
         # Replace descriptions with generic text + hash
         import hashlib
         
-        def anonymize_text(text):
+        def anonymize_text(text, category):
             if pd.isna(text):
                 return "Unknown"
             
             # Create a hash of the original text
             text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
             
+            if not isinstance(category, str):
+                return f"Transaction-{text_hash}"
+            
             # Use category-based generic description
             for cat, text_prefix in {
                 'Income': 'Income',
@@ -244,22 +334,32 @@ class DataProcessor:
                 'Transfers': 'Transfer',
                 'Travel': 'Travel'
             }.items():
-                if cat.lower() in anonymized_df.loc[text == text, 'category'].values[0].lower():
+                if cat.lower() in category.lower():
                     return f"{text_prefix}-{text_hash}"
             
             return f"Transaction-{text_hash}"
         
         # Only anonymize if there are any descriptions to anonymize
         if 'description' in anonymized_df.columns:
-            # This is more efficient than applying to each row
-            unique_desc = anonymized_df['description'].unique()
-            desc_map = {}
+            descriptions = anonymized_df['description']
+            if not isinstance(descriptions.dtype, pd.CategoricalDtype):
+                descriptions = descriptions.astype('category')
             
-            for desc in unique_desc:
-                if isinstance(desc, str):  # Check if description is a string
-                    desc_map[desc] = anonymize_text(desc)
+            # Category of the first transaction carrying each description
+            if 'category' in anonymized_df.columns:
+                first_seen = anonymized_df.drop_duplicates('description')
+                desc_category = dict(zip(first_seen['description'], first_seen['category']))
+            else:
+                desc_category = {}
             
-            anonymized_df['description'] = anonymized_df['description'].map(desc_map).fillna(anonymized_df['description'])
+            # Anonymize the dictionary of distinct descriptions, not every row
+            desc_map = {
+                desc: anonymize_text(desc, desc_category.get(desc))
+                for desc in descriptions.cat.categories
+                if isinstance(desc, str)
+            }
+            
+            anonymized_df['description'] = descriptions.map(desc_map).astype('category')
         
         return anonymized_df
     
@@ -281,13 +381,20 @@ class DataProcessor:
         anon_df['month'] = anon_df['date'].dt.month
         anon_df['day_of_week'] = anon_df['date'].dt.dayofweek
         
-        # Create numeric features from categories
-        from sklearn.preprocessing import LabelEncoder
-        
-        le = LabelEncoder()
+        # Create numeric features from the stable category vocabulary
         if 'category' in anon_df.columns:
-            anon_df['category_code'] = le.fit_transform(anon_df['category'])
-            category_mapping = dict(zip(le.classes_, range(len(le.classes_))))
+            categories = anon_df['category']
+            if not isinstance(categories.dtype, pd.CategoricalDtype):
+                categories = categories.astype(DataProcessor.category_dtype(categories.dropna().unique()))
+            
+            # Missing categories would get the code -1
+            if categories.isna().any():
+                if 'Uncategorized' not in categories.cat.categories:
+                    categories = categories.cat.add_categories(['Uncategorized'])
+                categories = categories.fillna('Uncategorized')
+            
+            anon_df['category_code'] = categories.cat.codes
+            category_mapping = {name: code for code, name in enumerate(categories.cat.categories)}
         else:
             anon_df['category_code'] = 0
             category_mapping = {}
@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+
+class DealTracker:
+    """
+    Background tracker for Filecoin storage deals.
+
+    Tracked CIDs and their latest storage status are kept in a local SQLite
+    database, together with a log of status transitions. A daemon thread polls
+    only the CIDs that are due: a CID whose status did not change is checked
+    again after an exponentially growing interval, and a change resets the
+    interval. Reads never touch the network, so pages and API endpoints can show
+    deal status without blocking on Filecoin, and polling load follows the number
+    of pending deals rather than page views.
+
+    Accounts share the database: every row is keyed by a hash of the API key,
+    and a tracker only reads and polls its own account's CIDs. A CID whose
+    lookups fail is marked "error" until a lookup succeeds, and is retried with
+    the same backoff.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS deals (
+            account TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            status TEXT NOT NULL,
+            active_deals INTEGER NOT NULL DEFAULT 0,
+            total_deals INTEGER NOT NULL DEFAULT 0,
+            details TEXT NOT NULL DEFAULT '[]',
+            created_at REAL NOT NULL,
+            checked_at REAL,
+            next_check_at REAL NOT NULL,
+            check_interval REAL NOT NULL,
+            last_error TEXT,
+            PRIMARY KEY (account, cid)
+        );
+        CREATE INDEX IF NOT EXISTS deals_next_check ON deals (account, next_check_at);
+        CREATE TABLE IF NOT EXISTS deal_transitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            old_status TEXT,
+            new_status TEXT NOT NULL,
+            changed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS deal_transitions_cid ON deal_transitions (account, cid, changed_at);
+    """
+
+    # Trackers shared by every page render / request in this process
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, filecoin_client, db_path=None, min_interval=30, max_interval=6 * 3600,
+                 stored_interval=24 * 3600, backoff=2.0, batch_size=100):
+        """
+        Initialize the tracker.
+
+        Args:
+            filecoin_client: FilecoinClient used for the deal lookups
+            db_path: SQLite database path (defaults to DEAL_TRACKER_DB or ~/.finsecure/deal_tracker.db)
+            min_interval: Seconds before re-checking a CID whose status just changed
+            max_interval: Upper bound of the backoff for pending deals
+            stored_interval: Seconds between checks of CIDs with active deals
+            backoff: Factor applied to the interval when the status is unchanged
+            batch_size: Maximum CIDs looked up per poll
+        """
+        self.filecoin_client = filecoin_client
+        self.db_path = db_path or os.getenv(
+            "DEAL_TRACKER_DB", os.path.join(os.path.expanduser("~"), ".finsecure", "deal_tracker.db")
+        )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stored_interval = stored_interval
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.logger = logging.getLogger("filecoin")
+
+        # Entries of different accounts share the database, keyed by a hash of the API key
+        self.account = hashlib.sha256((filecoin_client.api_key or "").encode("utf-8")).hexdigest()[:16]
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            # WAL lets the Streamlit app and the Flask API read while one of them writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def shared(cls, filecoin_client, db_path=None, **kwargs):
+        """
+        Get the process-wide tracker for a database, started on first use.
+
+        Args:
+            filecoin_client: FilecoinClient used for the deal lookups
+            db_path: SQLite database path
+            **kwargs: Passed to the constructor
+
+        Returns:
+            tracker: Running DealTracker instance
+        """
+        key = (db_path, filecoin_client.api_key)
+        with cls._shared_lock:
+            tracker = cls._shared.get(key)
+            if tracker is None:
+                tracker = cls(filecoin_client, db_path=db_path, **kwargs)
+                tracker.start()
+                cls._shared[key] = tracker
+            return tracker
+
+    def track(self, cid, check_now=False):
+        """
+        Start tracking a CID. Tracking an already tracked CID is a no-op.
+
+        Args:
+            cid: Content identifier of the file
+            check_now: Schedule the CID for the next poll, e.g. after starting a deal
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO deals (account, cid, status, created_at, next_check_at, check_interval) "
+                "VALUES (?, ?, 'unknown', ?, ?, ?)",
+                (self.account, cid, now, now, self.min_interval)
+            )
+            if check_now:
+                self._conn.execute(
+                    "UPDATE deals SET next_check_at = ?, check_interval = ? WHERE account = ? AND cid = ?",
+                    (now, self.min_interval, self.account, cid)
+                )
+        self._wakeup.set()
+
+    def track_many(self, cids):
+        """
+        Start tracking many CIDs at once.
+
+        Args:
+            cids: Iterable of content identifiers
+        """
+        now = time.time()
+        rows = [(self.account, cid, now, now, self.min_interval) for cid in dict.fromkeys(cids) if cid]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO deals (account, cid, status, created_at, next_check_at, check_interval) "
+                "VALUES (?, ?, 'unknown', ?, ?, ?)",
+                rows
+            )
+        self._wakeup.set()
+
+    @staticmethod
+    def _row_to_status(row):
+        return {
+            "cid": row["cid"],
+            "status": row["status"],
+            "active_deals": row["active_deals"],
+            "total_deals": row["total_deals"],
+            "details": json.loads(row["details"]),
+            "checked_at": row["checked_at"],
+            "next_check_at": row["next_check_at"],
+            "last_error": row["last_error"]
+        }
+
+    def status(self, cid):
+        """
+        Latest known storage status of a CID, without any network call.
+
+        Args:
+            cid: Content identifier of the file
+
+        Returns:
+            status: Status dictionary ("unknown" until the first check, "error" while
+                lookups fail), or None if untracked
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM deals WHERE account = ? AND cid = ?", (self.account, cid)
+            ).fetchone()
+        return self._row_to_status(row) if row is not None else None
+
+    def statuses(self, cids=None):
+        """
+        Latest known storage status of many CIDs, without any network call.
+
+        Args:
+            cids: Iterable of content identifiers, or None for every CID tracked for the account
+
+        Returns:
+            statuses: Dict mapping each tracked CID to its status dictionary
+        """
+        with self._lock:
+            if cids is None:
+                rows = self._conn.execute("SELECT * FROM deals WHERE account = ?", (self.account,)).fetchall()
+            else:
+                cids = list(dict.fromkeys(cids))
+                rows = []
+                # Stay below SQLite's bound parameter limit
+                for start in range(0, len(cids), 500):
+                    chunk = cids[start:start + 500]
+                    rows.extend(self._conn.execute(
+                        f"SELECT * FROM deals WHERE account = ? AND cid IN ({','.join('?' * len(chunk))})",
+                        [self.account] + chunk
+                    ).fetchall())
+        return {row["cid"]: self._row_to_status(row) for row in rows}
+
+    def transitions(self, cid):
+        """
+        Status transitions recorded for a CID, oldest first.
+
+        Args:
+            cid: Content identifier of the file
+
+        Returns:
+            transitions: List of dicts with old_status, new_status and changed_at
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT old_status, new_status, changed_at FROM deal_transitions "
+                "WHERE account = ? AND cid = ? ORDER BY changed_at, id",
+                (self.account, cid)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_count(self):
+        """
+        Number of tracked CIDs without an active deal.
+
+        Returns:
+            count: Pending CID count
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM deals WHERE account = ? AND status != 'stored'", (self.account,)
+            ).fetchone()[0]
+
+    def poll_once(self, now=None):
+        """
+        Check every CID that is due and record the results.
+
+        Args:
+            now: Current time (defaults to time.time())
+
+        Returns:
+            checked: Number of CIDs checked
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = self._conn.execute(
+                "SELECT cid, status, check_interval FROM deals WHERE account = ? AND next_check_at <= ? "
+                "ORDER BY next_check_at LIMIT ?",
+                (self.account, now, self.batch_size)
+            ).fetchall()
+        if not due:
+            return 0
+
+        # Force fresh lookups; the client's short TTL cache would hide changes
+        for row in due:
+            self.filecoin_client.invalidate_status(row["cid"])
+        results = self.filecoin_client.get_storage_status_many(row["cid"] for row in due)
+
+        with self._lock, self._conn:
+            for row in due:
+                cid, old_status = row["cid"], row["status"]
+                result = results[cid]
+                interval = min(row["check_interval"] * self.backoff, self.max_interval)
+
+                if result.get("status") == "error":
+                    # Keep the last known status; a CID never looked up successfully is
+                    # marked as failing. Either way it is retried with backoff.
+                    status = "error" if old_status == "unknown" else old_status
+                    self._conn.execute(
+                        "UPDATE deals SET status = ?, last_error = ?, checked_at = ?, next_check_at = ?, "
+                        "check_interval = ? WHERE account = ? AND cid = ?",
+                        (status, result.get("message") or "Lookup failed", now, now + interval, interval,
+                         self.account, cid)
+                    )
+                    continue
+
+                new_status = result["status"]
+                if new_status != old_status:
+                    self._conn.execute(
+                        "INSERT INTO deal_transitions (account, cid, old_status, new_status, changed_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (self.account, cid, old_status, new_status, now)
+                    )
+                    interval = self.min_interval
+                if new_status == "stored":
+                    interval = self.stored_interval
+
+                self._conn.execute(
+                    "UPDATE deals SET status = ?, active_deals = ?, total_deals = ?, details = ?, last_error = NULL, "
+                    "checked_at = ?, next_check_at = ?, check_interval = ? WHERE account = ? AND cid = ?",
+                    (new_status, result.get("active_deals", 0), result.get("total_deals", 0),
+                     json.dumps(result.get("details", [])), now, now + interval, interval, self.account, cid)
+                )
+
+        return len(due)
+
+    def _next_due_in(self):
+        """
+        Seconds until the next CID is due.
+
+        Returns:
+            delay: Seconds to sleep (None if nothing is tracked)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_check_at) FROM deals WHERE account = ?", (self.account,)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.poll_once() >= self.batch_size:
+                    # More CIDs are due; keep going
+                    continue
+            except Exception as e:
+                self.logger.error(f"Error polling Filecoin deals: {str(e)}")
+
+            delay = self._next_due_in()
+            self._wakeup.wait(timeout=self.max_interval if delay is None else min(max(delay, 1), self.max_interval))
+            self._wakeup.clear()
+
+    def start(self):
+        """
+        Start the background polling thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="filecoin-deal-tracker")
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the background polling thread.
+
+        Args:
+            timeout: Optional maximum number of seconds to wait for it
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -1,8 +1,13 @@
 import os
-import requests
 import json
+import time
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from utils.lazy_import import lazy_import
+
+requests = lazy_import("requests")
 
 class FilecoinClient:
     """
@@ -11,16 +16,26 @@ class FilecoinClient:
     This client integrates with Lighthouse's Filecoin storage capabilities.
     """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_concurrency=16, status_ttl=60):
         """
         Initialize the Filecoin client.
         
         Args:
             api_key: Lighthouse API key for Filecoin integration
+            max_concurrency: Maximum deal lookups in flight at once
+            status_ttl: Seconds a fetched storage status is reused
         """
         self.api_key = api_key or os.getenv("LIGHTHOUSE_API_KEY", "")
         self.base_url = "https://api.lighthouse.storage"
         self.logger = logging.getLogger("filecoin")
+        
+        # Storage status lookups: bounded pool, TTL cache and in-flight requests
+        self.max_concurrency = max_concurrency
+        self.status_ttl = status_ttl
+        self._pool = None
+        self._status_cache = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
     
     def store_on_filecoin(self, cid):
         """
@@ -49,6 +64,7 @@ class FilecoinClient:
             result = response.json()
             
             self.logger.info(f"Successfully started Filecoin storage process for CID: {cid}")
+            self.invalidate_status(cid)
             return result.get('data', {}).get('jobId')
                 
         except requests.exceptions.RequestException as e:
@@ -97,8 +113,106 @@ class FilecoinClient:
         Returns:
             status: Storage status information
         """
-        deals = self.get_filecoin_deals(cid)
+        return self._lookup_many([cid])[cid].result()
+    
+    def get_storage_status_many(self, cids):
+        """
+        Get the storage status of many files on Filecoin concurrently.
+        
+        Duplicate CIDs are looked up once, lookups already in flight (from
+        this or another caller) are shared, and statuses fetched within the
+        last `status_ttl` seconds are served from cache. At most
+        `max_concurrency` requests run at once, so listing many files costs
+        about one round trip per `max_concurrency` CIDs.
+        
+        Args:
+            cids: Iterable of content identifiers
+            
+        Returns:
+            statuses: Dict mapping each CID to its storage status information,
+                or to {"status": "error", "message": ...} if the lookup failed
+        """
+        statuses = {}
+        for cid, future in self._lookup_many(cids).items():
+            try:
+                statuses[cid] = future.result()
+            except Exception as e:
+                statuses[cid] = {"status": "error", "message": str(e)}
+        return statuses
+    
+    def invalidate_status(self, cid=None):
+        """
+        Drop cached storage statuses, e.g. after starting a new storage deal.
+        
+        Args:
+            cid: CID to drop, or None to clear the whole cache
+        """
+        with self._lock:
+            if cid is None:
+                self._status_cache.clear()
+            else:
+                self._status_cache.pop(cid, None)
+    
+    def _lookup_many(self, cids):
+        """
+        Start (or join) storage status lookups.
+        
+        Args:
+            cids: Iterable of content identifiers
+            
+        Returns:
+            futures: Dict mapping each distinct CID to a Future of its status
+        """
+        futures = {}
+        now = time.monotonic()
+        
+        with self._lock:
+            for cid in dict.fromkeys(cids):
+                cached = self._status_cache.get(cid)
+                if cached is not None and cached[0] > now:
+                    future = Future()
+                    future.set_result(cached[1])
+                elif cid in self._inflight:
+                    future = self._inflight[cid]
+                else:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="filecoin")
+                    future = self._pool.submit(self._fetch_storage_status, cid)
+                    self._inflight[cid] = future
+                futures[cid] = future
+        
+        return futures
+    
+    def _fetch_storage_status(self, cid):
+        """
+        Fetch the storage status of one CID and cache it.
+        
+        Args:
+            cid: Content identifier of the file
+            
+        Returns:
+            status: Storage status information
+        """
+        try:
+            status = self._status_from_deals(self.get_filecoin_deals(cid))
+            with self._lock:
+                self._status_cache[cid] = (time.monotonic() + self.status_ttl, status)
+            return status
+        finally:
+            with self._lock:
+                self._inflight.pop(cid, None)
+    
+    @staticmethod
+    def _status_from_deals(deals):
+        """
+        Summarize the storage deals of a CID.
         
+        Args:
+            deals: List of Filecoin storage deals
+            
+        Returns:
+            status: Storage status information
+        """
         if not deals:
             return {"status": "not_stored", "message": "No Filecoin storage deals found for this CID"}
         
@@ -0,0 +1,411 @@
+from statistics import NormalDist
+
+import numpy as np
+
+
+class LocalForecaster:
+    """
+    Local spending forecaster based on additive Holt-Winters exponential smoothing
+    with a damped trend and weekly seasonality.
+
+    Transactions are resampled to daily expense totals and smoothing parameters are
+    chosen per series from a small grid by one-step-ahead squared error. The grid
+    search runs as a single NumPy recursion over every (series, parameters) lane,
+    so fitting many users or categories at once costs little more than fitting one.
+
+    Fitted state is cached per key. When new days arrive, update() rolls the cached
+    state forward over the new days only, and re-optimizes the parameters every
+    `refit_every` days.
+    """
+
+    SEASON_LENGTH = 7
+
+    def __init__(self, alphas=(0.05, 0.1, 0.2, 0.3, 0.5), betas=(0.0, 0.01, 0.05),
+                 gammas=(0.05, 0.1, 0.3), damping=0.98, refit_every=28):
+        """
+        Initialize the forecaster.
+
+        Args:
+            alphas: Candidate level smoothing parameters
+            betas: Candidate trend smoothing parameters
+            gammas: Candidate seasonal smoothing parameters
+            damping: Trend damping factor (1.0 for an undamped trend)
+            refit_every: Days of incremental updates before parameters are re-optimized
+        """
+        grid = np.array([(a, b, g) for a in alphas for b in betas for g in gammas], dtype=float)
+        self.alphas, self.betas, self.gammas = grid.T
+        self.damping = damping
+        self.refit_every = refit_every
+        self._states = {}
+
+    @staticmethod
+    def daily_expenses(amounts, dates):
+        """
+        Resample transactions to a contiguous series of daily expense totals.
+
+        Args:
+            amounts: Sequence of transaction amounts (negative for expenses)
+            dates: Sequence of 'YYYY-MM-DD' strings, in any order
+
+        Returns:
+            start: First day of the series as numpy datetime64[D]
+            values: Array of daily expense totals (positive, zero on days without spending)
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        days = np.asarray(dates, dtype='datetime64[D]')
+        if days.size == 0:
+            return None, np.zeros(0)
+
+        start = days.min()
+        offsets = (days - start).astype(np.int64)
+        expenses = np.where(amounts < 0, -amounts, 0.0)
+        return start, np.bincount(offsets, weights=expenses, minlength=offsets.max() + 1)
+
+    def fit(self, key, amounts, dates):
+        """
+        Fit a single series and cache its state.
+
+        Args:
+            key: Cache key for the series (user, category, ...)
+            amounts: Sequence of transaction amounts
+            dates: Sequence of 'YYYY-MM-DD' strings
+
+        Returns:
+            state: Fitted state dictionary
+        """
+        return self.fit_many({key: (amounts, dates)})[key]
+
+    def fit_many(self, series):
+        """
+        Fit many series in one vectorized pass and cache their states.
+
+        Args:
+            series: Dict mapping a key to an (amounts, dates) pair
+
+        Returns:
+            states: Dict mapping each key to its fitted state (None if the series is empty)
+        """
+        keys, starts, values = [], [], []
+        states = {}
+        for key, (amounts, dates) in series.items():
+            start, daily = self.daily_expenses(amounts, dates)
+            if start is None:
+                states[key] = None
+                self._states.pop(key, None)
+                continue
+            keys.append(key)
+            starts.append(start)
+            values.append(daily)
+
+        if not keys:
+            return states
+
+        fitted = self._fit_arrays(starts, values)
+        for key, state in zip(keys, fitted):
+            self._states[key] = state
+            states[key] = state
+        return states
+
+    def update(self, key, amounts, dates):
+        """
+        Bring the cached state for a series up to date with its transactions.
+
+        Only days after the cached state's last day are processed. A full fit is
+        run instead if nothing is cached, if earlier days changed, or if the
+        parameters are due for re-optimization.
+
+        Args:
+            key: Cache key for the series
+            amounts: Sequence of transaction amounts (full history)
+            dates: Sequence of 'YYYY-MM-DD' strings (full history)
+
+        Returns:
+            state: Up-to-date state dictionary (None if the series is empty)
+        """
+        state = self._states.get(key)
+        start, daily = self.daily_expenses(amounts, dates)
+        if state is None or start is None:
+            return self.fit(key, amounts, dates)
+
+        n_days = state['n_days']
+        same_history = (
+            start == np.datetime64(state['start'], 'D')
+            and daily.size >= n_days
+            and np.isclose(daily[:n_days].sum(), state['total'])
+        )
+        if not same_history or daily.size - state['fitted_days'] >= self.refit_every:
+            return self.fit(key, amounts, dates)
+
+        if daily.size > n_days:
+            self._roll_forward(state, daily[n_days:])
+        return state
+
+    def forecast(self, key, periods, interval=0.95):
+        """
+        Forecast daily spending for a fitted series.
+
+        Args:
+            key: Cache key of a fitted series
+            periods: Number of days to forecast
+            interval: Coverage of the prediction interval
+
+        Returns:
+            prediction: Dictionary with forecast dates, values (negative amounts),
+                prediction interval and metadata
+        """
+        state = self._states.get(key)
+        if state is None:
+            return {"error": "Insufficient data for forecast"}
+
+        m = self.SEASON_LENGTH
+        alpha, beta, gamma, phi = state['alpha'], state['beta'], state['gamma'], self.damping
+        horizon = np.arange(1, periods + 1)
+
+        # Point forecast: level + damped trend + seasonal index of the target weekday
+        damped = np.cumsum(phi ** horizon)
+        last_day = np.datetime64(state['last_date'], 'D')
+        forecast_days = last_day + horizon
+        weekdays = (forecast_days.astype(np.int64) + 3) % m  # 1970-01-01 was a Thursday
+        season = np.asarray(state['season'])
+        point = state['level'] + damped * state['trend'] + season[weekdays]
+
+        # Prediction interval from the one-step residual variance
+        coefficients = alpha * (1 + horizon[:-1] * beta) + gamma * (horizon[:-1] % m == 0)
+        variance = state['sigma'] ** 2 * (1 + np.concatenate(([0.0], np.cumsum(coefficients ** 2))))
+        z = NormalDist().inv_cdf(0.5 + interval / 2)
+        spread = z * np.sqrt(variance)
+
+        # Spending cannot be negative
+        spend = np.maximum(point, 0.0)
+        spend_low = np.maximum(point - spread, 0.0)
+        spend_high = np.maximum(point + spread, 0.0)
+
+        return {
+            "forecast": {
+                "dates": np.datetime_as_string(forecast_days, unit='D').tolist(),
+                "values": (0.0 - spend).tolist(),
+                "interval": {
+                    "level": interval,
+                    "lower": (0.0 - spend_high).tolist(),
+                    "upper": (0.0 - spend_low).tolist()
+                }
+            },
+            "metadata": {
+                "model": "holt_winters_local",
+                "confidence": state['skill'],
+                "baseline": state['baseline'],
+                "parameters": {"alpha": alpha, "beta": beta, "gamma": gamma, "damping": phi},
+                "residual_std": state['sigma']
+            }
+        }
+
+    def _fit_arrays(self, starts, values):
+        """
+        Grid-search smoothing parameters for many daily series at once.
+
+        Args:
+            starts: List of series start days (datetime64[D])
+            values: List of daily expense arrays
+
+        Returns:
+            states: List of fitted state dictionaries, one per series
+        """
+        m = self.SEASON_LENGTH
+        n_series = len(values)
+        n_params = self.alphas.size
+        lengths = np.array([v.size for v in values])
+        n_steps = lengths.max()
+
+        # Right-align the series so they all end on the last step; padding is NaN
+        y = np.full((n_series, n_steps), np.nan)
+        for i, v in enumerate(values):
+            y[i, n_steps - v.size:] = v
+        offset = n_steps - lengths
+
+        # Initial level, trend and weekday-indexed seasonal components per series
+        level0 = np.empty(n_series)
+        trend0 = np.zeros(n_series)
+        season0 = np.zeros((n_series, m))
+        first_weekday = np.empty(n_series, dtype=np.int64)
+        for i, v in enumerate(values):
+            first_weekday[i] = (starts[i].astype(np.int64) + 3) % m
+            first_week = v[:m]
+            level0[i] = first_week.mean()
+            if v.size >= 2 * m:
+                trend0[i] = (v[m:2 * m].mean() - first_week.mean()) / m
+                weekdays = (first_weekday[i] + np.arange(m)) % m
+                season0[i, weekdays] = first_week - level0[i]
+
+        # One lane per (series, parameter set)
+        lanes = n_series * n_params
+        series_index = np.repeat(np.arange(n_series), n_params)
+        alpha = np.tile(self.alphas, n_series)
+        beta = np.tile(self.betas, n_series)
+        # Seasonality needs at least two full weeks of history
+        gamma = np.tile(self.gammas, n_series) * (lengths[series_index] >= 2 * m)
+
+        level = level0[series_index]
+        trend = trend0[series_index]
+        season = season0[series_index].copy()
+        weekday0 = first_weekday[series_index] - offset[series_index]
+        lane_offset = offset[series_index]
+
+        sse, n_errors, sst, total = self._recurse(
+            y[series_index], level, trend, season, alpha, beta, gamma, weekday0, lane_offset
+        )
+
+        best = np.argmin(sse.reshape(n_series, n_params), axis=1)
+        chosen = np.arange(n_series) * n_params + best
+
+        states = []
+        for i, lane in enumerate(chosen):
+            v = values[i]
+            states.append(self._make_state(
+                start=starts[i],
+                n_days=v.size,
+                total=float(v.sum()),
+                level=level[lane],
+                trend=trend[lane],
+                season=season[lane],
+                alpha=alpha[lane],
+                beta=beta[lane],
+                gamma=gamma[lane],
+                sse=sse[lane],
+                sst=sst[lane],
+                n_errors=n_errors[lane],
+                recent=v[-m:]
+            ))
+        return states
+
+    def _recurse(self, y, level, trend, season, alpha, beta, gamma, weekday0, offset):
+        """
+        Run the Holt-Winters recursion over every lane, updating state in place.
+
+        Args:
+            y: Array of shape (lanes, steps) with daily values (NaN for padding)
+            level, trend: Arrays of shape (lanes,)
+            season: Array of shape (lanes, 7) indexed by weekday
+            alpha, beta, gamma: Smoothing parameters per lane
+            weekday0: Weekday of step 0 per lane
+            offset: First valid step per lane
+
+        Returns:
+            sse: One-step squared error per lane (after the first week)
+            n_errors: Number of errors accumulated per lane
+            sst: Squared deviation from the running mean per lane (for skill)
+            total: Sum of observed values per lane
+        """
+        m = self.SEASON_LENGTH
+        phi = self.damping
+        lanes, steps = y.shape
+        rows = np.arange(lanes)
+
+        sse = np.zeros(lanes)
+        sst = np.zeros(lanes)
+        total = np.zeros(lanes)
+        n_errors = np.zeros(lanes)
+        n_seen = np.zeros(lanes)
+
+        for t in range(steps):
+            observed = y[:, t]
+            valid = (t >= offset) & ~np.isnan(observed)
+            if not valid.any():
+                continue
+            value = np.where(valid, observed, 0.0)
+
+            weekday = (weekday0 + t) % m
+            previous_season = season[rows, weekday]
+            damped_trend = phi * trend
+            error = value - (level + damped_trend + previous_season)
+
+            # Errors during the first week only reflect initialization
+            scored = valid & (t - offset >= m)
+            sse += np.where(scored, error ** 2, 0.0)
+            mean_so_far = np.where(n_seen > 0, total / np.maximum(n_seen, 1), value)
+            sst += np.where(scored, (value - mean_so_far) ** 2, 0.0)
+            n_errors += scored
+            total += value
+            n_seen += valid
+
+            new_level = alpha * (value - previous_season) + (1 - alpha) * (level + damped_trend)
+            new_trend = beta * (new_level - level) + (1 - beta) * damped_trend
+            new_season = gamma * (value - level - damped_trend) + (1 - gamma) * previous_season
+
+            level[:] = np.where(valid, new_level, level)
+            trend[:] = np.where(valid, new_trend, trend)
+            season[rows, weekday] = np.where(valid, new_season, previous_season)
+
+        return sse, n_errors, sst, total
+
+    def _roll_forward(self, state, new_values):
+        """
+        Advance a cached state over newly arrived days with fixed parameters.
+
+        Args:
+            state: Cached state dictionary (updated in place)
+            new_values: Daily expense totals for the days after state['last_date']
+        """
+        m = self.SEASON_LENGTH
+        level = np.array([state['level']])
+        trend = np.array([state['trend']])
+        season = np.array([state['season']], dtype=float)
+        first_day = np.datetime64(state['last_date'], 'D') + 1
+        weekday0 = np.array([(first_day.astype(np.int64) + 3) % m])
+
+        sse, n_errors, sst, _ = self._recurse(
+            new_values[None, :].astype(float), level, trend, season,
+            np.array([state['alpha']]), np.array([state['beta']]), np.array([state['gamma']]),
+            weekday0, np.array([-m])  # every new day is past the initialization week
+        )
+
+        recent = np.concatenate((state['recent'], new_values))[-m:]
+        updated = self._make_state(
+            start=np.datetime64(state['start'], 'D'),
+            n_days=state['n_days'] + new_values.size,
+            total=state['total'] + float(new_values.sum()),
+            level=level[0],
+            trend=trend[0],
+            season=season[0],
+            alpha=state['alpha'],
+            beta=state['beta'],
+            gamma=state['gamma'],
+            sse=state['sse'] + sse[0],
+            sst=state['sst'] + sst[0],
+            n_errors=state['n_errors'] + n_errors[0],
+            recent=recent,
+            fitted_days=state['fitted_days']
+        )
+        state.update(updated)
+
+    @staticmethod
+    def _make_state(start, n_days, total, level, trend, season, alpha, beta, gamma,
+                    sse, sst, n_errors, recent, fitted_days=None):
+        """
+        Build a JSON-serializable state dictionary.
+
+        Returns:
+            state: Fitted state dictionary
+        """
+        last_date = start + (n_days - 1)
+        sigma = float(np.sqrt(sse / n_errors)) if n_errors else float(np.std(recent))
+        skill = float(np.clip(1 - sse / sst, 0.0, 1.0)) if sst > 0 else 0.0
+        return {
+            'start': str(start),
+            'last_date': str(last_date),
+            'n_days': int(n_days),
+            'fitted_days': int(n_days if fitted_days is None else fitted_days),
+            'total': float(total),
+            'level': float(level),
+            'trend': float(trend),
+            'season': [float(s) for s in season],
+            'alpha': float(alpha),
+            'beta': float(beta),
+            'gamma': float(gamma),
+            'sse': float(sse),
+            'sst': float(sst),
+            'n_errors': int(n_errors),
+            'sigma': sigma,
+            'skill': round(skill, 3),
+            'baseline': float(np.mean(recent)),
+            'recent': [float(r) for r in recent]
+        }
@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class ContentChunker:
+    """
+    Content-defined chunking with a gear rolling hash.
+
+    A cut point is placed where the hash of the preceding 32 bytes matches a
+    mask, so boundaries move with the content instead of with byte offsets:
+    inserting or editing a few rows only changes the chunks around the edit.
+    Cut points are snapped to the next line break so every chunk holds whole
+    lines, and chunk sizes are kept between min_size and max_size.
+    """
+
+    WINDOW = 32
+
+    def __init__(self, min_size=16 * 1024, avg_size=64 * 1024, max_size=256 * 1024, delimiter=b"\n", seed=0x5EED):
+        """
+        Initialize the chunker.
+
+        Args:
+            min_size: Minimum chunk size in bytes
+            avg_size: Target average chunk size in bytes (rounded to a power of two)
+            max_size: Maximum chunk size in bytes
+            delimiter: Byte cut points are snapped to (None to cut anywhere)
+            seed: Seed of the gear table; chunkers only deduplicate against the same seed
+        """
+        if not 0 < min_size <= avg_size <= max_size:
+            raise ValueError("Chunk sizes must satisfy 0 < min_size <= avg_size <= max_size")
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.delimiter = delimiter
+        self.gear = np.random.default_rng(seed).integers(0, 2 ** 32, 256, dtype=np.uint64).astype(np.uint32)
+
+        # Test the top bits, which depend on the whole window
+        bits = max(int(round(np.log2(avg_size))), 1)
+        self.mask = np.uint32(((1 << bits) - 1) << (32 - bits))
+
+    def _candidates(self, data):
+        """
+        Positions where the rolling hash hits the mask.
+
+        Args:
+            data: Bytes to chunk
+
+        Returns:
+            positions: Sorted array of offsets just past each hit
+        """
+        values = self.gear[np.frombuffer(data, dtype=np.uint8)]
+        rolling = values.copy()
+        # h_i = sum over the window of gear[b_(i-k)] << k, one shifted pass per window byte
+        for k in range(1, self.WINDOW):
+            rolling[k:] += values[:-k] << np.uint32(k)
+        return np.flatnonzero((rolling & self.mask) == 0) + 1
+
+    def boundaries(self, data):
+        """
+        Chunk end offsets for a byte string.
+
+        Args:
+            data: Bytes to chunk
+
+        Returns:
+            ends: List of chunk end offsets (the last one is len(data))
+        """
+        size = len(data)
+        if size == 0:
+            return []
+
+        candidates = self._candidates(data)
+        if self.delimiter is not None:
+            delimiters = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == self.delimiter[0]) + 1
+
+        ends = []
+        start = 0
+        while size - start > self.min_size:
+            i = np.searchsorted(candidates, start + self.min_size)
+            end = int(candidates[i]) if i < len(candidates) else size
+            if self.delimiter is not None:
+                # Snap to the next line break, or the last one before max_size
+                j = np.searchsorted(delimiters, end)
+                if j < len(delimiters) and delimiters[j] - start <= self.max_size:
+                    end = int(delimiters[j])
+                else:
+                    j = np.searchsorted(delimiters, start + self.max_size, side="right") - 1
+                    end = int(delimiters[j]) if j >= 0 and delimiters[j] > start else start + self.max_size
+            end = min(end, start + self.max_size, size)
+            ends.append(end)
+            start = end
+
+        if start < size:
+            ends.append(size)
+        return ends
+
+    def chunks(self, data):
+        """
+        Split a byte string into content-defined chunks.
+
+        Args:
+            data: Bytes to chunk
+
+        Returns:
+            chunks: List of memoryviews over data
+        """
+        view = memoryview(data)
+        chunks = []
+        start = 0
+        for end in self.boundaries(data):
+            chunks.append(view[start:end])
+            start = end
+        return chunks
+
+
+class IncrementalBackup:
+    """
+    Deduplicated incremental backups on Lighthouse.
+
+    The serialized history is split into content-defined chunks, and only chunks
+    whose SHA-256 digest has not been uploaded before are sent. A small JSON
+    manifest listing every chunk's CID and digest is uploaded last; its CID
+    identifies the backup. Backup bytes therefore scale with how much of the
+    history changed, not with its size.
+    """
+
+    MANIFEST_FORMAT = "finsecure-backup-manifest"
+    MANIFEST_VERSION = 1
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS backup_chunks (
+            account TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            uploaded_at REAL NOT NULL,
+            PRIMARY KEY (account, digest)
+        );
+    """
+
+    def __init__(self, lighthouse_client, db_path=None, chunker=None, max_workers=4):
+        """
+        Initialize the backup engine.
+
+        Args:
+            lighthouse_client: LighthouseClient used for uploads and downloads
+            db_path: SQLite database of uploaded chunks (defaults to BACKUP_INDEX_DB or ~/.finsecure/backup_chunks.db)
+            chunker: Optional ContentChunker
+            max_workers: Maximum concurrent chunk uploads/downloads
+        """
+        self.client = lighthouse_client
+        self.db_path = db_path or os.getenv(
+            "BACKUP_INDEX_DB", os.path.join(os.path.expanduser("~"), ".finsecure", "backup_chunks.db")
+        )
+        self.chunker = chunker or ContentChunker()
+        self.max_workers = max_workers
+        self.logger = logging.getLogger("lighthouse")
+
+        # Chunks of different accounts share the database, keyed by a hash of the API key
+        self.account = hashlib.sha256((lighthouse_client.api_key or "").encode("utf-8")).hexdigest()[:16]
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+    def _known_chunks(self, digests):
+        """
+        Look up chunks that were already uploaded.
+
+        Args:
+            digests: List of chunk digests
+
+        Returns:
+            known: Dict mapping digest to CID
+        """
+        known = {}
+        with self._lock:
+            for start in range(0, len(digests), 500):
+                chunk = digests[start:start + 500]
+                known.update(self._conn.execute(
+                    f"SELECT digest, cid FROM backup_chunks WHERE account = ? AND digest IN ({','.join('?' * len(chunk))})",
+                    [self.account] + chunk
+                ).fetchall())
+        return known
+
+    def backup(self, content, name="backup", metadata=None):
+        """
+        Back up a byte string, uploading only new chunks.
+
+        Args:
+            content: Serialized history (e.g. CSV bytes)
+            name: Base name of the uploaded files
+            metadata: Optional JSON-serializable dict stored in the manifest
+
+        Returns:
+            result: Dict with the manifest cid, chunk counts and uploaded/total bytes
+        """
+        chunks = self.chunker.chunks(content)
+        digests = [hashlib.sha256(chunk).hexdigest() for chunk in chunks]
+        known = self._known_chunks(list(set(digests)))
+
+        # Upload each new chunk once, even if it repeats within this backup
+        pending = {}
+        for digest, chunk in zip(digests, chunks):
+            if digest not in known and digest not in pending:
+                pending[digest] = chunk
+
+        def upload(item):
+            digest, chunk = item
+            return digest, self.client.upload_bytes(bytes(chunk), f"{name}.chunk-{digest[:16]}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            uploaded = dict(pool.map(upload, pending.items()))
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO backup_chunks (account, digest, cid, size, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+                [(self.account, digest, cid, len(pending[digest]), now) for digest, cid in uploaded.items()]
+            )
+        known.update(uploaded)
+
+        manifest = {
+            "format": self.MANIFEST_FORMAT,
+            "version": self.MANIFEST_VERSION,
+            "name": name,
+            "created_at": now,
+            "size": len(content),
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "metadata": metadata or {},
+            "chunks": [
+                {"cid": known[digest], "sha256": digest, "size": len(chunk)}
+                for digest, chunk in zip(digests, chunks)
+            ]
+        }
+        manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        manifest_cid = self.client.upload_bytes(manifest_bytes, f"{name}.manifest.json")
+
+        uploaded_bytes = sum(len(pending[digest]) for digest in uploaded)
+        self.logger.info(
+            f"Backup {manifest_cid}: uploaded {len(uploaded)} of {len(chunks)} chunks "
+            f"({uploaded_bytes} of {len(content)} bytes)"
+        )
+        return {
+            "cid": manifest_cid,
+            "chunks": len(chunks),
+            "new_chunks": len(uploaded),
+            "uploaded_bytes": uploaded_bytes + len(manifest_bytes),
+            "total_bytes": len(content)
+        }
+
+    @classmethod
+    def parse_manifest(cls, content):
+        """
+        Parse downloaded content as a backup manifest.
+
+        Args:
+            content: Downloaded bytes
+
+        Returns:
+            manifest: Manifest dict, or None if the content is not a manifest
+        """
+        if content[:1] != b"{":
+            return None
+        try:
+            manifest = json.loads(content)
+        except ValueError:
+            return None
+        if not isinstance(manifest, dict) or manifest.get("format") != cls.MANIFEST_FORMAT:
+            return None
+        if manifest.get("version") != cls.MANIFEST_VERSION:
+            raise ValueError(f"Unsupported backup manifest version: {manifest.get('version')}")
+        return manifest
+
+    def fetch_chunk(self, chunk):
+        """
+        Download and verify one chunk listed in a manifest.
+
+        Args:
+            chunk: Manifest chunk entry
+
+        Returns:
+            content: Chunk bytes
+        """
+        content = self.client.download_file(chunk["cid"])
+        if hashlib.sha256(content).hexdigest() != chunk["sha256"]:
+            raise ValueError(f"Backup chunk {chunk['cid']} is corrupted")
+        return content
+
+    def restore(self, cid):
+        """
+        Restore a backup.
+
+        Args:
+            cid: Manifest CID, or the CID of a single-file backup
+
+        Returns:
+            content: Backed up bytes
+        """
+        content = self.client.download_file(cid)
+        manifest = self.parse_manifest(content)
+        if manifest is None:
+            # Backups made before incremental backups are a single file
+            return content
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            content = b"".join(pool.map(self.fetch_chunk, manifest["chunks"]))
+
+        if hashlib.sha256(content).hexdigest() != manifest["sha256"]:
+            raise ValueError(f"Backup {cid} does not match its manifest")
+        return content
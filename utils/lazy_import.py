@@ -0,0 +1,58 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module proxy that defers the real import until first attribute access.
+
+    Heavy dependencies (plotly, requests, ...) can be bound at module top
+    without paying their import cost until a code path actually uses them.
+    """
+
+    def __init__(self, name):
+        """
+        Initialize the lazy module proxy.
+
+        Args:
+            name: Fully qualified name of the module to import on first use
+        """
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        """
+        Import the real module and copy its namespace onto the proxy.
+
+        Returns:
+            module: The imported module
+        """
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_module'] = module
+            # Later lookups hit the proxy's own __dict__ and skip __getattr__
+            self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """
+    Return a lazily imported module.
+
+    Args:
+        name: Fully qualified module name, e.g. "plotly.express"
+
+    Returns:
+        module: The module itself if already imported, otherwise a LazyModule proxy
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
@@ -1,9 +1,12 @@
 import os
-import requests
 import json
 import logging
 import time
 from datetime import datetime
+from utils.lazy_import import lazy_import
+from utils.content_id import ContentId
+
+requests = lazy_import("requests")
 
 class LighthouseClient:
     """
@@ -20,13 +23,17 @@ class LighthouseClient:
         self.api_key = api_key or os.getenv("LIGHTHOUSE_API_KEY", "")
         self.base_url = "https://api.lighthouse.storage"
         self.logger = logging.getLogger("lighthouse")
+        self._upload_index = None
     
-    def upload_file(self, file_path):
+    def upload_file(self, file_path, force=False):
         """
         Upload a file to Lighthouse.
         
+        The upload is skipped if identical content was uploaded before.
+        
         Args:
             file_path: Path to the file to upload
+            force: Upload even if the content is already stored
             
         Returns:
             cid: Content identifier for the uploaded file
@@ -34,6 +41,14 @@ class LighthouseClient:
         if not self.api_key:
             raise ValueError("Lighthouse API key is required")
         
+        # Identify the content locally before touching the network
+        content_cid = ContentId.compute_file(file_path)
+        if not force:
+            known = self.upload_index.known_cid(content_cid)
+            if known:
+                self.logger.info(f"Content of {file_path} is already stored on Lighthouse: {known}")
+                return known
+        
         try:
             with open(file_path, 'rb') as file:
                 files = {
@@ -48,14 +63,70 @@ class LighthouseClient:
                 
                 response.raise_for_status()
                 result = response.json()
+                cid = result.get('data', {}).get('cid')
                 
-                self.logger.info(f"Successfully uploaded file to Lighthouse: {result.get('data', {}).get('cid')}")
-                return result.get('data', {}).get('cid')
+                self.logger.info(f"Successfully uploaded file to Lighthouse: {cid}")
+                self._record_upload(content_cid, cid, os.path.getsize(file_path))
+                return cid
                 
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error uploading file to Lighthouse: {str(e)}")
             raise
     
+    def upload_bytes(self, content, filename, force=False):
+        """
+        Upload in-memory content to Lighthouse.
+        
+        The upload is skipped if identical content was uploaded before.
+        
+        Args:
+            content: Bytes to upload
+            filename: Filename to store the content under
+            force: Upload even if the content is already stored
+            
+        Returns:
+            cid: Content identifier for the uploaded content
+        """
+        if not self.api_key:
+            raise ValueError("Lighthouse API key is required")
+        
+        content_cid = ContentId.compute(content)
+        if not force:
+            known = self.upload_index.known_cid(content_cid)
+            if known:
+                return known
+        
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/v0/upload",
+                files={'file': (filename, content)},
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+            
+            response.raise_for_status()
+            cid = response.json().get('data', {}).get('cid')
+            
+            self._record_upload(content_cid, cid, len(content))
+            return cid
+            
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error uploading {filename} to Lighthouse: {str(e)}")
+            raise
+    
+    def _record_upload(self, content_cid, cid, size):
+        """
+        Remember an upload so identical content is not uploaded again.
+        
+        Args:
+            content_cid: CID computed locally from the content
+            cid: CID returned by Lighthouse
+            size: Content size in bytes
+        """
+        if cid:
+            self.upload_index.record_content(content_cid, cid, size)
+        # The next listing has to pick up the new upload
+        self.upload_index.invalidate()
+    
     def upload_json(self, data, filename=None):
         """
         Upload JSON data to Lighthouse.
@@ -120,27 +191,85 @@ class LighthouseClient:
             logger.error(f"Error downloading file from Lighthouse: {str(e)}")
             raise
     
-    def get_uploads(self):
+    @property
+    def upload_index(self):
         """
-        Get a list of uploaded files.
+        Local index of this account's uploads, created on first use.
         
+        Returns:
+            index: UploadIndex instance
+        """
+        if self._upload_index is None:
+            from utils.upload_index import UploadIndex
+            self._upload_index = UploadIndex(self)
+        return self._upload_index
+    
+    def get_uploads_page(self, cursor=None, page_size=100):
+        """
+        Get one page of uploaded files, newest first.
+        
+        Args:
+            cursor: Cursor returned with the previous page (None for the first page)
+            page_size: Maximum number of uploads in the page
+            
         Returns:
             uploads: List of uploaded files
+            next_cursor: Cursor of the following page, or None after the last page
         """
         if not self.api_key:
             raise ValueError("Lighthouse API key is required")
         
+        params = {"limit": page_size}
+        if cursor is not None:
+            params["lastKey"] = cursor
+        
         try:
             response = requests.get(
                 f"{self.base_url}/api/v0/uploads",
+                params=params,
                 headers={"Authorization": f"Bearer {self.api_key}"}
             )
             
             response.raise_for_status()
-            result = response.json()
+            data = response.json().get('data', {})
             
-            return result.get('data', {}).get('uploads', [])
+            return data.get('uploads', []), data.get('lastKey')
                 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error getting uploads from Lighthouse: {str(e)}")
+            self.logger.error(f"Error getting uploads from Lighthouse: {str(e)}")
             raise
+    
+    def iter_uploads(self, page_size=100, cursor=None):
+        """
+        Iterate over uploaded files page by page, newest first.
+        
+        Args:
+            page_size: Uploads requested per page
+            cursor: Optional cursor to resume from
+            
+        Returns:
+            uploads: Generator of uploaded files; pages are only fetched as needed
+        """
+        while True:
+            uploads, cursor = self.get_uploads_page(cursor, page_size)
+            yield from uploads
+            if not uploads or cursor is None:
+                return
+    
+    def get_uploads(self, max_age=30):
+        """
+        Get a list of uploaded files, newest first.
+        
+        Only uploads newer than the locally indexed ones are fetched.
+        
+        Args:
+            max_age: Seconds the local index is used without syncing
+            
+        Returns:
+            uploads: List of uploaded files
+        """
+        if not self.api_key:
+            raise ValueError("Lighthouse API key is required")
+        
+        self.upload_index.sync(max_age=max_age)
+        return self.upload_index.query()[0]
@@ -1,10 +1,17 @@
 import os
-import requests
 import json
+import base64
 import time
 import random
-import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from utils.lazy_import import lazy_import
+
+requests = lazy_import("requests")
+np = lazy_import("numpy")
 
 class LilypadClient:
     """
@@ -12,12 +19,21 @@ class LilypadClient:
     Lilypad enables privacy-preserving ML using ONNX Runtime models.
     """
 
-    def __init__(self, api_key=None):
+    # Proof verifications kept in memory, keyed by job id and proof hash
+    VERIFICATION_CACHE_SIZE = 1024
+
+    def __init__(self, api_key=None, max_workers=8, encryption_key=None, wire_format=None):
         """
         Initialize the Lilypad client.
 
         Args:
             api_key: Lilypad API key (optional, can be set as environment variable)
+            max_workers: Maximum concurrent requests for parallel fetches
+            encryption_key: 32-byte payload encryption key shared with the job's
+                module (optional, can be set hex-encoded as LILYPAD_ENCRYPTION_KEY;
+                payloads are only encoded, not encrypted, without one)
+            wire_format: Payload wire format (optional, negotiated with Lilypad
+                on first use otherwise)
         """
         self.api_key = api_key or os.getenv("LILYPAD_API_KEY", "")
         self.base_url = "https://api.lilypad.tech/v1"
@@ -38,31 +54,160 @@ class LilypadClient:
                 "description": "Classification model for transaction categorization"
             }
         }
+        self._local_executor = None
+
+        # Payload encryption
+        if encryption_key is None and os.getenv("LILYPAD_ENCRYPTION_KEY"):
+            encryption_key = bytes.fromhex(os.getenv("LILYPAD_ENCRYPTION_KEY"))
+        self._encryption_key = encryption_key
+        self._cipher = None
+        self._wire_format = wire_format
+
+        # Requests issued in parallel (result + proof, batch verification)
+        self.max_workers = max_workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+        # job_id -> (proof_hash, verification result), least recently used first
+        self._verification_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """
+        Thread pool for parallel requests, created on first use.
+
+        Returns:
+            pool: ThreadPoolExecutor instance
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="lilypad")
+            return self._pool
+
+    @property
+    def local_executor(self):
+        """
+        Local ONNX Runtime executor for the registry models, created on first use.
+
+        Returns:
+            executor: OnnxExecutor instance
+        """
+        if self._local_executor is None:
+            from utils.onnx_executor import OnnxExecutor
+            self._local_executor = OnnxExecutor(self.model_registry)
+        return self._local_executor
+
+    @property
+    def cipher(self):
+        """
+        Payload cipher, created on first use.
+
+        The key must be configured and shared with the job's module out of band;
+        none is generated here, since the job could not decrypt its input.
+
+        Returns:
+            cipher: StreamingCipher instance
+
+        Raises:
+            ValueError: If no encryption key is configured
+        """
+        if self._cipher is None:
+            if self._encryption_key is None:
+                raise ValueError("Lilypad payload encryption key is required (set LILYPAD_ENCRYPTION_KEY)")
+            from utils.payload_crypto import StreamingCipher
+            self._cipher = StreamingCipher(self._encryption_key)
+        return self._cipher
+
+    @property
+    def encryption_key(self):
+        """
+        Payload encryption key shared with the Lilypad job.
+
+        Returns:
+            key: 32-byte AES-256 key, or None if payloads are not encrypted
+        """
+        return self._encryption_key
+
+    @property
+    def wire_format(self):
+        """
+        Payload wire format agreed with Lilypad.
+
+        The most compact format listed in the capabilities endpoint's
+        "payload_formats" is chosen once and reused; without an API key, or if
+        the endpoint cannot be reached, payloads are sent as JSON.
+
+        Returns:
+            wire_format: One of ColumnarPayload.FORMATS
+        """
+        if self._wire_format is None:
+            from utils.wire_format import ColumnarPayload
+            wire_format = "json"
+            if self.api_key:
+                try:
+                    response = requests.get(
+                        f"{self.base_url}/capabilities",
+                        headers={
+                            "Authorization": f"Bearer {self.api_key}",
+                            "X-ZK-Protocol-Version": "2.0"
+                        },
+                        timeout=10
+                    )
+                    response.raise_for_status()
+                    accepted = response.json().get("payload_formats", [])
+                    wire_format = ColumnarPayload.negotiate(accepted) or "json"
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    logger.warning(f"Could not negotiate payload format with Lilypad: {str(e)}")
+            self._wire_format = wire_format
+        return self._wire_format
+
+    def encrypt_stream(self, data):
+        """
+        Serialize and encrypt data as a stream, for uploading without buffering.
+
+        Prepared financial data is serialized column by column in the negotiated
+        wire format (see ColumnarPayload) and sealed with chunked AES-256-GCM.
+
+        Args:
+            data: The data to encrypt
+
+        Returns:
+            stream: Generator of encrypted payload bytes
+        """
+        from utils.wire_format import ColumnarPayload
+        return self.cipher.encrypt_stream(ColumnarPayload.iter_encode(data, self.wire_format))
 
     def encrypt_data(self, data):
         """
         Encrypt data before sending to Lilypad for additional privacy.
         
+        The data is serialized in the negotiated wire format; with an encryption
+        key it is then sealed with chunked AES-256-GCM, without one it is only
+        base64-encoded.
+        
         Args:
             data: The data to encrypt
             
         Returns:
-            encrypted_data: The encrypted data
+            encrypted_data: Dict with the base64-encoded payload, its encryption_mode
+                and payload_format
         """
-        # This is a simplified representation of data encryption
-        # In a production environment, this would use strong encryption
-        # with proper key management
-        
-        # Convert data to JSON string
-        data_str = json.dumps(data)
-        
-        # Apply base64 encoding (as a simple representation of encryption)
-        # In reality, this would use proper encryption libraries
-        encrypted = base64.b64encode(data_str.encode('utf-8')).decode('utf-8')
+        if self._encryption_key is None:
+            from utils.wire_format import ColumnarPayload
+            logger.warning("No Lilypad encryption key configured; sending the job payload unencrypted")
+            encoded = base64.b64encode(ColumnarPayload.encode(data, self.wire_format)).decode('ascii')
+            return {
+                "encrypted_payload": encoded,
+                "encryption_mode": "zkml_compatible",
+                "payload_format": self.wire_format
+            }
         
+        sealed = b"".join(self.encrypt_stream(data))
         return {
-            "encrypted_payload": encrypted,
-            "encryption_mode": "zkml_compatible"
+            "encrypted_payload": base64.b64encode(sealed).decode('ascii'),
+            "encryption_mode": "aes-256-gcm-chunked",
+            "payload_format": self.wire_format
         }
     
     def submit_ml_job(self, model_name, data, hyperparameters=None):
@@ -152,19 +297,80 @@ class LilypadClient:
             logger.error(f"Error getting zkML job status from Lilypad: {str(e)}")
             raise
     
-    def verify_zk_proof(self, job_id):
+    @staticmethod
+    def proof_hash(result):
+        """
+        Hash identifying the proof attached to a job result.
+
+        Args:
+            result: Job status or result response
+
+        Returns:
+            proof_hash: The proof hash reported by Lilypad, a SHA-256 of the
+                embedded proof, or None if the response carries neither
+        """
+        if not isinstance(result, dict):
+            return None
+        if result.get("proof_hash"):
+            return result["proof_hash"]
+        if result.get("proof") is not None:
+            return hashlib.sha256(json.dumps(result["proof"], sort_keys=True).encode("utf-8")).hexdigest()
+        return None
+
+    def _cached_verification(self, job_id, proof_hash=None):
+        """
+        Look up a cached proof verification.
+
+        Args:
+            job_id: The ID of the job
+            proof_hash: Hash of the proof, or None to accept the cached proof of the job
+
+        Returns:
+            verification: Cached verification result, or None
+        """
+        with self._cache_lock:
+            entry = self._verification_cache.get(job_id)
+            if entry is None or (proof_hash is not None and entry[0] != proof_hash):
+                return None
+            self._verification_cache.move_to_end(job_id)
+            return entry[1]
+
+    def _cache_verification(self, job_id, proof_hash, verification):
+        """
+        Store a proof verification, evicting the oldest entries beyond the cache size.
+
+        Args:
+            job_id: The ID of the job
+            proof_hash: Hash of the verified proof (may be None)
+            verification: Verification result
+        """
+        with self._cache_lock:
+            self._verification_cache[job_id] = (proof_hash, verification)
+            self._verification_cache.move_to_end(job_id)
+            while len(self._verification_cache) > self.VERIFICATION_CACHE_SIZE:
+                self._verification_cache.popitem(last=False)
+
+    def verify_zk_proof(self, job_id, proof_hash=None):
         """
         Verify the zero-knowledge proof for a completed job.
-        
+
+        Verifications are cached by job id and proof hash; a proof is only
+        verified again when its hash changes.
+
         Args:
             job_id: The ID of the job
-            
+            proof_hash: Optional hash of the proof to verify
+
         Returns:
             verification: Verification result including proof status
         """
         if not self.api_key:
             raise ValueError("Lilypad API key is required")
-        
+
+        cached = self._cached_verification(job_id, proof_hash)
+        if cached is not None:
+            return cached
+
         try:
             response = requests.get(
                 f"{self.base_url}/jobs/{job_id}/proof",
@@ -177,19 +383,56 @@ class LilypadClient:
             response.raise_for_status()
             result = response.json()
             
-            return {
+            verification = {
                 "is_valid": result.get("is_valid", False),
                 "proof_type": result.get("proof_type", "unknown"),
                 "verification_timestamp": result.get("verification_timestamp")
             }
+            self._cache_verification(job_id, proof_hash or self.proof_hash(result), verification)
+            return verification
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Error verifying ZK proof from Lilypad: {str(e)}")
             raise
+
+    def verify_zk_proofs(self, job_ids):
+        """
+        Verify the zero-knowledge proofs of many jobs at once.
+
+        Cached verifications are returned directly; the rest are fetched in
+        parallel.
+
+        Args:
+            job_ids: Iterable of job IDs
+
+        Returns:
+            verifications: Dict mapping each job ID to its verification result,
+                or to {"error": ...} if it could not be verified
+        """
+        verifications = {}
+        missing = []
+        for job_id in dict.fromkeys(job_ids):
+            cached = self._cached_verification(job_id)
+            if cached is not None:
+                verifications[job_id] = cached
+            else:
+                missing.append(job_id)
+
+        futures = {job_id: self.pool.submit(self.verify_zk_proof, job_id) for job_id in missing}
+        for job_id, future in futures.items():
+            try:
+                verifications[job_id] = future.result()
+            except Exception as e:
+                verifications[job_id] = {"error": str(e)}
+
+        return verifications
     
     def get_job_result(self, job_id):
         """
         Get the result of a completed zero-knowledge ML job.
+
+        The result and the proof verification are fetched in parallel; a proof
+        that was already verified for this job is taken from the cache.
         
         Args:
             job_id: The ID of the job
@@ -200,6 +443,10 @@ class LilypadClient:
         if not self.api_key:
             raise ValueError("Lilypad API key is required")
         
+        # Verify the proof alongside the result fetch unless it is already cached
+        cached = self._cached_verification(job_id)
+        proof_future = None if cached is not None else self.pool.submit(self.verify_zk_proof, job_id)
+        
         try:
             response = requests.get(
                 f"{self.base_url}/jobs/{job_id}/result",
@@ -212,9 +459,17 @@ class LilypadClient:
             response.raise_for_status()
             result = response.json()
             
-            # Verify the ZK proof
             try:
-                proof_verification = self.verify_zk_proof(job_id)
+                proof_hash = self.proof_hash(result)
+                if proof_future is not None:
+                    proof_verification = proof_future.result()
+                    # Key the verification by the proof hash of the result it came with
+                    if proof_hash:
+                        self._cache_verification(job_id, proof_hash, proof_verification)
+                else:
+                    # Re-verify only if the result carries a different proof
+                    proof_verification = self._cached_verification(job_id, proof_hash) or self.verify_zk_proof(job_id, proof_hash)
+                
                 # Add verification data to the result
                 data = result.get("data", {})
                 if isinstance(data, dict):
@@ -233,7 +488,7 @@ class LilypadClient:
             logger.error(f"Error getting zkML job result from Lilypad: {str(e)}")
             raise
     
-    def run_ml_job_and_wait(self, model_name, data, hyperparameters=None):
+    def run_ml_job_and_wait(self, model_name, data, hyperparameters=None, require_proof=True):
         """
         Submit a machine learning job to Lilypad and wait for results.
         The computation runs on ONNX Runtime in a privacy-preserving environment.
@@ -242,10 +497,19 @@ class LilypadClient:
             model_name: Name of the model to use
             data: Input data for the model
             hyperparameters: Optional hyperparameters
+            require_proof: If False and the model is available locally, run it on
+                the local ONNX Runtime executor instead (no zero-knowledge proof)
 
         Returns:
             results: Results from the ML job
         """
+        # Low-latency local preview when no proof is needed
+        if not require_proof and self.local_executor.is_available(model_name):
+            try:
+                return self.local_executor.run(model_name, data, hyperparameters)
+            except Exception as e:
+                logger.warning(f"Local ONNX run failed, falling back to Lilypad: {str(e)}")
+
         # In a development environment, we'll simulate the response
         # In production, this would make actual API calls to Lilypad
 
@@ -395,7 +659,6 @@ class LilypadClient:
             }
         }
 
-import base64
 import logging
 
 # Initialize logger for the module
@@ -2,13 +2,19 @@ import pandas as pd
 import numpy as np
 import json
 from datetime import datetime, timedelta
-from utils.lilypad_client import LilypadClient
+from utils.forecasting import LocalForecaster
+from utils.anomaly_detection import StreamingAnomalyDetector, GroupedAnomalyScorer
 
 class FinancialMLModels:
     """
     Machine learning models for financial analysis using Lilypad for zero-knowledge computation.
     """
     
+    # Suggested spending reductions for savings plans; other categories are
+    # treated as discretionary
+    ESSENTIAL_CATEGORIES = ('Housing', 'Insurance', 'Utilities')
+    SEMI_ESSENTIAL_CATEGORIES = ('Transportation', 'Groceries', 'Healthcare')
+    
     def __init__(self, lilypad_client=None):
         """
         Initialize the ML models manager.
@@ -16,19 +22,41 @@ class FinancialMLModels:
         Args:
             lilypad_client: Optional LilypadClient instance
         """
-        self.lilypad_client = lilypad_client or LilypadClient()
+        self._lilypad_client = lilypad_client
+        
+        # Local forecasting engine; caches fitted state per series across calls
+        self.forecaster = LocalForecaster()
     
-    def predict_spending(self, data, forecast_periods=30):
+    @property
+    def lilypad_client(self):
+        """
+        Lilypad client, constructed on first use so that importing and
+        instantiating the models does not pull in the HTTP stack.
+        
+        Returns:
+            lilypad_client: LilypadClient instance
+        """
+        if self._lilypad_client is None:
+            from utils.lilypad_client import LilypadClient
+            self._lilypad_client = LilypadClient()
+        return self._lilypad_client
+    
+    def predict_spending(self, data, forecast_periods=30, local=False):
         """
         Predict future spending based on historical data using Lilypad's ZK-ML.
         
         Args:
             data: Prepared financial data
             forecast_periods: Number of days to forecast
+            local: Run the local forecasting engine instead of Lilypad
+                (no zero-knowledge proof is produced)
             
         Returns:
             predictions: Dictionary with prediction results
         """
+        if local:
+            return self.local_spending_forecast(data, forecast_periods)
+        
         # Prepare the payload for Lilypad
         payload = {
             "data": data,
@@ -49,14 +77,13 @@ class FinancialMLModels:
             
             return result
         except Exception as e:
-            # Fallback to local simulated forecast (for development/testing)
-            print(f"Error with Lilypad: {str(e)}. Using fallback forecast.")
+            # Fallback to the local forecasting engine
+            print(f"Error with Lilypad: {str(e)}. Using local forecast.")
             return self._fallback_spending_forecast(data, forecast_periods)
     
     def _fallback_spending_forecast(self, data, forecast_periods):
         """
         Fallback method for spending forecast when Lilypad is unavailable.
-        This should only be used for development/testing.
         
         Args:
             data: Prepared financial data
@@ -65,60 +92,68 @@ class FinancialMLModels:
         Returns:
             predictions: Dictionary with prediction results
         """
-        # Extract data points from features
+        return self.local_spending_forecast(data, forecast_periods)
+    
+    def local_spending_forecast(self, data, forecast_periods, key="default"):
+        """
+        Forecast spending locally with Holt-Winters exponential smoothing.
+        
+        The fitted state is cached under `key`, so repeated forecasts on a growing
+        history only process the newly added days.
+        
+        Args:
+            data: Prepared financial data
+            forecast_periods: Number of days to forecast
+            key: Cache key for the series (user, category, ...)
+            
+        Returns:
+            predictions: Dictionary with forecast values, prediction interval and metadata
+        """
         features = data.get('features', [])
         dates = data.get('dates', [])
         
         if not features or not dates:
             return {"error": "Insufficient data for forecast"}
         
-        # Convert features to DataFrame
-        df = pd.DataFrame(features)
-        
-        if 'amount' not in df.columns:
+        if 'amount' not in features[0]:
             return {"error": "Amount data missing"}
         
-        # Calculate simple moving average
-        amounts = df['amount'].values
-        
-        # Use last 7-day spending as a baseline
-        last_week_avg = np.mean([abs(a) for a in amounts[-7:] if a < 0])
-        
-        # Generate forecast dates
-        last_date = datetime.strptime(dates[-1], '%Y-%m-%d')
-        forecast_dates = [(last_date + timedelta(days=i+1)).strftime('%Y-%m-%d') 
-                         for i in range(forecast_periods)]
-        
-        # Generate "forecast" values with some randomness
-        np.random.seed(42)  # For reproducibility
-        noise_factor = 0.2  # 20% noise
-        
-        forecast_values = []
-        for i in range(forecast_periods):
-            # Create a simple cyclic pattern with weekly seasonality
-            day_factor = 1.0 + 0.3 * np.sin((i % 7) * np.pi / 3)
-            # Add more spending on weekends (days 5 and 6)
-            weekend_factor = 1.5 if i % 7 >= 5 else 1.0
-            # Add some noise
-            noise = np.random.normal(0, noise_factor * last_week_avg)
-            # Compute forecasted amount (negative for expenses)
-            value = -1 * day_factor * weekend_factor * last_week_avg + noise
-            forecast_values.append(value)
-        
-        # Create prediction result similar to what Lilypad would return
-        prediction_result = {
-            "forecast": {
-                "dates": forecast_dates,
-                "values": forecast_values
-            },
-            "metadata": {
-                "model": "fallback_forecast",
-                "confidence": 0.6,  # Lower confidence as this is a fallback
-                "baseline": last_week_avg
-            }
-        }
+        self.forecaster.update(key, [f['amount'] for f in features], dates)
+        return self.forecaster.forecast(key, forecast_periods)
+    
+    def batch_fallback_spending_forecast(self, datasets, forecast_periods):
+        """
+        Local spending forecasts for many users or categories in one call.
+        
+        All series are fitted in a single vectorized pass of the forecasting engine.
+        
+        Args:
+            datasets: Dict mapping a key (user, category, ...) to prepared financial data
+            forecast_periods: Number of days to forecast
+            
+        Returns:
+            predictions: Dict mapping each key to a prediction result in the
+                format of local_spending_forecast
+        """
+        predictions = {}
+        series = {}
+        
+        for key, data in datasets.items():
+            features = data.get('features', [])
+            dates = data.get('dates', [])
+            
+            if not features or not dates:
+                predictions[key] = {"error": "Insufficient data for forecast"}
+            elif 'amount' not in features[0]:
+                predictions[key] = {"error": "Amount data missing"}
+            else:
+                series[key] = ([f['amount'] for f in features], dates)
+        
+        self.forecaster.fit_many(series)
+        for key in series:
+            predictions[key] = self.forecaster.forecast(key, forecast_periods)
         
-        return prediction_result
+        return predictions
     
     def detect_anomalies(self, data):
         """
@@ -154,13 +189,17 @@ class FinancialMLModels:
             print(f"Error with Lilypad: {str(e)}. Using fallback anomaly detection.")
             return self._fallback_anomaly_detection(data)
     
-    def _fallback_anomaly_detection(self, data):
+    def _fallback_anomaly_detection(self, data, robust=False):
         """
         Fallback method for anomaly detection when Lilypad is unavailable.
-        This should only be used for development/testing.
+        
+        Expenses are scored against running statistics per category and day of
+        week (falling back to per-category, then global statistics when a group
+        has too few transactions).
         
         Args:
             data: Prepared financial data
+            robust: Use median/MAD statistics instead of mean/standard deviation
             
         Returns:
             anomalies: Dictionary with detected anomalies
@@ -172,49 +211,54 @@ class FinancialMLModels:
         if not features or not dates:
             return {"error": "Insufficient data for anomaly detection"}
         
-        # Convert features to DataFrame
-        df = pd.DataFrame(features)
-        df['date'] = dates
-        
-        if 'amount' not in df.columns:
+        if 'amount' not in features[0]:
             return {"error": "Amount data missing"}
         
-        # Focus on expenses (negative amounts)
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
+        # Columnar views of the features
+        amounts = np.fromiter((f['amount'] for f in features), dtype=float, count=len(features))
+        categories = np.fromiter((f.get('category_code', 0) for f in features), dtype=np.int64, count=len(features))
+        days = np.fromiter((f.get('day_of_week', 0) for f in features), dtype=np.int64, count=len(features))
         
-        if len(expenses) == 0:
+        if not (amounts < 0).any():
             return {"anomalies": []}
         
-        # Calculate z-scores for spending amounts
-        mean_expense = expenses['amount'].mean()
-        std_expense = expenses['amount'].std() or 1.0  # Avoid division by zero
-        
-        expenses['z_score'] = (expenses['amount'] - mean_expense) / std_expense
+        detector = StreamingAnomalyDetector(threshold=2.5, high_threshold=3.5, robust=robust)
+        detector.fit(categories, days, amounts)
         
-        # Identify anomalies as expenses with z-score > 2.5
-        anomalies = expenses[expenses['z_score'] > 2.5]
-        
-        # Format results
-        anomaly_results = []
-        for _, row in anomalies.iterrows():
-            anomaly_results.append({
-                "date": row['date'],
-                "amount": -1 * row['amount'],  # Convert back to negative
-                "z_score": row['z_score'],
-                "severity": "high" if row['z_score'] > 3.5 else "medium"
-            })
+        category_names = {code: name for name, code in data.get('category_mapping', {}).items()}
+        anomaly_results = detector.detect(categories, days, amounts, dates, category_names=category_names)
         
+        stats = detector.summary()
         return {
             "anomalies": anomaly_results,
             "metadata": {
                 "model": "fallback_anomaly_detector",
-                "threshold": 2.5,
-                "mean_expense": mean_expense,
-                "std_expense": std_expense
+                "threshold": detector.threshold,
+                "robust": robust,
+                "mean_expense": stats["mean"],
+                "std_expense": stats["std"]
             }
         }
     
+    def batch_anomaly_detection(self, transactions, user_column='user_id', robust=True):
+        """
+        Local anomaly detection for many users in one call.
+        
+        Expenses are scored against robust statistics per user and category, so
+        a rent payment never masks unusual grocery spending.
+        
+        Args:
+            transactions: Pandas DataFrame with user, category and amount columns
+            user_column: Name of the user identifier column
+            robust: Use median/MAD statistics instead of mean/standard deviation
+            
+        Returns:
+            scores: DataFrame aligned with `transactions` with score, is_anomaly
+                and severity columns
+        """
+        scorer = GroupedAnomalyScorer(threshold=2.5, high_threshold=3.5, robust=robust)
+        return scorer.score(transactions, user_column=user_column)
+    
     def categorize_uncategorized(self, data):
         """
         Suggest categories for uncategorized transactions using Lilypad's ZK-ML.
@@ -259,112 +303,162 @@ class FinancialMLModels:
         Returns:
             plan: Dictionary with savings plan
         """
-        # Extract features and process
+        return self.batch_savings_plans({"default": data}, target_savings)["default"]
+    
+    def batch_savings_plans(self, datasets, targets):
+        """
+        Generate savings plans for many users at once.
+        
+        Per-user category rollups are stacked into a users x categories matrix;
+        reductions, the cumulative savings cutoff and the plan totals are then
+        computed for every user in one vectorized pass.
+        
+        Args:
+            datasets: Dict mapping a user key to prepared financial data
+            targets: Target monthly savings amount, or a dict mapping each user
+                key to its target
+            
+        Returns:
+            plans: Dict mapping each user key to a savings plan in the format of
+                generate_savings_plan
+        """
+        plans = {}
+        rollups = {}
+        
+        for key, data in datasets.items():
+            rollup = self._savings_rollup(data)
+            if "error" in rollup:
+                plans[key] = rollup
+            else:
+                rollups[key] = rollup
+        
+        if not rollups:
+            return plans
+        
+        keys = list(rollups)
+        categories = np.array(sorted(set().union(*(r["categories"] for r in rollups.values()))), dtype=object)
+        
+        # Monthly spending matrix (users x categories)
+        spending = np.zeros((len(keys), len(categories)))
+        for i, key in enumerate(keys):
+            rollup = rollups[key]
+            spending[i, np.searchsorted(categories, rollup["categories"])] = rollup["monthly_spending"]
+        
+        income = np.array([rollups[key]["monthly_income"] for key in keys])
+        expenses = np.array([rollups[key]["monthly_expenses"] for key in keys])
+        target = np.array([targets[key] if isinstance(targets, dict) else targets for key in keys], dtype=float)
+        
+        current_savings = income - expenses
+        savings_gap = target - current_savings
+        
+        # Essential categories get smaller reductions, discretionary ones larger
+        reduction = np.select(
+            [np.isin(categories, self.ESSENTIAL_CATEGORIES), np.isin(categories, self.SEMI_ESSENTIAL_CATEGORIES)],
+            [0.05, 0.1],
+            default=0.2
+        )
+        
+        # Highest spending first (ties in category order); skip very small categories
+        order = np.argsort(-spending, axis=1, kind='stable')
+        sorted_spending = np.take_along_axis(spending, order, axis=1)
+        eligible = sorted_spending >= 20
+        potential = np.where(eligible, sorted_spending * reduction[order], 0.0)
+        
+        # A category is recommended while the gap left by the ones before it is open
+        covered_before = np.cumsum(potential, axis=1) - potential
+        recommended = eligible & (covered_before < savings_gap[:, None])
+        total_potential = np.where(recommended, potential, 0.0).sum(axis=1)
+        
+        for i, key in enumerate(keys):
+            # If already meeting or exceeding target, return positive message
+            if savings_gap[i] <= 0:
+                plans[key] = {
+                    "status": "on_track",
+                    "message": "You're already meeting or exceeding your savings target!",
+                    "current_monthly_savings": float(current_savings[i]),
+                    "target_savings": float(target[i]),
+                    "surplus": float(-savings_gap[i])
+                }
+                continue
+            
+            columns = np.flatnonzero(recommended[i])
+            recommendations = [
+                {
+                    "category": categories[order[i, j]],
+                    "current_monthly_spending": float(sorted_spending[i, j]),
+                    "suggested_reduction_percent": float(reduction[order[i, j]] * 100),
+                    "potential_monthly_savings": float(potential[i, j]),
+                    "tips": self._get_savings_tips(categories[order[i, j]])
+                }
+                for j in columns
+            ]
+            
+            plans[key] = {
+                "status": "gap" if total_potential[i] < savings_gap[i] else "achievable",
+                "current_monthly_income": float(income[i]),
+                "current_monthly_expenses": float(expenses[i]),
+                "current_monthly_savings": float(current_savings[i]),
+                "target_savings": float(target[i]),
+                "savings_gap": float(savings_gap[i]),
+                "potential_savings": float(total_potential[i]),
+                "recommendations": recommendations
+            }
+        
+        return plans
+    
+    def _savings_rollup(self, data):
+        """
+        Monthly income and per-category monthly spending of one user.
+        
+        Args:
+            data: Prepared financial data
+            
+        Returns:
+            rollup: Dictionary with categories, monthly_spending, monthly_income
+                and monthly_expenses, or an error dictionary
+        """
         features = data.get('features', [])
         category_mapping = data.get('category_mapping', {})
         
         if not features:
             return {"error": "Insufficient data for savings plan"}
         
-        # Convert features to DataFrame
-        df = pd.DataFrame(features)
+        amounts = np.fromiter((f['amount'] for f in features), dtype=float, count=len(features))
+        codes = np.fromiter((f['category_code'] for f in features), dtype=np.int64, count=len(features))
+        days = np.fromiter((f['days_since_first'] for f in features), dtype=float, count=len(features))
         
-        # Convert category_code back to category name
-        inv_category_mapping = {v: k for k, v in category_mapping.items()}
-        df['category'] = df['category_code'].map(inv_category_mapping)
-        
-        # Calculate current spending by category (expenses only)
-        expenses = df[df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
-        if len(expenses) == 0:
+        expense = amounts < 0
+        if not expense.any():
             return {"error": "No expense data available for savings plan"}
         
-        # Group by category
-        category_spending = expenses.groupby('category')['amount'].agg(['sum', 'count', 'mean'])
-        category_spending = category_spending.reset_index()
+        # Transactions without a category (code -1) count as Uncategorized
+        missing = codes < 0
+        if missing.any():
+            uncategorized = category_mapping.get('Uncategorized')
+            if uncategorized is None:
+                uncategorized = max(category_mapping.values(), default=-1) + 1
+                category_mapping = dict(category_mapping, Uncategorized=uncategorized)
+            codes = np.where(missing, uncategorized, codes)
         
         # Calculate total monthly expenses
-        days_in_data = df['days_since_first'].max() + 1
-        months_in_data = max(days_in_data / 30, 1)
-        monthly_expenses = expenses['amount'].sum() / months_in_data
-        
-        # Current monthly savings (if income data is available)
-        income = df[df['amount'] > 0]['amount'].sum() / months_in_data if len(df[df['amount'] > 0]) > 0 else 0
-        current_savings = income - monthly_expenses
-        
-        # Calculate savings gap
-        savings_gap = target_savings - current_savings
-        
-        # If already meeting or exceeding target, return positive message
-        if savings_gap <= 0:
-            return {
-                "status": "on_track",
-                "message": "You're already meeting or exceeding your savings target!",
-                "current_monthly_savings": current_savings,
-                "target_savings": target_savings,
-                "surplus": -savings_gap
-            }
+        months_in_data = max((days.max() + 1) / 30, 1)
+        monthly_expenses = -amounts[expense].sum() / months_in_data
+        monthly_income = amounts[amounts > 0].sum() / months_in_data
         
-        # Generate recommendations based on category spending
-        # Sort by total spending (highest first)
-        category_spending = category_spending.sort_values('sum', ascending=False)
+        # Spending by category code (expenses only)
+        spending = np.bincount(codes[expense], weights=-amounts[expense])
+        counts = np.bincount(codes[expense], minlength=spending.size)
         
-        # Calculate potential savings for each category (suggest 10-20% reduction)
-        recommendations = []
-        remaining_gap = savings_gap
+        # Convert category_code back to category name
+        inv_category_mapping = {v: k for k, v in category_mapping.items()}
+        present = [code for code in np.flatnonzero(counts).tolist() if code in inv_category_mapping]
         
-        for _, row in category_spending.iterrows():
-            category = row['category']
-            monthly_cat_spend = row['sum'] / months_in_data
-            
-            # Skip categories with very small spending
-            if monthly_cat_spend < 20:
-                continue
-            
-            # Determine reduction percentage based on category and remaining gap
-            if remaining_gap <= 0:
-                break
-                
-            if category in ['Housing', 'Insurance', 'Utilities']:
-                # Essential categories - suggest smaller reductions
-                reduction_pct = 0.05
-            elif category in ['Transportation', 'Groceries', 'Healthcare']:
-                # Semi-essential - moderate reductions
-                reduction_pct = 0.1
-            else:
-                # Discretionary - larger reductions
-                reduction_pct = 0.2
-            
-            # Calculate potential savings from this category
-            potential_savings = monthly_cat_spend * reduction_pct
-            
-            # Add recommendation
-            recommendations.append({
-                "category": category,
-                "current_monthly_spending": monthly_cat_spend,
-                "suggested_reduction_percent": reduction_pct * 100,
-                "potential_monthly_savings": potential_savings,
-                "tips": self._get_savings_tips(category)
-            })
-            
-            remaining_gap -= potential_savings
-        
-        # Generate summary
-        total_potential_savings = sum(r["potential_monthly_savings"] for r in recommendations)
-        
-        savings_plan = {
-            "status": "gap" if total_potential_savings < savings_gap else "achievable",
-            "current_monthly_income": income,
-            "current_monthly_expenses": monthly_expenses,
-            "current_monthly_savings": current_savings,
-            "target_savings": target_savings,
-            "savings_gap": savings_gap,
-            "potential_savings": total_potential_savings,
-            "recommendations": recommendations
+        return {
+            "categories": [inv_category_mapping[code] for code in present],
+            "monthly_spending": spending[present] / months_in_data,
+            "monthly_income": monthly_income,
+            "monthly_expenses": monthly_expenses
         }
-        
-        return savings_plan
     
     def _get_savings_tips(self, category):
         """
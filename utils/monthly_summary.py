@@ -0,0 +1,267 @@
+import pandas as pd
+
+
+class IncrementalMonthlySummary:
+    """
+    Monthly income/expense summary maintained incrementally.
+
+    Historical months never change when a transaction is appended, so instead of
+    recomputing every month with DataProcessor.calculate_monthly_summary, only the
+    affected month's running totals are updated on insert, delete or edit.
+    TransactionStore keeps the summary of its transactions this way and stores it
+    with each snapshot (see to_dict).
+    """
+
+    def __init__(self, months=None, version=None):
+        """
+        Initialize the summary.
+
+        Args:
+            months: Optional dict mapping 'YYYY-MM' to dicts with income,
+                expenses, net and count totals
+            version: Optional version of the transaction data the summary
+                reflects (e.g. TransactionStore.version)
+        """
+        self.version = version
+        self._months = {}
+        for month, totals in (months or {}).items():
+            self._months[month] = {
+                'income': float(totals['income']),
+                'expenses': float(totals['expenses']),
+                'net': float(totals['net']),
+                'count': int(totals['count'])
+            }
+
+    @staticmethod
+    def month_key(date):
+        """
+        Get the period key for a date.
+
+        Args:
+            date: Date-like value
+
+        Returns:
+            month: Period key in 'YYYY-MM' format
+        """
+        return pd.Timestamp(date).strftime('%Y-%m')
+
+    @classmethod
+    def from_transactions(cls, df, version=None):
+        """
+        Build a summary from a transaction DataFrame in one vectorized pass.
+
+        Args:
+            df: Pandas DataFrame with date and amount columns
+            version: Optional version of the transaction data
+
+        Returns:
+            summary: IncrementalMonthlySummary instance
+        """
+        summary = cls(version=version)
+        if df is None or df.empty:
+            return summary
+
+        grouped = summary._aggregate(df)
+        summary._months = {
+            month: {
+                'income': float(row.income),
+                'expenses': float(row.expenses),
+                'net': float(row.net),
+                'count': int(row.count)
+            }
+            for month, row in zip(grouped.index, grouped.itertuples(index=False))
+        }
+        return summary
+
+    @staticmethod
+    def _aggregate(df):
+        """
+        Aggregate transactions into per-month totals.
+
+        Args:
+            df: Pandas DataFrame with date and amount columns
+
+        Returns:
+            grouped: DataFrame indexed by 'YYYY-MM' with income, expenses, net and count
+        """
+        dates = df['date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates)
+
+        amounts = df['amount'].astype(float)
+        frame = pd.DataFrame({
+            'month': dates.dt.strftime('%Y-%m'),
+            'income': amounts.clip(lower=0),
+            'expenses': (-amounts).clip(lower=0),
+            'net': amounts
+        })
+
+        return frame.groupby('month').agg(
+            income=('income', 'sum'),
+            expenses=('expenses', 'sum'),
+            net=('net', 'sum'),
+            count=('net', 'size')
+        )
+
+    def add(self, date, amount):
+        """
+        Account for a new transaction in O(1).
+
+        Args:
+            date: Transaction date
+            amount: Transaction amount (positive for income, negative for expenses)
+        """
+        month = self.month_key(date)
+        totals = self._months.setdefault(month, {'income': 0.0, 'expenses': 0.0, 'net': 0.0, 'count': 0})
+
+        amount = float(amount)
+        if amount > 0:
+            totals['income'] += amount
+        elif amount < 0:
+            totals['expenses'] -= amount
+        totals['net'] += amount
+        totals['count'] += 1
+
+    def remove(self, date, amount):
+        """
+        Remove a transaction from the summary in O(1).
+
+        Args:
+            date: Transaction date
+            amount: Transaction amount (positive for income, negative for expenses)
+        """
+        month = self.month_key(date)
+        totals = self._months.get(month)
+        if totals is None:
+            raise KeyError(f"No transactions recorded for month {month}")
+
+        amount = float(amount)
+        if amount > 0:
+            totals['income'] -= amount
+        elif amount < 0:
+            totals['expenses'] += amount
+        totals['net'] -= amount
+        totals['count'] -= 1
+
+        if totals['count'] <= 0:
+            del self._months[month]
+
+    def update(self, old_date, old_amount, new_date, new_amount):
+        """
+        Apply an edit to a transaction's date and/or amount.
+
+        Args:
+            old_date: Transaction date before the edit
+            old_amount: Transaction amount before the edit
+            new_date: Transaction date after the edit
+            new_amount: Transaction amount after the edit
+        """
+        self.remove(old_date, old_amount)
+        self.add(new_date, new_amount)
+
+    def recompute_month(self, df, month):
+        """
+        Recompute a single month from the transaction data.
+
+        Use this after bulk edits, or to drop any floating point drift that
+        accumulated through repeated add/remove calls.
+
+        Args:
+            df: Pandas DataFrame with transaction data
+            month: Period key in 'YYYY-MM' format (or any date in that month)
+        """
+        if not (isinstance(month, str) and len(month) == 7):
+            month = self.month_key(month)
+
+        dates = df['date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates)
+
+        period = pd.Period(month, freq='M')
+        in_month = (dates >= period.start_time) & (dates <= period.end_time)
+        grouped = self._aggregate(df[in_month])
+
+        if month in grouped.index:
+            row = grouped.loc[month]
+            self._months[month] = {
+                'income': float(row['income']),
+                'expenses': float(row['expenses']),
+                'net': float(row['net']),
+                'count': int(row['count'])
+            }
+        else:
+            self._months.pop(month, None)
+
+    def is_current(self, df, version=None):
+        """
+        Check whether the summary reflects a transaction frame.
+
+        The transaction count alone misses edits that keep it unchanged, so the
+        data version is compared as well when one is known.
+
+        Args:
+            df: Pandas DataFrame with transaction data
+            version: Optional version of the transaction data
+
+        Returns:
+            current: True if the summary is up to date
+        """
+        if self.transaction_count != (0 if df is None else len(df)):
+            return False
+        return version is None or self.version == version
+
+    @property
+    def transaction_count(self):
+        """
+        Number of transactions accounted for across all months.
+
+        Returns:
+            count: Total transaction count
+        """
+        return sum(totals['count'] for totals in self._months.values())
+
+    def to_dict(self):
+        """
+        Serialize the summary to a JSON-compatible dictionary.
+
+        Returns:
+            data: Dictionary with the data version and the per-month running totals
+        """
+        return {
+            'version': self.version,
+            'months': {month: dict(totals) for month, totals in sorted(self._months.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore a summary serialized with to_dict.
+
+        Args:
+            data: Dictionary produced by to_dict
+
+        Returns:
+            summary: IncrementalMonthlySummary instance
+        """
+        return cls(data.get('months', {}), data.get('version'))
+
+    def to_frame(self):
+        """
+        Export the summary in the format of DataProcessor.calculate_monthly_summary.
+
+        Returns:
+            monthly_summary: DataFrame with month, income, expenses, net and savings_rate
+        """
+        months = sorted(self._months)
+        monthly = pd.DataFrame({
+            'month': months,
+            'income': [self._months[m]['income'] for m in months],
+            'expenses': [self._months[m]['expenses'] for m in months],
+            'net': [self._months[m]['net'] for m in months]
+        })
+
+        # Add savings rate
+        monthly['savings_rate'] = (monthly['income'] - monthly['expenses']) / monthly['income'] * 100
+        monthly['savings_rate'] = monthly['savings_rate'].fillna(0)
+
+        return monthly
@@ -0,0 +1,357 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils.forecasting import LocalForecaster
+
+logger = logging.getLogger("lilypad")
+
+
+class OnnxExecutor:
+    """
+    Local CPU executor for the ONNX models in the Lilypad model registry.
+
+    Models are loaded from `model_dir` as `<registry id>.onnx`. Each model gets a
+    small pool of warm InferenceSessions, one per worker thread. Concurrent
+    requests for the same model are queued and coalesced: a worker takes the
+    first pending request, gathers more for up to `max_wait_ms` or until
+    `max_batch_size` rows are queued, runs them as one batch and splits the output
+    back to the callers.
+
+    Results use the schema of LilypadClient.run_ml_job_and_wait. Local runs do not
+    produce a zero-knowledge proof; use the remote job when one is needed.
+
+    Model contracts (first input and first output of each graph, dynamic batch axis):
+        financial_forecast: (series, history_days) float32 daily expense totals ->
+            (series, horizon_days) forecast daily expense totals
+        financial_anomaly_detector: (transactions, 4) float32 amount, category_code,
+            day_of_week, month -> (transactions,) or (transactions, 1) anomaly score
+        transaction_categorizer: (transactions, 3) float32 amount, day_of_week,
+            month -> (transactions, categories) class probabilities
+    """
+
+    # History length used when the forecast model does not fix it in its input shape
+    DEFAULT_HISTORY_DAYS = 90
+
+    def __init__(self, model_registry, model_dir=None, pool_size=2, max_batch_size=1024,
+                 max_wait_ms=5, intra_op_threads=1):
+        """
+        Initialize the executor.
+
+        Args:
+            model_registry: Lilypad model registry (model name -> {"id", "type", ...})
+            model_dir: Directory with the .onnx files (defaults to LILYPAD_MODEL_DIR or ./models)
+            pool_size: Warm sessions (and worker threads) per model
+            max_batch_size: Maximum rows per batched inference
+            max_wait_ms: How long a worker waits for more requests to join a batch
+            intra_op_threads: ONNX Runtime intra-op threads per session
+        """
+        self.model_registry = model_registry
+        self.model_dir = model_dir or os.getenv("LILYPAD_MODEL_DIR", "models")
+        self.pool_size = pool_size
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.intra_op_threads = intra_op_threads
+
+        # Model name -> pending request queue, shared by that model's workers
+        self._queues = {}
+        self._workers = {}
+        self._input_shapes = {}
+        self._lock = threading.Lock()
+
+    def model_path(self, model_name):
+        """
+        Path of a registry model's ONNX file.
+
+        Args:
+            model_name: Registry model name
+
+        Returns:
+            path: Path to the .onnx file
+        """
+        if model_name not in self.model_registry:
+            raise ValueError(f"Unknown model name: {model_name}")
+        return os.path.join(self.model_dir, f"{self.model_registry[model_name]['id']}.onnx")
+
+    def is_available(self, model_name):
+        """
+        Check whether a model can run locally.
+
+        Args:
+            model_name: Registry model name
+
+        Returns:
+            available: True if ONNX Runtime is installed and the model file exists
+        """
+        if model_name not in self.model_registry or not os.path.exists(self.model_path(model_name)):
+            return False
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _create_session(self, model_name):
+        """
+        Create a CPU InferenceSession for a model.
+
+        Args:
+            model_name: Registry model name
+
+        Returns:
+            session: onnxruntime.InferenceSession
+        """
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return onnxruntime.InferenceSession(
+            self.model_path(model_name),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+    def warm_up(self, model_names=None):
+        """
+        Load sessions and start workers ahead of the first request.
+
+        Args:
+            model_names: Registry model names to load (defaults to every available model)
+        """
+        for model_name in model_names or list(self.model_registry):
+            if self.is_available(model_name):
+                self._queue(model_name)
+
+    def _queue(self, model_name):
+        """
+        Pending request queue of a model, starting its worker pool on first use.
+
+        Args:
+            model_name: Registry model name
+
+        Returns:
+            pending: queue.Queue of (inputs, future) tuples
+        """
+        with self._lock:
+            pending = self._queues.get(model_name)
+            if pending is None:
+                # Create the sessions up front so that load errors reach the caller
+                sessions = [self._create_session(model_name) for _ in range(self.pool_size)]
+                pending = queue.Queue()
+                self._queues[model_name] = pending
+                self._input_shapes[model_name] = sessions[0].get_inputs()[0].shape
+                self._workers[model_name] = [
+                    threading.Thread(target=self._worker, args=(session, pending), daemon=True,
+                                     name=f"onnx-{model_name}-{i}")
+                    for i, session in enumerate(sessions)
+                ]
+                for worker in self._workers[model_name]:
+                    worker.start()
+            return pending
+
+    def _worker(self, session, pending):
+        """
+        Worker loop: gather queued requests into batches and run them.
+
+        Args:
+            session: InferenceSession owned by this worker
+            pending: Queue of (inputs, future) tuples
+        """
+        input_name = session.get_inputs()[0].name
+        output_name = session.get_outputs()[0].name
+
+        while True:
+            batch = [pending.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+
+            # Coalesce requests that arrive while the batch is filling
+            while rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                rows += len(request[0])
+
+            try:
+                inputs = np.concatenate([inputs for inputs, _ in batch])
+                outputs = session.run([output_name], {input_name: inputs})[0]
+                offsets = np.cumsum([len(inputs) for inputs, _ in batch])[:-1]
+                for (_, future), output in zip(batch, np.split(outputs, offsets)):
+                    future.set_result(output)
+            except Exception as e:
+                logger.error(f"Local ONNX inference failed: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def infer(self, model_name, inputs):
+        """
+        Run raw inference, batched with concurrent requests for the same model.
+
+        Args:
+            model_name: Registry model name
+            inputs: Array whose first axis is the batch axis
+
+        Returns:
+            outputs: Model output rows for `inputs`
+        """
+        inputs = np.ascontiguousarray(inputs, dtype=np.float32)
+        if len(inputs) == 0:
+            return np.zeros((0,), dtype=np.float32)
+
+        future = Future()
+        self._queue(model_name).put((inputs, future))
+        return future.result()
+
+    def run(self, model_name, data, hyperparameters=None):
+        """
+        Run a registry model locally.
+
+        Args:
+            model_name: Registry model name
+            data: Job payload as passed to run_ml_job_and_wait ("data", "parameters")
+            hyperparameters: Optional hyperparameters (unused locally)
+
+        Returns:
+            results: Results in the schema of run_ml_job_and_wait
+        """
+        if model_name == "financial_forecast":
+            return self._run_forecast(data)
+        elif model_name == "financial_anomaly_detector":
+            return self._run_anomaly_detection(data)
+        elif model_name == "transaction_categorizer":
+            return self._run_categorization(data)
+        else:
+            return {"error": "Unknown model name"}
+
+    @staticmethod
+    def _columns(data, names):
+        """
+        Stack feature columns of prepared financial data.
+
+        Args:
+            data: Prepared financial data
+            names: Feature names
+
+        Returns:
+            matrix: float32 array of shape (transactions, len(names))
+        """
+        features = data.get('features', [])
+        matrix = np.zeros((len(features), len(names)), dtype=np.float32)
+        for j, name in enumerate(names):
+            matrix[:, j] = np.fromiter((f.get(name, 0) for f in features), dtype=np.float32, count=len(features))
+        return matrix
+
+    def _metadata(self, model_name, **extra):
+        """Result metadata for a local run"""
+        metadata = {
+            "model": f"{self.model_registry[model_name]['id']}-local",
+            "runtime": "onnx-runtime",
+            "privacy_preserved": True,
+            "provable": False
+        }
+        metadata.update(extra)
+        return metadata
+
+    def _run_forecast(self, data):
+        """Forecast daily spending with the local forecast model"""
+        prepared = data.get("data", {})
+        forecast_periods = data.get("parameters", {}).get("forecast_periods", 30)
+        features = prepared.get('features', [])
+        dates = prepared.get('dates', [])
+
+        if not features or not dates:
+            return {"error": "Insufficient data for forecast"}
+
+        start, daily = LocalForecaster.daily_expenses([f['amount'] for f in features], dates)
+
+        # Fixed-length window of the most recent days, zero-padded at the front
+        self._queue("financial_forecast")
+        history_days = self._input_shapes["financial_forecast"][1]
+        if not isinstance(history_days, int):
+            history_days = self.DEFAULT_HISTORY_DAYS
+        window = np.zeros(history_days, dtype=np.float32)
+        recent = daily[-history_days:]
+        window[history_days - len(recent):] = recent
+
+        spend = self.infer("financial_forecast", window[None, :])[0]
+        if len(spend) < forecast_periods:
+            return {"error": f"Model forecasts at most {len(spend)} days"}
+
+        last_day = start + len(daily) - 1
+        forecast_dates = np.datetime_as_string(last_day + np.arange(1, forecast_periods + 1), unit='D').tolist()
+
+        return {
+            "forecast": {
+                "dates": forecast_dates,
+                "values": (0.0 - np.maximum(spend[:forecast_periods].astype(float), 0.0)).tolist()
+            },
+            "metadata": self._metadata("financial_forecast", history_days=history_days)
+        }
+
+    def _run_anomaly_detection(self, data):
+        """Score transactions with the local anomaly detection model"""
+        prepared = data.get("data", {})
+        threshold = data.get("parameters", {}).get("threshold", 2.5)
+        dates = prepared.get('dates', [])
+
+        if not prepared.get('features') or not dates:
+            return {"error": "Insufficient data for anomaly detection"}
+
+        inputs = self._columns(prepared, ['amount', 'category_code', 'day_of_week', 'month'])
+        scores = self.infer("financial_anomaly_detector", inputs).reshape(-1).astype(float)
+
+        category_names = {code: name for name, code in prepared.get('category_mapping', {}).items()}
+        anomalies = [
+            {
+                "date": dates[i],
+                "amount": float(inputs[i, 0]),
+                "z_score": scores[i],
+                "severity": "high" if scores[i] > threshold + 1 else "medium",
+                "category": category_names.get(int(inputs[i, 1]), "Unknown")
+            }
+            for i in np.flatnonzero(scores > threshold).tolist()
+        ]
+
+        return {
+            "anomalies": anomalies,
+            "metadata": self._metadata("financial_anomaly_detector", threshold=threshold)
+        }
+
+    def _run_categorization(self, data):
+        """Suggest categories with the local categorization model"""
+        prepared = data.get("data", {})
+
+        if not prepared.get('features'):
+            return {"error": "Insufficient data for categorization"}
+
+        inputs = self._columns(prepared, ['amount', 'day_of_week', 'month'])
+        probabilities = self.infer("transaction_categorizer", inputs)
+        codes = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(codes)), codes].astype(float)
+
+        category_names = {code: name for name, code in prepared.get('category_mapping', {}).items()}
+        categories = [
+            {
+                "transaction_id": f"t{i}",
+                "suggested_category": category_names.get(code, "Uncategorized"),
+                "confidence": conf
+            }
+            for i, (code, conf) in enumerate(zip(codes.tolist(), confidence.tolist()))
+        ]
+
+        return {
+            "categories": categories,
+            "metadata": self._metadata("transaction_categorizer")
+        }
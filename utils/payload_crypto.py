@@ -0,0 +1,178 @@
+import io
+import struct
+
+from utils.lazy_import import lazy_import
+
+AES = lazy_import("Crypto.Cipher.AES")
+Random = lazy_import("Crypto.Random")
+
+
+class StreamingCipher:
+    """
+    Chunked AES-256-GCM encryption for job payloads.
+
+    The plaintext is sealed in fixed-size chunks, each with its own nonce and
+    authentication tag, so arbitrarily large payloads are encrypted and uploaded
+    as a stream without holding a second full copy in memory. Every chunk
+    authenticates the stream header, its index and whether it is the final chunk,
+    so reordered, duplicated or truncated streams fail to decrypt.
+
+    Layout:
+        MAGIC | version (uint8) | chunk size (uint32) | nonce prefix (8 bytes)
+        then per chunk: final flag (uint8) | ciphertext length (uint32) | ciphertext | tag (16 bytes)
+    """
+
+    MAGIC = b"LPGC"
+    VERSION = 1
+    CHUNK_SIZE = 1 << 20
+    KEY_SIZE = 32
+    TAG_SIZE = 16
+
+    _HEADER = struct.Struct("<4sBI8s")
+    _FRAME = struct.Struct("<BI")
+
+    def __init__(self, key, chunk_size=CHUNK_SIZE):
+        """
+        Initialize the cipher.
+
+        Args:
+            key: 32-byte AES-256 key
+            chunk_size: Plaintext bytes per sealed chunk
+        """
+        if len(key) != self.KEY_SIZE:
+            raise ValueError(f"Encryption key must be {self.KEY_SIZE} bytes")
+        self.key = bytes(key)
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def generate_key(cls):
+        """
+        Generate a random AES-256 key.
+
+        Returns:
+            key: 32 random bytes
+        """
+        return Random.get_random_bytes(cls.KEY_SIZE)
+
+    def _seal(self, header, index, final, chunk, associated_data):
+        nonce = header[-8:] + struct.pack(">I", index)
+        cipher = AES.new(self.key, AES.MODE_GCM, nonce=nonce, mac_len=self.TAG_SIZE)
+        cipher.update(header + struct.pack("<IB", index, final) + associated_data)
+        ciphertext, tag = cipher.encrypt_and_digest(chunk)
+        return self._FRAME.pack(final, len(ciphertext)) + ciphertext + tag
+
+    def _chunks(self, buffers):
+        """
+        Re-slice a sequence of byte buffers into chunk_size pieces.
+
+        Args:
+            buffers: Iterable of bytes-like objects
+
+        Returns:
+            chunks: Generator of bytes-like chunks (the last one may be shorter)
+        """
+        pending = bytearray()
+        for buffer in buffers:
+            view = memoryview(buffer).cast("B")
+            while len(view):
+                # Large buffers are sliced directly; small ones are accumulated
+                if not pending and len(view) >= self.chunk_size:
+                    yield view[:self.chunk_size]
+                    view = view[self.chunk_size:]
+                    continue
+                take = min(self.chunk_size - len(pending), len(view))
+                pending += view[:take]
+                view = view[take:]
+                if len(pending) == self.chunk_size:
+                    yield bytes(pending)
+                    pending.clear()
+        yield bytes(pending)
+
+    def encrypt_stream(self, buffers, associated_data=b""):
+        """
+        Encrypt a sequence of byte buffers as a stream of sealed chunks.
+
+        Args:
+            buffers: Iterable of bytes-like objects forming the plaintext
+            associated_data: Optional bytes authenticated but not encrypted
+
+        Returns:
+            stream: Generator of ciphertext bytes
+        """
+        header = self._HEADER.pack(self.MAGIC, self.VERSION, self.chunk_size, Random.get_random_bytes(8))
+        yield header
+
+        # Hold one chunk back so the last one can be flagged as final
+        index = 0
+        previous = None
+        for chunk in self._chunks(buffers):
+            if previous is not None:
+                yield self._seal(header, index, 0, previous, associated_data)
+                index += 1
+            previous = chunk
+        yield self._seal(header, index, 1, previous, associated_data)
+
+    def encrypt(self, data, associated_data=b""):
+        """
+        Encrypt a bytes payload.
+
+        Args:
+            data: Plaintext bytes
+            associated_data: Optional bytes authenticated but not encrypted
+
+        Returns:
+            encrypted: Sealed payload bytes
+        """
+        return b"".join(self.encrypt_stream([data], associated_data))
+
+    def decrypt_stream(self, readable, associated_data=b""):
+        """
+        Decrypt a sealed stream chunk by chunk.
+
+        Args:
+            readable: File-like object with the sealed payload
+            associated_data: Bytes that were authenticated at encryption time
+
+        Returns:
+            plaintext: Generator of plaintext chunks
+        """
+        header = readable.read(self._HEADER.size)
+        if len(header) != self._HEADER.size:
+            raise ValueError("Truncated encrypted payload")
+        magic, version, _, _ = self._HEADER.unpack(header)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Not an encrypted payload")
+
+        index = 0
+        while True:
+            frame = readable.read(self._FRAME.size)
+            if len(frame) != self._FRAME.size:
+                raise ValueError("Truncated encrypted payload")
+            final, length = self._FRAME.unpack(frame)
+            ciphertext = readable.read(length)
+            tag = readable.read(self.TAG_SIZE)
+            if len(ciphertext) != length or len(tag) != self.TAG_SIZE:
+                raise ValueError("Truncated encrypted payload")
+
+            nonce = header[-8:] + struct.pack(">I", index)
+            cipher = AES.new(self.key, AES.MODE_GCM, nonce=nonce, mac_len=self.TAG_SIZE)
+            cipher.update(header + struct.pack("<IB", index, final) + associated_data)
+            # Raises ValueError if the chunk was tampered with
+            yield cipher.decrypt_and_verify(ciphertext, tag)
+
+            if final:
+                return
+            index += 1
+
+    def decrypt(self, encrypted, associated_data=b""):
+        """
+        Decrypt a sealed payload.
+
+        Args:
+            encrypted: Sealed payload bytes
+            associated_data: Bytes that were authenticated at encryption time
+
+        Returns:
+            data: Plaintext bytes
+        """
+        return b"".join(self.decrypt_stream(io.BytesIO(encrypted), associated_data))
@@ -0,0 +1,235 @@
+import io
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+
+
+def parse_part(content, columns=None):
+    """
+    Parse one CSV part of a backup.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        content: CSV bytes holding whole records
+        columns: Column names for parts without a header line (None if the part starts with the header)
+
+    Returns:
+        part: DataFrame with the date column converted to datetime
+    """
+    if columns is None:
+        part = pd.read_csv(io.BytesIO(content))
+    else:
+        part = pd.read_csv(io.BytesIO(content), header=None, names=columns)
+    if 'date' in part.columns:
+        part['date'] = pd.to_datetime(part['date'])
+    return part
+
+
+class RestorePipeline:
+    """
+    Parallel restore of transaction backups.
+
+    Parts listed in a backup manifest are downloaded on a bounded thread pool
+    and handed to a process pool for CSV parsing and date conversion as soon as
+    they arrive, so downloading and parsing overlap and each stage scales with
+    bandwidth and cores respectively. Single-file backups are split into
+    line-aligned parts locally and parsed the same way.
+
+    Parts are cut at line breaks, which may fall inside a quoted multi-line
+    field, so consecutive parts are grouped into segments that start on a
+    record boundary (an even number of quotes before them) and each segment is
+    parsed as a whole. The restored bytes are checked against the manifest's
+    SHA-256 digest as they arrive.
+    """
+
+    # Parse process pools shared by every restore in this process, by worker count
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, backup_engine, download_workers=8, parse_workers=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            backup_engine: IncrementalBackup used to read manifests and fetch parts
+            download_workers: Maximum concurrent part downloads
+            parse_workers: Worker processes for parsing (defaults to the CPU count; 0 parses in this process)
+        """
+        self.backup_engine = backup_engine
+        self.download_workers = download_workers
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.logger = logging.getLogger("lighthouse")
+
+    def _parse_pool(self):
+        """
+        Process pool for parsing, created on first use and shared by later restores.
+
+        Returns:
+            pool: ProcessPoolExecutor instance
+        """
+        with self._pools_lock:
+            pool = self._pools.get(self.parse_workers)
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+                self._pools[self.parse_workers] = pool
+            return pool
+
+    def _discard_pool(self, pool):
+        with self._pools_lock:
+            if self._pools.get(self.parse_workers) is pool:
+                del self._pools[self.parse_workers]
+        pool.shutdown(wait=False)
+
+    @staticmethod
+    def _header(content):
+        """
+        Column names from the header line of the first part.
+
+        Args:
+            content: CSV bytes starting with the header line
+
+        Returns:
+            columns: List of column names
+        """
+        end = content.find(b"\n")
+        return list(pd.read_csv(io.BytesIO(content[:None if end < 0 else end + 1])).columns)
+
+    def restore(self, cid, progress=None):
+        """
+        Restore a backup into a transaction DataFrame.
+
+        Args:
+            cid: Manifest CID, or the CID of a single-file backup
+            progress: Optional callable(done, total, stage) called as parts are downloaded and segments parsed
+
+        Returns:
+            df: Transaction DataFrame with categorical category and description columns
+
+        Raises:
+            ValueError: If the restored content does not match the manifest
+        """
+        report = progress or (lambda done, total, stage: None)
+
+        content = self.backup_engine.client.download_file(cid)
+        manifest = self.backup_engine.parse_manifest(content)
+        if manifest is None:
+            # Single-file backup: parse it in line-aligned parts
+            sources = [bytes(part) for part in self.backup_engine.chunker.chunks(content)]
+        else:
+            sources = manifest["chunks"]
+        total = len(sources)
+        if total == 0:
+            return pd.DataFrame()
+
+        if self.parse_workers > 0:
+            parse_pool = self._parse_pool()
+        else:
+            parse_pool = ThreadPoolExecutor(max_workers=1)
+
+        digest = hashlib.sha256()
+        columns = None
+        parsing = {}
+        parts = {} if manifest is not None else dict(enumerate(sources))
+        next_part = 0
+        quotes = 0
+        segment = []
+
+        def submit_segment():
+            nonlocal segment
+            index = len(parsing)
+            parsing[parse_pool.submit(parse_part, b"".join(segment), None if index == 0 else columns)] = index
+            segment = []
+
+        def consume_ready():
+            nonlocal next_part, quotes
+            # Parts join segments in order, as soon as every earlier part has arrived;
+            # a segment ends where a part starts on a record boundary
+            while next_part in parts:
+                part = parts.pop(next_part)
+                digest.update(part)
+                if segment and quotes % 2 == 0 and segment[-1].endswith(b"\n"):
+                    submit_segment()
+                segment.append(part)
+                quotes += part.count(b'"')
+                next_part += 1
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.download_workers) as download_pool:
+                if manifest is None:
+                    downloads = {}
+                else:
+                    downloads = {
+                        download_pool.submit(self.backup_engine.fetch_chunk, chunk): i for i, chunk in enumerate(sources)
+                    }
+                downloaded = len(parts)
+                report(downloaded, total, "download")
+
+                # The header is in the first part, which is consumed before any other
+                if 0 in parts:
+                    columns = self._header(parts[0])
+                consume_ready()
+
+                for future in as_completed(downloads):
+                    parts[downloads[future]] = future.result()
+                    downloaded += 1
+                    report(downloaded, total, "download")
+                    if columns is None and 0 in parts:
+                        columns = self._header(parts[0])
+                    consume_ready()
+
+            if manifest is not None and digest.hexdigest() != manifest["sha256"]:
+                raise ValueError(f"Backup {cid} does not match its manifest")
+            submit_segment()
+
+            frames = [None] * len(parsing)
+            for parsed, future in enumerate(as_completed(parsing), start=1):
+                frames[parsing[future]] = future.result()
+                report(parsed, len(parsing), "parse")
+        except BrokenProcessPool:
+            # A worker died; later restores start a fresh pool
+            self._discard_pool(parse_pool)
+            raise
+        finally:
+            for future in parsing:
+                future.cancel()
+            if self.parse_workers == 0:
+                parse_pool.shutdown()
+
+        df = pd.concat(frames, ignore_index=True)
+        self.logger.info(f"Restored {len(df)} transactions from {total} parts of {cid} in {len(frames)} segments")
+        return DataProcessor.optimize_dtypes(df)
+
+    @staticmethod
+    def merge(current, restored):
+        """
+        Merge restored transactions into the current ones.
+
+        Args:
+            current: Current transaction DataFrame (may be None)
+            restored: Restored transaction DataFrame
+
+        Returns:
+            merged: Current transactions plus the restored ones they do not contain, newest first
+        """
+        if current is None or len(current) == 0:
+            return restored
+
+        # Skip restored transactions that are already present
+        columns = [column for column in ('date', 'amount', 'description', 'category')
+                   if column in current.columns and column in restored.columns]
+        if columns:
+            existing = pd.MultiIndex.from_frame(current[columns].astype(object))
+            restored = restored[~pd.MultiIndex.from_frame(restored[columns].astype(object)).isin(existing)]
+
+        merged = pd.concat([current, restored], ignore_index=True)
+        if 'date' in merged.columns:
+            merged = merged.sort_values('date', ascending=False, kind='stable')
+        return DataProcessor.optimize_dtypes(merged.reset_index(drop=True))
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+
+from utils.transaction_store import TransactionStore
+
+
+class TransactionPartitions:
+    """
+    Transactions of many users, partitioned by user.
+
+    Every user's transactions live in their own partition directory (a
+    TransactionStore: snapshot segment files plus a write-ahead log) below a
+    common root, so loading a user only reads that user's files. A SQLite
+    partition index in the root records each partition's size and date range
+    without opening it. Loaded partitions are kept in an LRU bounded by count
+    and by frame size; evicted partitions are checkpointed, so whatever a
+    session still references is served from the snapshot mappings, and are
+    dropped once no session uses them.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS partitions (
+            partition TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL DEFAULT 0,
+            size_bytes INTEGER NOT NULL DEFAULT 0,
+            first_date TEXT,
+            last_date TEXT,
+            seq INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            accessed_at REAL
+        );
+    """
+
+    INDEX_FILE = "partitions.db"
+
+    # Partition sets shared by every page render in this process
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, root=None, max_partitions=32, max_bytes=512 * 1024 * 1024, **store_kwargs):
+        """
+        Open the partitioned store.
+
+        Args:
+            root: Directory holding the partitions (defaults to TRANSACTION_STORE_DIR or ~/.finsecure/transactions)
+            max_partitions: Maximum number of partitions kept loaded
+            max_bytes: Maximum combined frame size of the loaded partitions
+            **store_kwargs: Passed to each TransactionStore
+        """
+        self.root = root or os.getenv(
+            "TRANSACTION_STORE_DIR", os.path.join(os.path.expanduser("~"), ".finsecure", "transactions")
+        )
+        self.max_partitions = max_partitions
+        self.max_bytes = max_bytes
+        self.store_kwargs = store_kwargs
+        self.logger = logging.getLogger("transactions")
+
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._hot = OrderedDict()
+        # Partitions evicted from the LRU but still referenced by a session
+        self._live = weakref.WeakValueDictionary()
+
+        self._conn = sqlite3.connect(os.path.join(self.root, self.INDEX_FILE), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+            indexed = self._conn.execute("SELECT COUNT(*) FROM partitions").fetchone()[0]
+        if not indexed:
+            self.rebuild_index()
+
+    @classmethod
+    def shared(cls, root=None, **kwargs):
+        """
+        Get the process-wide partitioned store of a root directory.
+
+        Args:
+            root: Directory holding the partitions
+            **kwargs: Passed to the constructor
+
+        Returns:
+            partitions: TransactionPartitions instance
+        """
+        with cls._shared_lock:
+            partitions = cls._shared.get(root)
+            if partitions is None:
+                partitions = cls(root, **kwargs)
+                cls._shared[root] = partitions
+            return partitions
+
+    @staticmethod
+    def partition_key(user_id):
+        """
+        Name of a user's partition.
+
+        Args:
+            user_id: User identifier (Replit user id, or the Lighthouse API key without Replit Auth)
+
+        Returns:
+            partition: Partition name, a hash of the user id
+        """
+        return hashlib.sha256(str(user_id or "").encode("utf-8")).hexdigest()[:16]
+
+    def directory(self, user_id):
+        """
+        Directory of a user's partition.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            directory: Partition directory path
+        """
+        return os.path.join(self.root, self.partition_key(user_id))
+
+    @staticmethod
+    def _frame_bytes(store):
+        return int(store.frame.memory_usage(index=True).sum())
+
+    def get(self, user_id):
+        """
+        Load a user's partition, creating it on first use.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            store: TransactionStore of the user
+        """
+        partition = self.partition_key(user_id)
+        with self._lock:
+            store = self._hot.pop(partition, None)
+            if store is None:
+                # Reuse a partition a session still holds, so it never has two writers
+                store = self._live.get(partition)
+                if store is None:
+                    store = TransactionStore(os.path.join(self.root, partition), **self.store_kwargs)
+                    self._live[partition] = store
+                    self._record(partition, store)
+                self._touch(partition)
+            self._hot[partition] = store
+            self._evict()
+        return store
+
+    def _evict(self):
+        """
+        Unload least recently used partitions until the LRU is within its bounds.
+        """
+        total = sum(self._frame_bytes(store) for store in self._hot.values())
+        while len(self._hot) > 1 and (len(self._hot) > self.max_partitions or total > self.max_bytes):
+            partition, store = self._hot.popitem(last=False)
+            total -= self._frame_bytes(store)
+            try:
+                store.release()
+                self._record(partition, store)
+            except Exception as e:
+                self.logger.error(f"Error unloading transaction partition {partition}: {str(e)}")
+
+    def release(self):
+        """
+        Checkpoint every loaded partition and refresh its index entry.
+        """
+        with self._lock:
+            for partition, store in self._hot.items():
+                store.release()
+                self._record(partition, store)
+
+    # Partition index
+
+    def _touch(self, partition):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE partitions SET accessed_at = ? WHERE partition = ?", (time.time(), partition)
+            )
+
+    def _record(self, partition, store):
+        """
+        Update a partition's index entry from its loaded store.
+
+        Args:
+            partition: Partition name
+            store: TransactionStore of the partition
+        """
+        frame = store.frame
+        dates = frame['date'] if 'date' in frame.columns and len(frame) else None
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO partitions (partition, rows, size_bytes, first_date, last_date, seq, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (partition) DO UPDATE SET rows = excluded.rows, size_bytes = excluded.size_bytes, "
+                "first_date = excluded.first_date, last_date = excluded.last_date, seq = excluded.seq, "
+                "updated_at = excluded.updated_at",
+                (
+                    partition,
+                    len(frame),
+                    self._frame_bytes(store),
+                    None if dates is None else dates.min().isoformat(),
+                    None if dates is None else dates.max().isoformat(),
+                    store.version,
+                    time.time()
+                )
+            )
+
+    def rebuild_index(self):
+        """
+        Index every partition directory below the root from its snapshot metadata.
+
+        Returns:
+            indexed: Number of partitions indexed
+        """
+        rows = []
+        for entry in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, entry)
+            if not os.path.isdir(path):
+                continue
+            snapshot = TransactionStore._snapshot_dir(path)
+            meta = {}
+            if snapshot is not None and os.path.exists(os.path.join(snapshot, "meta.json")):
+                with open(os.path.join(snapshot, "meta.json")) as f:
+                    meta = json.load(f)
+            rows.append((entry, meta.get("rows", 0), meta.get("seq", 0), time.time()))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO partitions (partition, rows, seq, updated_at) VALUES (?, ?, ?, ?)", rows
+            )
+        if rows:
+            self.logger.info(f"Indexed {len(rows)} transaction partitions")
+        return len(rows)
+
+    def partitions(self):
+        """
+        List the indexed partitions, without loading any.
+
+        Returns:
+            partitions: List of dicts with partition, directory, rows, size_bytes,
+                first_date, last_date, seq, updated_at and accessed_at
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM partitions ORDER BY partition").fetchall()
+        return [dict(row, directory=os.path.join(self.root, row["partition"])) for row in rows]
+
+    def loaded(self):
+        """
+        Names of the partitions currently in the LRU, least recently used first.
+
+        Returns:
+            partitions: List of partition names
+        """
+        with self._lock:
+            return list(self._hot)
@@ -0,0 +1,572 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import struct
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+from utils.monthly_summary import IncrementalMonthlySummary
+
+
+class TransactionStore:
+    """
+    Crash-safe local store for a user's transactions.
+
+    Every mutation (add, update, delete) is appended to a write-ahead log and
+    fsynced before it is acknowledged, so edits survive a crash without waiting
+    for a remote upload. Concurrent writers share fsyncs: whoever syncs first
+    covers every record written before it (group commit). On open, the latest
+    columnar snapshot is loaded and the log replayed on top of it; a torn record
+    at the end of the log is discarded. Once the log grows past a threshold it is
+    checkpointed into a new snapshot and truncated.
+
+    The monthly summary of the transactions is updated as changes are applied
+    and stored in each snapshot's metadata, so it survives restarts without a
+    rebuild from the full history.
+
+    Snapshot columns are memory-mapped read-only, so the transactions of a
+    checkpointed store live in the OS page cache, shared by every session and
+    by other processes reading the same snapshot, rather than on each
+    process's heap.
+
+    Layout of the store directory:
+        CURRENT             name of the current snapshot directory
+        snapshot-<seq>/     meta.json plus one .npy file per column
+        wal.log             records of length (uint32) | crc32 (uint32) | JSON
+    """
+
+    RECORD = struct.Struct("<II")
+
+    def __init__(self, directory, checkpoint_records=1000, checkpoint_bytes=16 * 1024 * 1024, commit_delay=0.002):
+        """
+        Open (or create) a store.
+
+        Args:
+            directory: Store directory
+            checkpoint_records: Log records after which a checkpoint is written
+            checkpoint_bytes: Log size after which a checkpoint is written
+            commit_delay: Seconds a committing writer waits for others to join its fsync
+        """
+        self.directory = directory
+        self.checkpoint_records = checkpoint_records
+        self.checkpoint_bytes = checkpoint_bytes
+        self.commit_delay = commit_delay
+        self.logger = logging.getLogger("transactions")
+
+        os.makedirs(directory, exist_ok=True)
+        self.wal_path = os.path.join(directory, "wal.log")
+
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._wal_records = 0
+
+        self._frame, self._seq, self._next_id, self._summary = self.read_snapshot(directory)
+        self._replay()
+        self._wal = open(self.wal_path, "ab")
+        self._synced_seq = self._written_seq = self._seq
+
+    @property
+    def frame(self):
+        """
+        Current transactions, newest first, indexed by transaction id.
+
+        The frame is replaced, not modified, by mutations, so callers may keep it.
+
+        Returns:
+            df: Transaction DataFrame
+        """
+        return self._frame
+
+    def __len__(self):
+        return len(self._frame)
+
+    @property
+    def version(self):
+        """
+        Sequence number of the last change.
+
+        Returns:
+            seq: Sequence number, increasing with every change
+        """
+        return self._seq
+
+    # Snapshots
+
+    @staticmethod
+    def _snapshot_dir(directory):
+        current = os.path.join(directory, "CURRENT")
+        if not os.path.exists(current):
+            return None
+        with open(current) as f:
+            return os.path.join(directory, f.read().strip())
+
+    @staticmethod
+    def _fsync_path(path):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _write_snapshot(self, frame, seq, summary=None):
+        """
+        Write a columnar snapshot and make it current.
+
+        Args:
+            frame: Transactions to store
+            seq: Sequence number of the last log record included
+            summary: Optional IncrementalMonthlySummary of the transactions
+        """
+        name = f"snapshot-{seq:012d}"
+        if os.path.exists(os.path.join(self.directory, name)):
+            # The snapshot of this seq may be current and mapped, so it is never overwritten
+            name = f"{name}-{time.time_ns()}"
+        path = os.path.join(self.directory, name)
+        # Written under a temporary name and renamed once complete
+        building = os.path.join(self.directory, f"building-{name}")
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building)
+
+        columns = [{"name": "id", "kind": "index", "file": "id.npy"}]
+        arrays = {"id.npy": frame.index.to_numpy(dtype=np.int64)}
+        for i, column_name in enumerate(frame.columns):
+            column = frame[column_name]
+            spec = {"name": column_name}
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                spec["kind"] = "categorical"
+                spec["categories"] = column.cat.categories.tolist()
+                values = column.cat.codes.to_numpy()
+            elif pd.api.types.is_datetime64_any_dtype(column):
+                spec["kind"] = "datetime"
+                spec["unit"] = np.datetime_data(column.dtype)[0]
+                values = column.to_numpy().view(np.int64)
+            elif column.dtype.kind in "biuf":
+                spec["kind"] = "numeric"
+                values = column.to_numpy()
+            else:
+                # Other columns are stored dictionary-encoded and restored as objects
+                spec["kind"] = "string"
+                codes, uniques = pd.factorize(column)
+                spec["categories"] = [str(value) for value in uniques]
+                values = codes
+            spec["file"] = f"{i}.npy"
+            columns.append(spec)
+            arrays[spec["file"]] = values
+
+        for file_name, values in arrays.items():
+            with open(os.path.join(building, file_name), "wb") as f:
+                np.save(f, np.ascontiguousarray(values), allow_pickle=False)
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta = {"seq": seq, "rows": len(frame), "next_id": self._next_id, "columns": columns}
+        if summary is not None:
+            meta["monthly_summary"] = summary.to_dict()
+        with open(os.path.join(building, "meta.json"), "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._fsync_path(building)
+        os.rename(building, path)
+
+        # Switch CURRENT atomically, then drop older snapshots
+        current_tmp = os.path.join(self.directory, "CURRENT.tmp")
+        with open(current_tmp, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current_tmp, os.path.join(self.directory, "CURRENT"))
+        self._fsync_path(self.directory)
+
+        for entry in os.listdir(self.directory):
+            if entry.startswith(("snapshot-", "building-")) and entry != name:
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+    @classmethod
+    def read_snapshot(cls, directory):
+        """
+        Load the current snapshot of a store with its columns memory-mapped.
+
+        The log is not replayed, so this is safe to call from processes other
+        than the one writing the store.
+
+        Args:
+            directory: Store directory
+
+        Returns:
+            frame: Transactions in the snapshot, backed by read-only mappings of the column files
+            seq: Sequence number of the last log record included
+            next_id: Next transaction id to assign
+            summary: IncrementalMonthlySummary stored with the snapshot, or None
+        """
+        path = cls._snapshot_dir(directory)
+        if path is None:
+            empty = pd.DataFrame(index=pd.Index([], dtype=np.int64, name="id"))
+            return empty, 0, 1, None
+
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+
+        data = {}
+        index = None
+        for spec in meta["columns"]:
+            file_path = os.path.join(path, spec["file"])
+            # Empty arrays cannot be mapped
+            values = np.load(file_path, mmap_mode="r" if meta["rows"] else None, allow_pickle=False)
+            if spec["kind"] == "index":
+                index = pd.Index(values, name="id", copy=False)
+            elif spec["kind"] == "categorical":
+                data[spec["name"]] = pd.Categorical.from_codes(values, categories=spec["categories"], validate=False)
+            elif spec["kind"] == "string":
+                data[spec["name"]] = np.asarray(spec["categories"] + [None], dtype=object)[values]
+            elif spec["kind"] == "datetime":
+                data[spec["name"]] = values.view(f"datetime64[{spec['unit']}]")
+            else:
+                data[spec["name"]] = values
+
+        summary = meta.get("monthly_summary")
+        if summary is not None:
+            summary = IncrementalMonthlySummary.from_dict(summary)
+        return pd.DataFrame(data, index=index, copy=False), meta["seq"], meta["next_id"], summary
+
+    # Write-ahead log
+
+    @classmethod
+    def _read_log(cls, wal_path):
+        """
+        Parse the intact records of a log.
+
+        Args:
+            wal_path: Log file path
+
+        Returns:
+            records: Change records in log order
+            valid: Length of the intact prefix of the log
+            size: Length of the log file
+        """
+        if not os.path.exists(wal_path):
+            return [], 0, 0
+
+        with open(wal_path, "rb") as f:
+            content = f.read()
+
+        records = []
+        offset = 0
+        while offset + cls.RECORD.size <= len(content):
+            length, checksum = cls.RECORD.unpack_from(content, offset)
+            payload = content[offset + cls.RECORD.size:offset + cls.RECORD.size + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+            records.append(json.loads(payload))
+            offset += cls.RECORD.size + length
+        return records, offset, len(content)
+
+    def _replay(self):
+        """
+        Apply the log records written after the snapshot, discarding a torn tail.
+        """
+        records, valid, size = self._read_log(self.wal_path)
+
+        replayed = 0
+        for record in records:
+            if record["seq"] <= self._seq:
+                # Already in the snapshot (a crash between a checkpoint and the log truncation)
+                continue
+            self._apply(record)
+            self._seq = record["seq"]
+            replayed += 1
+        # Only records missing from the snapshot call for a checkpoint
+        self._wal_records = replayed
+
+        if valid < size:
+            # Incomplete record from a crash mid-write
+            self.logger.warning(f"Discarding {size - valid} bytes of torn log in {self.wal_path}")
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(valid)
+                os.fsync(f.fileno())
+        if replayed:
+            self.logger.info(f"Replayed {replayed} logged transaction changes")
+
+    @classmethod
+    def read_frame(cls, directory):
+        """
+        Read a store's current transactions without opening it for writing.
+
+        The snapshot is memory-mapped and the log replayed on top of it; the
+        files are left untouched, so this is safe while another process writes
+        the store.
+
+        Args:
+            directory: Store directory
+
+        Returns:
+            frame: Transaction DataFrame indexed by transaction id
+        """
+        frame, seq = cls.read_snapshot(directory)[:2]
+        for record in cls._read_log(os.path.join(directory, "wal.log"))[0]:
+            if record["seq"] > seq:
+                frame = cls.apply_record(frame, record)
+        return frame
+
+    def _append(self, record):
+        """
+        Log a record, apply it and wait until it is durable.
+
+        Args:
+            record: Change record without a sequence number
+
+        Returns:
+            seq: Sequence number of the record
+        """
+        with self._lock:
+            self._seq += 1
+            record["seq"] = self._seq
+            payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+            self._wal.write(self.RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._wal.flush()
+            self._wal_records += 1
+            self._written_seq = seq = self._seq
+            self._apply(record)
+
+        self._commit(seq)
+
+        with self._lock:
+            if self._wal_records >= self.checkpoint_records or self._wal.tell() >= self.checkpoint_bytes:
+                self.checkpoint()
+        return seq
+
+    def _commit(self, seq):
+        """
+        fsync the log up to a record, sharing the fsync with concurrent writers.
+
+        Args:
+            seq: Sequence number that must be durable
+        """
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                # Another writer's fsync already covered this record
+                return
+            if self.commit_delay:
+                time.sleep(self.commit_delay)
+            with self._lock:
+                target = self._written_seq
+                fd = self._wal.fileno()
+            os.fsync(fd)
+            self._synced_seq = target
+
+    def checkpoint(self):
+        """
+        Write the current state as a snapshot and truncate the log.
+        """
+        with self._lock:
+            self._write_snapshot(self._frame, self._seq, self.monthly_summary())
+            # Serve the frame from the new snapshot's mappings instead of the heap
+            self._frame = self.read_snapshot(self.directory)[0]
+            self._wal.truncate(0)
+            self._wal.seek(0)
+            os.fsync(self._wal.fileno())
+            self._wal_records = 0
+            self._synced_seq = self._written_seq = self._seq
+
+    # Changes
+
+    @staticmethod
+    def _encode_rows(rows):
+        encoded = {}
+        for column in rows.columns:
+            values = rows[column]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                encoded[column] = [None if pd.isna(value) else value.isoformat() for value in values]
+            else:
+                encoded[column] = [None if pd.isna(value) else value for value in values.astype(object)]
+        return encoded
+
+    @staticmethod
+    def _encode_changes(changes):
+        return {
+            column: pd.Timestamp(value).isoformat() if isinstance(value, (pd.Timestamp, np.datetime64)) else value
+            for column, value in changes.items()
+        }
+
+    @staticmethod
+    def apply_record(frame, record):
+        """
+        Apply a change record to a transaction frame.
+
+        Args:
+            frame: Transaction DataFrame indexed by transaction id (not modified)
+            record: Change record
+
+        Returns:
+            frame: New transaction DataFrame
+        """
+        op = record["op"]
+        if op == "add":
+            rows = pd.DataFrame(record["rows"], index=pd.Index(record["ids"], dtype=np.int64, name="id"))
+            if 'date' in rows.columns:
+                rows['date'] = pd.to_datetime(rows['date'])
+            frame = pd.concat([rows, frame]) if len(frame) else rows
+        elif op == "update":
+            frame = frame.copy()
+            ids = frame.index.intersection(record["ids"])
+            for column, value in record["changes"].items():
+                if column == 'date':
+                    value = pd.Timestamp(value)
+                if isinstance(frame[column].dtype, pd.CategoricalDtype) and value not in frame[column].cat.categories:
+                    frame[column] = frame[column].cat.add_categories([value])
+                frame.loc[ids, column] = value
+        elif op == "delete":
+            frame = frame.drop(index=frame.index.intersection(record["ids"]))
+        else:
+            raise ValueError(f"Unknown transaction log record: {op}")
+
+        DataProcessor._encode_categoricals(frame)
+        return frame
+
+    def _apply(self, record):
+        """
+        Apply a change record to the in-memory frame.
+
+        Args:
+            record: Change record
+        """
+        previous = self._frame
+        self._frame = self.apply_record(previous, record)
+        if record["op"] == "add":
+            self._next_id = max(self._next_id, max(record["ids"], default=0) + 1)
+        self._update_summary(previous, record)
+
+    def _update_summary(self, previous, record):
+        """
+        Apply a change record to the monthly summary, touching only the affected months.
+
+        Args:
+            previous: Transaction frame before the change
+            record: Change record, already applied to the frame
+        """
+        summary = self._summary
+        if summary is None or summary.version != record["seq"] - 1:
+            # Rebuilt from the frame when next needed
+            self._summary = None
+            return
+
+        op = record["op"]
+        moved = op == "update" and not {'date', 'amount'}.isdisjoint(record["changes"])
+        try:
+            if op == "delete" or moved:
+                old = previous.loc[previous.index.intersection(record["ids"])]
+                for date, amount in zip(old['date'], old['amount']):
+                    if not (pd.isna(date) or pd.isna(amount)):
+                        summary.remove(date, amount)
+            if op == "add" or moved:
+                new = self._frame.loc[self._frame.index.intersection(record["ids"])]
+                for date, amount in zip(new['date'], new['amount']):
+                    if not (pd.isna(date) or pd.isna(amount)):
+                        summary.add(date, amount)
+            summary.version = record["seq"]
+        except (KeyError, ValueError, TypeError):
+            self._summary = None
+
+    def monthly_summary(self):
+        """
+        Monthly summary of the current transactions.
+
+        The summary is kept up to date as changes are applied and loaded with
+        the snapshot, so it is only rebuilt from the frame when neither applies
+        (e.g. after a replace). Callers must not modify it.
+
+        Returns:
+            summary: IncrementalMonthlySummary whose version is the store version
+        """
+        with self._lock:
+            if self._summary is None or self._summary.version != self._seq:
+                self._summary = IncrementalMonthlySummary.from_transactions(self._frame, self._seq)
+            return self._summary
+
+    def add(self, rows):
+        """
+        Durably add transactions.
+
+        Args:
+            rows: DataFrame of new transactions (date, amount, description, category, ...)
+
+        Returns:
+            df: Updated transaction frame
+        """
+        with self._lock:
+            ids = list(range(self._next_id, self._next_id + len(rows)))
+            self._next_id += len(rows)
+        self._append({"op": "add", "ids": ids, "rows": self._encode_rows(rows)})
+        return self._frame
+
+    def update(self, ids, changes):
+        """
+        Durably edit transactions.
+
+        Args:
+            ids: Transaction ids (frame index values) to edit
+            changes: Dict mapping column names to their new value
+
+        Returns:
+            df: Updated transaction frame
+        """
+        self._append({"op": "update", "ids": [int(i) for i in ids], "changes": self._encode_changes(changes)})
+        return self._frame
+
+    def delete(self, ids):
+        """
+        Durably delete transactions.
+
+        Args:
+            ids: Transaction ids (frame index values) to delete
+
+        Returns:
+            df: Updated transaction frame
+        """
+        self._append({"op": "delete", "ids": [int(i) for i in ids]})
+        return self._frame
+
+    def replace(self, df):
+        """
+        Durably replace all transactions, e.g. after a restore or a reset.
+
+        Args:
+            df: New transactions (None or empty to clear the store)
+
+        Returns:
+            df: New transaction frame
+        """
+        with self._lock:
+            frame = pd.DataFrame() if df is None else df.reset_index(drop=True)
+            frame.index = pd.Index(np.arange(self._next_id, self._next_id + len(frame), dtype=np.int64), name="id")
+            self._next_id += len(frame)
+            DataProcessor._encode_categoricals(frame)
+            self._frame = frame
+            self._summary = None
+            self._seq += 1
+            self.checkpoint()
+            return self._frame
+
+    def release(self):
+        """
+        Checkpoint logged changes, so the frame is served from the snapshot mappings.
+        """
+        with self._lock:
+            if self._wal_records:
+                self.checkpoint()
+
+    def close(self):
+        """
+        Checkpoint and close the log.
+        """
+        with self._lock:
+            self.release()
+            self._wal.close()
@@ -0,0 +1,188 @@
+from utils.transaction_store import TransactionStore
+from utils.transaction_partitions import TransactionPartitions
+
+
+class TransactionView:
+    """
+    A session's view of an account's shared transactions.
+
+    The view holds no copy of the transactions: without local edits its frame
+    is the store's frame, which every session shares and which is served from
+    the memory-mapped snapshot once checkpointed. Edits made through the view
+    are kept in a private overlay of change records, applied on top of the
+    current shared frame until they are committed to the store or discarded.
+    Rows added in the overlay carry negative provisional ids.
+    """
+
+    # Session state key holding the view
+    SESSION_KEY = 'transaction_view'
+
+    def __init__(self, store):
+        """
+        Initialize the view.
+
+        Args:
+            store: TransactionStore of the account
+        """
+        self.store = store
+        self._overlay = []
+        self._next_provisional_id = -1
+
+        # Frame built for the current base and overlay
+        self._base = None
+        self._frame = None
+
+    @classmethod
+    def for_session(cls, session_state, store):
+        """
+        Get the view of a session, creating it on first use or when the account changes.
+
+        Args:
+            session_state: Mapping holding per-session state (e.g. st.session_state)
+            store: TransactionStore of the session's account
+
+        Returns:
+            view: TransactionView instance
+        """
+        view = session_state.get(cls.SESSION_KEY)
+        if view is None or view.store is not store:
+            view = cls(store)
+            session_state[cls.SESSION_KEY] = view
+        return view
+
+    @classmethod
+    def load_session(cls, session_state, user_id, partitions=None):
+        """
+        Open a session's view of its user's partition and publish the transactions to the session.
+
+        Transactions are journaled locally in the user's own partition and shared
+        by the user's sessions through a memory-mapped snapshot; a session's unsaved
+        edits stay in its own overlay. The user id is the same one the other
+        per-user stores (analytics store, upload queue) are keyed by.
+
+        Args:
+            session_state: Mapping holding per-session state (e.g. st.session_state)
+            user_id: User identifier the partition is kept under (see AuthHandler.session_user_id)
+            partitions: TransactionPartitions holding the partition (defaults to the shared one)
+
+        Returns:
+            view: TransactionView instance; its store is the user's TransactionStore
+        """
+        store = (partitions or TransactionPartitions.shared()).get(user_id)
+        view = cls.for_session(session_state, store)
+        if len(view):
+            session_state['financial_data'] = view.frame
+        return view
+
+    @property
+    def frame(self):
+        """
+        Shared transactions with this session's uncommitted edits applied.
+
+        Returns:
+            df: Transaction DataFrame indexed by transaction id
+        """
+        base = self.store.frame
+        if not self._overlay:
+            return base
+        if self._frame is None or self._base is not base:
+            frame = base
+            for record in self._overlay:
+                frame = TransactionStore.apply_record(frame, record)
+            self._base, self._frame = base, frame
+        return self._frame
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def pending(self):
+        """
+        Number of uncommitted edits.
+
+        Returns:
+            count: Change records in the overlay
+        """
+        return len(self._overlay)
+
+    def _record(self, record):
+        self._overlay.append(record)
+        self._frame = None
+        return self.frame
+
+    def add(self, rows):
+        """
+        Add transactions to the overlay.
+
+        Args:
+            rows: DataFrame of new transactions
+
+        Returns:
+            df: Updated view frame
+        """
+        ids = list(range(self._next_provisional_id, self._next_provisional_id - len(rows), -1))
+        self._next_provisional_id -= len(rows)
+        return self._record({"op": "add", "ids": ids, "rows": TransactionStore._encode_rows(rows)})
+
+    def update(self, ids, changes):
+        """
+        Edit transactions in the overlay.
+
+        Args:
+            ids: Transaction ids to edit (stored or provisional)
+            changes: Dict mapping column names to their new value
+
+        Returns:
+            df: Updated view frame
+        """
+        return self._record({
+            "op": "update", "ids": [int(i) for i in ids], "changes": TransactionStore._encode_changes(changes)
+        })
+
+    def delete(self, ids):
+        """
+        Delete transactions in the overlay.
+
+        Args:
+            ids: Transaction ids to delete (stored or provisional)
+
+        Returns:
+            df: Updated view frame
+        """
+        return self._record({"op": "delete", "ids": [int(i) for i in ids]})
+
+    def commit(self):
+        """
+        Write the overlay to the store and clear it.
+
+        Edits of stored transactions are logged as they were made; provisional
+        rows are added once, in their final state.
+
+        Returns:
+            df: New shared transaction frame
+        """
+        if not self._overlay:
+            return self.store.frame
+
+        final = self.frame
+        for record in self._overlay:
+            stored_ids = [i for i in record["ids"] if i > 0]
+            if record["op"] == "update" and stored_ids:
+                self.store.update(stored_ids, record["changes"])
+            elif record["op"] == "delete" and stored_ids:
+                self.store.delete(stored_ids)
+
+        # Added in the order they appear in the view, so the store frame matches it
+        added = final[final.index < 0]
+        if len(added):
+            self.store.add(added.reset_index(drop=True))
+
+        self.discard()
+        return self.store.frame
+
+    def discard(self):
+        """
+        Drop the uncommitted edits.
+        """
+        self._overlay = []
+        self._base = self._frame = None
@@ -1,10 +1,11 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import time
+from utils.lazy_import import lazy_import
+
+go = lazy_import("plotly.graph_objects")
 
 def create_animated_metric(label, value, delta=None, prefix="$", animation_duration=1.5):
     """Creates an animated metric that counts up to the final value"""
@@ -126,7 +127,7 @@ def create_animated_chart(df, chart_type="spending"):
     """Create a chart with animation and interactions"""
     if chart_type == "spending":
         # Prepare data
-        expenses_by_category = df[df['amount'] < 0].groupby('category')['amount'].sum().abs().sort_values(ascending=False)
+        expenses_by_category = df[df['amount'] < 0].groupby('category', observed=True)['amount'].sum().abs().sort_values(ascending=False)
         
         # Create animated donut chart
         fig = go.Figure()
@@ -307,3 +308,15 @@ def loading_animation(seconds=1.5):
     """Displays a loading animation for the specified duration"""
     with st.spinner("Loading..."):
         time.sleep(seconds)
+
+def sync_status_caption(status, label="Lighthouse"):
+    """Shows the write-behind sync status of a saved object (see UploadQueue.status)"""
+    if status['state'] is None:
+        return
+    if status['state'] == 'pending':
+        st.caption(f"⏳ {label}: saving in the background...")
+    elif status['state'] == 'error':
+        st.caption(f"⚠️ {label}: upload failed, retrying ({status['error']})")
+    else:
+        synced_at = datetime.fromtimestamp(status['synced_at']).strftime('%H:%M:%S')
+        st.caption(f"✅ {label}: synced at {synced_at} (CID: {status['cid']})")
@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class UploadIndex:
+    """
+    Local cache of a Lighthouse account's upload list.
+
+    Uploads are kept in a SQLite table so listings, filtering and sorting are
+    served locally. A sync walks the paginated upload listing newest first and
+    stops at the first entry older than the newest createdAt already indexed, so
+    accounts with thousands of uploads only fetch what is new. Incremental syncs
+    never see deal status changes or deletions of indexed uploads, so every
+    `full_sync_interval` seconds a sync walks the whole listing instead and
+    replaces the account's index with it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS uploads (
+            account TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            file_name TEXT NOT NULL DEFAULT '',
+            size INTEGER NOT NULL DEFAULT 0,
+            created_ts REAL NOT NULL DEFAULT 0,
+            deal_status TEXT,
+            upload TEXT NOT NULL,
+            PRIMARY KEY (account, cid)
+        );
+        CREATE INDEX IF NOT EXISTS uploads_created ON uploads (account, created_ts);
+        CREATE TABLE IF NOT EXISTS content_ids (
+            account TEXT NOT NULL,
+            content_cid TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            uploaded_at REAL NOT NULL,
+            PRIMARY KEY (account, content_cid)
+        );
+        CREATE TABLE IF NOT EXISTS upload_sync (
+            account TEXT PRIMARY KEY,
+            last_created_ts REAL,
+            synced_at REAL,
+            full_synced_at REAL
+        );
+    """
+
+    # Columns the listing can be sorted by
+    SORT_COLUMNS = {
+        "createdAt": "created_ts",
+        "fileName": "file_name COLLATE NOCASE",
+        "fileSizeInBytes": "size"
+    }
+
+    def __init__(self, client, db_path=None, page_size=100, full_sync_interval=3600):
+        """
+        Initialize the index.
+
+        Args:
+            client: LighthouseClient providing get_uploads_page
+            db_path: SQLite database path (defaults to UPLOAD_INDEX_DB or ~/.finsecure/upload_index.db)
+            page_size: Uploads requested per page during a sync
+            full_sync_interval: Seconds between syncs of the full listing
+        """
+        self.client = client
+        self.db_path = db_path or os.getenv(
+            "UPLOAD_INDEX_DB", os.path.join(os.path.expanduser("~"), ".finsecure", "upload_index.db")
+        )
+        self.page_size = page_size
+        self.full_sync_interval = full_sync_interval
+        self.logger = logging.getLogger("lighthouse")
+
+        # Entries of different accounts share the database, keyed by a hash of the API key
+        self.account = hashlib.sha256((client.api_key or "").encode("utf-8")).hexdigest()[:16]
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def created_timestamp(value):
+        """
+        Convert an upload's createdAt to epoch seconds.
+
+        Args:
+            value: Epoch seconds or milliseconds, or an ISO 8601 date/time string
+
+        Returns:
+            timestamp: Epoch seconds (0 if missing or unparseable)
+        """
+        if isinstance(value, (int, float)):
+            # Lighthouse reports milliseconds
+            return value / 1000 if value > 1e11 else float(value)
+        if isinstance(value, str) and value:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                return 0.0
+        return 0.0
+
+    def _sync_state(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_created_ts, synced_at, full_synced_at FROM upload_sync WHERE account = ?",
+                (self.account,)
+            ).fetchone()
+        return (row["last_created_ts"], row["synced_at"], row["full_synced_at"]) if row else (None, None, None)
+
+    def sync(self, max_age=0, full=None):
+        """
+        Fetch uploads newer than the newest indexed one, or the full listing when due.
+
+        Args:
+            max_age: Skip an incremental sync if the last one is more recent than this many seconds
+            full: Walk the full listing (True), only new uploads (False), or
+                decide by full_sync_interval (None)
+
+        Returns:
+            added: Number of uploads added or updated
+        """
+        with self._sync_lock:
+            last_created, synced_at, full_synced_at = self._sync_state()
+            started = time.time()
+            if full is None:
+                full = full_synced_at is None or started - full_synced_at >= self.full_sync_interval
+            if not full and synced_at is not None and started - synced_at < max_age:
+                return 0
+
+            rows = []
+            newest = None if full else last_created
+            for upload in self.client.iter_uploads(page_size=self.page_size):
+                created = self.created_timestamp(upload.get('createdAt'))
+                # Uploads are listed newest first; everything from here on is indexed
+                if not full and last_created is not None and created < last_created:
+                    break
+                if not upload.get('cid'):
+                    continue
+                newest = created if newest is None else max(newest, created)
+                rows.append((
+                    self.account,
+                    upload['cid'],
+                    upload.get('fileName', ''),
+                    int(upload.get('fileSizeInBytes', 0) or 0),
+                    created,
+                    upload.get('dealStatus'),
+                    json.dumps(upload)
+                ))
+
+            with self._lock, self._conn:
+                if full:
+                    # The listing replaces the index, dropping uploads deleted since;
+                    # content uploaded before the listing and no longer in it is forgotten
+                    listed = {row[1] for row in rows}
+                    gone = [
+                        (self.account, row["cid"]) for row in self._conn.execute(
+                            "SELECT cid FROM content_ids WHERE account = ? AND uploaded_at < ?", (self.account, started)
+                        ).fetchall()
+                        if row["cid"] not in listed
+                    ]
+                    self._conn.executemany("DELETE FROM content_ids WHERE account = ? AND cid = ?", gone)
+                    self._conn.execute("DELETE FROM uploads WHERE account = ?", (self.account,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO uploads (account, cid, file_name, size, created_ts, deal_status, upload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO upload_sync (account, last_created_ts, synced_at, full_synced_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.account, newest, time.time(), started if full else full_synced_at)
+                )
+
+            if rows:
+                self.logger.info(f"Indexed {len(rows)} {'' if full else 'new '}Lighthouse uploads")
+            return len(rows)
+
+    def invalidate(self):
+        """
+        Make the next sync run regardless of max_age, e.g. after an upload.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE upload_sync SET synced_at = NULL WHERE account = ?", (self.account,))
+
+    def reset(self):
+        """
+        Drop the indexed uploads so the next sync fetches the full listing.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM uploads WHERE account = ?", (self.account,))
+            self._conn.execute("DELETE FROM upload_sync WHERE account = ?", (self.account,))
+
+    def known_cid(self, content_cid):
+        """
+        Find an upload of content with a locally computed CID.
+
+        Only uploads recorded with record_content are matched. The listing's CIDs
+        are not comparable with locally computed ones, since Lighthouse may store
+        the same content under a different CID version or DAG layout.
+
+        Args:
+            content_cid: CID computed from the content (see ContentId)
+
+        Returns:
+            cid: CID Lighthouse returned for the content, or None if it was never uploaded from here
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cid FROM content_ids WHERE account = ? AND content_cid = ?", (self.account, content_cid)
+            ).fetchone()
+        return row["cid"] if row else None
+
+    def record_content(self, content_cid, cid, size):
+        """
+        Remember the CID an upload of some content was stored under.
+
+        Args:
+            content_cid: CID computed from the content
+            cid: CID returned by Lighthouse
+            size: Content size in bytes
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_ids (account, content_cid, cid, size, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+                (self.account, content_cid, cid, size, time.time())
+            )
+
+    def forget_content(self, cid):
+        """
+        Drop known content stored under a CID, e.g. after it was removed from Lighthouse.
+
+        Args:
+            cid: CID returned by Lighthouse
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM content_ids WHERE account = ? AND cid = ?", (self.account, cid))
+            self._conn.execute("DELETE FROM uploads WHERE account = ? AND cid = ?", (self.account, cid))
+
+    def query(self, search=None, deal_status=None, sort="createdAt", descending=True, limit=None, offset=0):
+        """
+        List indexed uploads.
+
+        Args:
+            search: Optional case-insensitive substring of the file name or CID
+            deal_status: Optional dealStatus to filter by
+            sort: One of SORT_COLUMNS
+            descending: Sort order
+            limit: Optional maximum number of uploads to return
+            offset: Number of matching uploads to skip
+
+        Returns:
+            uploads: List of upload dictionaries as returned by Lighthouse
+            total: Number of matching uploads
+        """
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Cannot sort uploads by {sort}")
+
+        where = ["account = ?"]
+        params = [self.account]
+        if search:
+            where.append("(file_name LIKE ? ESCAPE '\\' OR cid LIKE ? ESCAPE '\\')")
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params.extend([pattern, pattern])
+        if deal_status:
+            where.append("deal_status = ?")
+            params.append(deal_status)
+        condition = " AND ".join(where)
+
+        order = f"{self.SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}, cid"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM uploads WHERE {condition}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT upload FROM uploads WHERE {condition} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [-1 if limit is None else limit, offset]
+            ).fetchall()
+
+        return [json.loads(row["upload"]) for row in rows], total
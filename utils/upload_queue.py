@@ -0,0 +1,312 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+
+class UploadQueue:
+    """
+    Write-behind persistence of app state to Lighthouse.
+
+    A save writes the serialized object to a local SQLite journal and returns
+    immediately. A background worker uploads journaled objects after a short
+    delay, so several saves of the same object in quick succession are
+    coalesced into one upload of the latest version. Pending saves survive a
+    restart: the journal is replayed when the queue starts. Failed uploads are
+    retried with exponential backoff.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pending_uploads (
+            account TEXT NOT NULL,
+            key TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            content BLOB NOT NULL,
+            version INTEGER NOT NULL,
+            queued_at REAL NOT NULL,
+            next_attempt_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            PRIMARY KEY (account, key)
+        );
+        CREATE TABLE IF NOT EXISTS synced_uploads (
+            account TEXT NOT NULL,
+            key TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            synced_at REAL NOT NULL,
+            PRIMARY KEY (account, key)
+        );
+    """
+
+    # Queues shared by every page render in this process
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, lighthouse_client, db_path=None, delay=2.0, retry_interval=5.0, max_retry_interval=300.0,
+                 user_id=None):
+        """
+        Initialize the queue.
+
+        Args:
+            lighthouse_client: LighthouseClient used for the uploads
+            db_path: SQLite journal path (defaults to UPLOAD_QUEUE_DB or ~/.finsecure/upload_queue.db)
+            delay: Seconds a save waits for further saves of the same object before uploading
+            retry_interval: Seconds before the first retry of a failed upload
+            max_retry_interval: Upper bound of the retry backoff
+            user_id: User identifier the journal entries are kept under (defaults to the client's API key)
+        """
+        self.client = lighthouse_client
+        self.db_path = db_path or os.getenv(
+            "UPLOAD_QUEUE_DB", os.path.join(os.path.expanduser("~"), ".finsecure", "upload_queue.db")
+        )
+        self.delay = delay
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.logger = logging.getLogger("lighthouse")
+
+        # Objects of different accounts share the journal, keyed by a hash of the user id
+        self.user_id = user_id or lighthouse_client.api_key
+        self.account = hashlib.sha256(str(self.user_id or "").encode("utf-8")).hexdigest()[:16]
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def shared(cls, lighthouse_client, db_path=None, user_id=None, **kwargs):
+        """
+        Get the process-wide queue for an account, started on first use.
+
+        Args:
+            lighthouse_client: LighthouseClient used for the uploads
+            db_path: SQLite journal path
+            user_id: User identifier, the same one the user's transaction partition is kept under
+                (defaults to the client's API key)
+            **kwargs: Passed to the constructor
+
+        Returns:
+            queue: Running UploadQueue instance
+        """
+        key = (db_path, user_id or lighthouse_client.api_key, lighthouse_client.api_key)
+        with cls._shared_lock:
+            queue = cls._shared.get(key)
+            if queue is None:
+                queue = cls(lighthouse_client, db_path=db_path, user_id=user_id, **kwargs)
+                queue.start()
+                cls._shared[key] = queue
+            return queue
+
+    def save(self, key, content, filename):
+        """
+        Journal a new version of an object for upload and return immediately.
+
+        Args:
+            key: Name of the object (e.g. "financial_data"); later saves replace pending ones
+            content: Serialized object bytes
+            filename: Filename to upload the object under
+
+        Returns:
+            version: Version number of this save
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            pending = self._conn.execute(
+                "SELECT version, queued_at, next_attempt_at, last_error FROM pending_uploads WHERE account = ? AND key = ?",
+                (self.account, key)
+            ).fetchone()
+            synced = self._conn.execute(
+                "SELECT version FROM synced_uploads WHERE account = ? AND key = ?", (self.account, key)
+            ).fetchone()
+            version = max(pending["version"] if pending else 0, synced["version"] if synced else 0) + 1
+
+            # Join the upload window of a pending save, so saves are never delayed indefinitely
+            if pending is not None and not pending["last_error"]:
+                queued_at, next_attempt_at = pending["queued_at"], pending["next_attempt_at"]
+            else:
+                queued_at, next_attempt_at = now, now + self.delay
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_uploads "
+                "(account, key, filename, content, version, queued_at, next_attempt_at, attempts, last_error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0, NULL)",
+                (self.account, key, filename, sqlite3.Binary(content), version, queued_at, next_attempt_at)
+            )
+        self._wakeup.set()
+        return version
+
+    def status(self, key):
+        """
+        Sync status of an object, without any network call.
+
+        Args:
+            key: Name of the object
+
+        Returns:
+            status: Dict with state ("pending", "error", "synced" or None if never saved),
+                the last synced cid and synced_at, and the pending save's queued_at and error
+        """
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT queued_at, attempts, last_error FROM pending_uploads WHERE account = ? AND key = ?",
+                (self.account, key)
+            ).fetchone()
+            synced = self._conn.execute(
+                "SELECT cid, synced_at FROM synced_uploads WHERE account = ? AND key = ?", (self.account, key)
+            ).fetchone()
+
+        if pending is not None:
+            state = "error" if pending["last_error"] else "pending"
+        else:
+            state = "synced" if synced is not None else None
+        return {
+            "state": state,
+            "cid": synced["cid"] if synced else None,
+            "synced_at": synced["synced_at"] if synced else None,
+            "queued_at": pending["queued_at"] if pending else None,
+            "attempts": pending["attempts"] if pending else 0,
+            "error": pending["last_error"] if pending else None
+        }
+
+    def pending_count(self):
+        """
+        Number of objects waiting for upload.
+
+        Returns:
+            count: Pending object count
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pending_uploads WHERE account = ?", (self.account,)
+            ).fetchone()[0]
+
+    def process_due(self, now=None):
+        """
+        Upload every journaled object that is due.
+
+        Args:
+            now: Current time (defaults to time.time())
+
+        Returns:
+            uploaded: Number of objects uploaded
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = self._conn.execute(
+                "SELECT key, filename, content, version, attempts FROM pending_uploads "
+                "WHERE account = ? AND next_attempt_at <= ? ORDER BY queued_at",
+                (self.account, now)
+            ).fetchall()
+
+        uploaded = 0
+        for row in due:
+            try:
+                cid = self.client.upload_bytes(bytes(row["content"]), row["filename"])
+            except Exception as e:
+                retry = min(self.retry_interval * 2 ** row["attempts"], self.max_retry_interval)
+                self.logger.error(f"Error uploading {row['key']} to Lighthouse: {str(e)}")
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "UPDATE pending_uploads SET attempts = attempts + 1, last_error = ?, next_attempt_at = ? "
+                        "WHERE account = ? AND key = ? AND version = ?",
+                        (str(e), time.time() + retry, self.account, row["key"], row["version"])
+                    )
+                continue
+
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO synced_uploads (account, key, cid, version, synced_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.account, row["key"], cid, row["version"], time.time())
+                )
+                # A newer save that arrived during the upload stays queued
+                self._conn.execute(
+                    "DELETE FROM pending_uploads WHERE account = ? AND key = ? AND version = ?",
+                    (self.account, row["key"], row["version"])
+                )
+            uploaded += 1
+        return uploaded
+
+    def _next_due_in(self):
+        """
+        Seconds until the next journaled object is due.
+
+        Returns:
+            delay: Seconds to sleep (None if nothing is pending)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM pending_uploads WHERE account = ?", (self.account,)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.process_due()
+            except Exception as e:
+                self.logger.error(f"Error processing upload queue: {str(e)}")
+
+            self._wakeup.wait(timeout=self._next_due_in())
+            self._wakeup.clear()
+
+    def start(self):
+        """
+        Start the background upload worker; journaled saves from earlier runs are resumed.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="lighthouse-upload-queue")
+            self._thread.start()
+
+    def flush(self, timeout=None):
+        """
+        Upload every pending object now and wait until the queue is empty.
+
+        Args:
+            timeout: Optional maximum number of seconds to wait
+
+        Returns:
+            flushed: True if nothing is pending anymore
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pending_uploads SET next_attempt_at = ? WHERE account = ?", (time.time(), self.account)
+            )
+        if self._thread is None:
+            self.process_due()
+            return not self.pending_count()
+
+        deadline = None if timeout is None else time.time() + timeout
+        self._wakeup.set()
+        while self.pending_count():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout=None):
+        """
+        Stop the background upload worker. Pending saves stay in the journal.
+
+        Args:
+            timeout: Optional maximum number of seconds to wait for it
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,361 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+
+
+class ColumnarPayload:
+    """
+    Compact binary serialization of ML job payloads.
+
+    The per-transaction feature dicts produced by DataProcessor.prepare_for_ml are
+    stored as one contiguous little-endian array per feature, and dates as day
+    numbers, instead of JSON objects that repeat every key for every row. The rest
+    of the payload (task, parameters, category mapping, ...) goes into a small JSON
+    header.
+
+    Wire formats, most compact first:
+        lpwf-2+zstd / lpwf-2+zlib: float32 floats (cent amounts restored exactly),
+            narrowed integers, delta-encoded day offsets, compressed column body
+        lpwf-1: full-width columns, uncompressed
+        json: the payload as JSON
+
+    Layout (lpwf):
+        MAGIC | version (uint8) | header length (uint32) | header JSON | column body
+    """
+
+    MAGIC = b"LPWF"
+    VERSION = 1
+    COMPACT_VERSION = 2
+
+    FORMATS = ("lpwf-2+zstd", "lpwf-2+zlib", "lpwf-1", "json")
+    DEFAULT_FORMAT = "lpwf-1"
+
+    # Columns holding day numbers; sorted histories turn into tiny deltas
+    DAY_COLUMNS = ("dates", "days_since_first")
+
+    # float32 restores values with this many decimals exactly below this magnitude
+    DECIMALS = 2
+    EXACT_FLOAT32_LIMIT = 2 ** 17
+
+    _PREFIX = struct.Struct("<4sBI")
+
+    @staticmethod
+    def _zstd():
+        try:
+            import zstandard
+        except ImportError:
+            return None
+        return zstandard
+
+    @classmethod
+    def supported_formats(cls):
+        """
+        Wire formats this installation can produce, most compact first.
+
+        Returns:
+            formats: Tuple of format names
+        """
+        if cls._zstd() is None:
+            return tuple(f for f in cls.FORMATS if not f.endswith("+zstd"))
+        return cls.FORMATS
+
+    @classmethod
+    def negotiate(cls, accepted):
+        """
+        Pick the most compact format both sides support.
+
+        Args:
+            accepted: Format names accepted by the receiver
+
+        Returns:
+            wire_format: Chosen format name, or None if there is no common format
+        """
+        for wire_format in cls.supported_formats():
+            if wire_format in accepted:
+                return wire_format
+        return None
+
+    @staticmethod
+    def _prepared_data(payload):
+        """
+        Locate the prepare_for_ml output inside a job payload.
+
+        Args:
+            payload: Job payload, either prepared data or a dict wrapping it under "data"
+
+        Returns:
+            path: Key path to the prepared data ([] for the payload itself), or None
+        """
+        if isinstance(payload, dict) and isinstance(payload.get('features'), list):
+            return []
+        if isinstance(payload, dict) and isinstance(payload.get('data'), dict) and isinstance(payload['data'].get('features'), list):
+            return ['data']
+        return None
+
+    @staticmethod
+    def _narrow(values):
+        """
+        Smallest little-endian integer dtype that holds every value.
+
+        Args:
+            values: Integer array
+
+        Returns:
+            dtype: numpy dtype
+        """
+        low, high = (int(values.min()), int(values.max())) if values.size else (0, 0)
+        for dtype in ("<i1", "<i2", "<i4"):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return np.dtype(dtype)
+        return np.dtype("<i8")
+
+    @classmethod
+    def _encode_column(cls, name, column, compact):
+        """
+        Encode one column.
+
+        Args:
+            name: Column name
+            column: Column array in its logical dtype
+            compact: Apply the lpwf-2 encodings
+
+        Returns:
+            spec: Column description for the header
+            stored: Contiguous array written to the body
+        """
+        spec = {"name": name, "dtype": column.dtype.newbyteorder("<").str}
+        if not compact:
+            return spec, np.ascontiguousarray(column, dtype=spec["dtype"])
+
+        if name in cls.DAY_COLUMNS and column.dtype.kind in "iu":
+            # Day offsets: first value in the header, then successive differences
+            spec["encoding"] = "delta"
+            spec["start"] = int(column[0]) if column.size else 0
+            deltas = np.diff(column.astype(np.int64))
+            stored = deltas.astype(cls._narrow(deltas))
+        elif column.dtype.kind == "f":
+            stored = column.astype("<f4")
+            rounded = np.round(column, cls.DECIMALS)
+            if np.array_equal(rounded, column) and (np.abs(column) < cls.EXACT_FLOAT32_LIMIT).all():
+                spec["decimals"] = cls.DECIMALS
+        elif column.dtype.kind in "iub":
+            stored = column.astype(cls._narrow(column.astype(np.int64)))
+        else:
+            stored = column
+
+        spec["stored"] = stored.dtype.str
+        return spec, np.ascontiguousarray(stored)
+
+    @staticmethod
+    def _decode_column(spec, stored, rows):
+        """
+        Restore a column written by _encode_column.
+
+        Args:
+            spec: Column description from the header
+            stored: Stored array
+            rows: Number of rows
+
+        Returns:
+            column: Array in the column's logical dtype
+        """
+        if spec.get("encoding") == "delta":
+            column = np.empty(rows, dtype=np.int64)
+            if rows:
+                column[0] = spec["start"]
+                np.cumsum(stored, out=column[1:])
+                column[1:] += spec["start"]
+        elif "decimals" in spec:
+            column = np.round(stored.astype(np.float64), spec["decimals"])
+        else:
+            column = stored
+        return column.astype(spec["dtype"], copy=False)
+
+    @classmethod
+    def encode_columns(cls, payload, compact=False):
+        """
+        Split a payload into a JSON header and column arrays.
+
+        Args:
+            payload: Job payload
+            compact: Apply the lpwf-2 column encodings
+
+        Returns:
+            header: JSON-serializable dict describing the payload and its columns
+            columns: List of contiguous numpy arrays, in header order
+        """
+        path = cls._prepared_data(payload)
+        if path is None:
+            return {"meta": payload, "path": None, "columns": []}, []
+
+        prepared = payload if not path else payload['data']
+        features = prepared['features']
+        names = list(features[0]) if features else []
+
+        columns = []
+        specs = []
+        for name in names:
+            column = np.asarray([f[name] for f in features])
+            if column.dtype.kind not in "biuf":
+                raise ValueError(f"Feature {name} is not numeric")
+            spec, stored = cls._encode_column(name, column, compact)
+            specs.append(spec)
+            columns.append(stored)
+
+        if 'dates' in prepared:
+            days = np.asarray(prepared['dates'], dtype='datetime64[D]').astype(np.int32)
+            spec, stored = cls._encode_column("dates", days, compact)
+            spec["format"] = "days"
+            specs.append(spec)
+            columns.append(stored)
+
+        rest = {key: value for key, value in prepared.items() if key not in ('features', 'dates')}
+        if path:
+            meta = {key: value for key, value in payload.items() if key != 'data'}
+            meta['data'] = rest
+        else:
+            meta = rest
+
+        header = {
+            "meta": meta,
+            "path": path,
+            "rows": len(features),
+            "columns": specs
+        }
+        return header, columns
+
+    @classmethod
+    def _compressor(cls, compression):
+        """
+        Streaming compressor for the column body.
+
+        Args:
+            compression: "zstd" or "zlib"
+
+        Returns:
+            compressor: Object with compress(data) and flush() methods
+        """
+        if compression == "zstd":
+            zstandard = cls._zstd()
+            if zstandard is None:
+                raise ValueError("zstandard is not installed")
+            return zstandard.ZstdCompressor(level=3).compressobj()
+        return zlib.compressobj(6)
+
+    @classmethod
+    def iter_encode(cls, payload, wire_format=DEFAULT_FORMAT):
+        """
+        Serialize a payload as a sequence of byte buffers.
+
+        Uncompressed columns are yielded without copying.
+
+        Args:
+            payload: Job payload
+            wire_format: One of FORMATS
+
+        Returns:
+            buffers: Generator of bytes-like objects whose concatenation is the payload
+        """
+        if wire_format == "json":
+            yield json.dumps(payload).encode("utf-8")
+            return
+        if wire_format not in cls.FORMATS:
+            raise ValueError(f"Unknown wire format: {wire_format}")
+
+        compact = wire_format.startswith("lpwf-2")
+        header, columns = cls.encode_columns(payload, compact=compact)
+        if compact:
+            header["compression"] = wire_format.split("+")[1]
+
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        version = cls.COMPACT_VERSION if compact else cls.VERSION
+        yield cls._PREFIX.pack(cls.MAGIC, version, len(header_bytes))
+        yield header_bytes
+
+        if not compact:
+            for column in columns:
+                yield memoryview(column).cast("B")
+            return
+
+        compressor = cls._compressor(header["compression"])
+        for column in columns:
+            compressed = compressor.compress(memoryview(column).cast("B"))
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    @classmethod
+    def encode(cls, payload, wire_format=DEFAULT_FORMAT):
+        """
+        Serialize a payload.
+
+        Args:
+            payload: Job payload
+            wire_format: One of FORMATS
+
+        Returns:
+            encoded: Serialized payload bytes
+        """
+        return b"".join(cls.iter_encode(payload, wire_format))
+
+    @classmethod
+    def decode(cls, encoded):
+        """
+        Deserialize a payload produced by encode, in any wire format.
+
+        Args:
+            encoded: Serialized payload bytes
+
+        Returns:
+            payload: Job payload with features as a list of dicts, as produced by prepare_for_ml
+        """
+        if bytes(encoded[:len(cls.MAGIC)]) != cls.MAGIC:
+            return json.loads(bytes(encoded))
+
+        _, version, header_length = cls._PREFIX.unpack_from(encoded)
+        if version not in (cls.VERSION, cls.COMPACT_VERSION):
+            raise ValueError(f"Unsupported payload version: {version}")
+
+        offset = cls._PREFIX.size
+        header = json.loads(bytes(encoded[offset:offset + header_length]))
+        offset += header_length
+
+        if header['path'] is None:
+            return header['meta']
+
+        body = encoded
+        if header.get("compression") == "zstd":
+            zstandard = cls._zstd()
+            if zstandard is None:
+                raise ValueError("zstandard is not installed")
+            body = zstandard.ZstdDecompressor().decompressobj().decompress(bytes(encoded[offset:]))
+            offset = 0
+        elif header.get("compression") == "zlib":
+            body = zlib.decompress(bytes(encoded[offset:]))
+            offset = 0
+
+        rows = header['rows']
+        columns = {}
+        for spec in header['columns']:
+            stored_dtype = np.dtype(spec.get('stored', spec['dtype']))
+            count = rows - 1 if spec.get('encoding') == 'delta' and rows else rows
+            stored = np.frombuffer(body, dtype=stored_dtype, count=count, offset=offset)
+            offset += stored_dtype.itemsize * count
+            columns[spec['name']] = cls._decode_column(spec, stored, rows)
+
+        prepared = dict(header['meta']['data'] if header['path'] else header['meta'])
+        dates = columns.pop('dates', None)
+        names = list(columns)
+        values = [columns[name].tolist() for name in names]
+        prepared['features'] = [dict(zip(names, row)) for row in zip(*values)]
+        if dates is not None:
+            prepared['dates'] = np.datetime_as_string(dates.astype('datetime64[D]'), unit='D').tolist()
+
+        if header['path']:
+            payload = dict(header['meta'])
+            payload['data'] = prepared
+            return payload
+        return prepared